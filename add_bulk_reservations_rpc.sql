@@ -0,0 +1,94 @@
+-- =====================================================
+-- AGREGAR FUNCIÓN create_reservations_bulk
+-- Ejecutar en Supabase SQL Editor (después de add_create_reservation_rpc.sql)
+-- =====================================================
+
+-- Crea un lote de reservas (importación masiva) en una transacción.
+--   1. Bloquea de una vez, en orden, las fechas Full Day (advisory lock) y
+--      las habitaciones (FOR UPDATE) de todo el lote: los mismos bloqueos
+--      que create_reservation_atomic, así una reserva pública concurrente
+--      espera o es esperada, nunca se cruza con el lote
+--   2. Crea cada fila con create_reservation_atomic, que vuelve a verificar
+--      disponibilidad, capacidad y cliente bajo esos bloqueos y calcula el
+--      precio. Cada fila va en su propio bloque: si se rechaza, solo esa
+--      fila se deshace y el resto del lote sigue
+--
+-- p_rows: [{"row": 1, "client_name": ..., "client_document": ...,
+--           "client_email": ..., "client_phone": ..., "reservation_type": ...,
+--           "check_in_date": ..., "check_out_date": ..., "num_guests": ...,
+--           "room_ids": [...], "notes": ...}, ...]
+-- Devuelve una entrada por fila, en el mismo orden:
+--   {"row", "status" (created | rejected | failed), "reservation_id",
+--    "total_price", "error"}
+CREATE OR REPLACE FUNCTION create_reservations_bulk(p_rows JSONB)
+RETURNS JSONB AS $$
+DECLARE
+  v_row JSONB;
+  v_created JSON;
+  v_results JSONB := '[]'::jsonb;
+  v_day DATE;
+BEGIN
+  -- 1. Bloqueos del lote completo
+  FOR v_day IN
+    SELECT DISTINCT (r->>'check_in_date')::date
+    FROM jsonb_array_elements(p_rows) AS r
+    WHERE r->>'reservation_type' = 'fullday'
+    ORDER BY 1
+  LOOP
+    PERFORM pg_advisory_xact_lock(hashtext('fullday:' || v_day::text));
+  END LOOP;
+
+  PERFORM 1 FROM rooms
+  WHERE id IN (
+    SELECT (jsonb_array_elements_text(r->'room_ids'))::uuid
+    FROM jsonb_array_elements(p_rows) AS r
+    WHERE r->>'reservation_type' = 'hospedaje'
+  )
+  ORDER BY id
+  FOR UPDATE;
+
+  -- 2. Filas, cada una con su propio punto de restauración
+  FOR v_row IN SELECT * FROM jsonb_array_elements(p_rows)
+  LOOP
+    BEGIN
+      v_created := create_reservation_atomic(
+        v_row->>'client_name',
+        v_row->>'client_document',
+        v_row->>'client_email',
+        v_row->>'client_phone',
+        (v_row->>'reservation_type')::reservation_type,
+        (v_row->>'check_in_date')::date,
+        (v_row->>'check_out_date')::date,
+        (v_row->>'num_guests')::integer,
+        ARRAY(SELECT jsonb_array_elements_text(COALESCE(v_row->'room_ids', '[]'::jsonb))::uuid),
+        v_row->>'notes'
+      );
+
+      v_results := v_results || jsonb_build_object(
+        'row', (v_row->>'row')::integer,
+        'status', 'created',
+        'reservation_id', v_created->>'id',
+        'total_price', (v_created->>'total_price')::numeric,
+        'error', NULL
+      );
+    EXCEPTION
+      -- RAISE EXCEPTION de las reglas de negocio (disponibilidad, capacidad, cliente)
+      WHEN raise_exception THEN
+        v_results := v_results || jsonb_build_object(
+          'row', (v_row->>'row')::integer, 'status', 'rejected',
+          'reservation_id', NULL, 'total_price', NULL, 'error', SQLERRM
+        );
+      WHEN OTHERS THEN
+        v_results := v_results || jsonb_build_object(
+          'row', (v_row->>'row')::integer, 'status', 'failed',
+          'reservation_id', NULL, 'total_price', NULL, 'error', 'Error saving reservation'
+        );
+    END;
+  END LOOP;
+
+  RETURN v_results;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+REVOKE EXECUTE ON FUNCTION create_reservations_bulk(JSONB) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION create_reservations_bulk(JSONB) TO service_role;
@@ -0,0 +1,161 @@
+-- =====================================================
+-- AGREGAR FUNCIÓN create_reservation_atomic
+-- Ejecutar en Supabase SQL Editor
+-- =====================================================
+
+-- Crea una reserva completa en una sola transacción:
+--   1. Bloquea las habitaciones (FOR UPDATE) o la fecha Full Day
+--      (advisory lock) para serializar reservas concurrentes
+--   2. Verifica disponibilidad (bloqueos, reservas existentes, capacidad)
+--   3. Crea o actualiza el cliente por documento
+--   4. Calcula el precio (rooms.price_per_night de las filas bloqueadas),
+--      inserta la reserva y sus habitaciones
+-- Devuelve la reserva con la forma de ReservationResponse.
+--
+-- La capacidad y el precio Full Day son constantes de la función (iguales al
+-- trigger validate_fullday_capacity y a config.py), no parámetros: al ser
+-- SECURITY DEFINER, las reglas no pueden venir del cliente. Solo service_role
+-- puede ejecutarla; el backend la llama con SUPABASE_SERVICE_KEY.
+DROP FUNCTION IF EXISTS create_reservation_atomic(
+  TEXT, TEXT, TEXT, TEXT, reservation_type, DATE, DATE, INTEGER, UUID[], TEXT, INTEGER, NUMERIC
+);
+DROP FUNCTION IF EXISTS create_reservation_atomic(
+  TEXT, TEXT, TEXT, TEXT, reservation_type, DATE, DATE, INTEGER, UUID[], TEXT, INTEGER, NUMERIC, NUMERIC
+);
+DROP FUNCTION IF EXISTS create_reservation_atomic(
+  TEXT, TEXT, TEXT, TEXT, reservation_type, DATE, DATE, INTEGER, UUID[], TEXT, NUMERIC
+);
+
+CREATE OR REPLACE FUNCTION create_reservation_atomic(
+  p_client_name TEXT,
+  p_client_document TEXT,
+  p_client_email TEXT,
+  p_client_phone TEXT,
+  p_reservation_type reservation_type,
+  p_check_in_date DATE,
+  p_check_out_date DATE,
+  p_num_guests INTEGER,
+  p_room_ids UUID[],
+  p_notes TEXT
+) RETURNS JSON AS $$
+DECLARE
+  c_max_fullday_capacity CONSTANT INTEGER := 20;
+  c_fullday_price CONSTANT NUMERIC := 5.00;
+  v_client clients%ROWTYPE;
+  v_reservation reservations%ROWTYPE;
+  v_total_price NUMERIC;
+  v_booked INTEGER;
+  v_room_count INTEGER;
+  v_room_names TEXT[];
+BEGIN
+  -- 1 y 2. Bloqueo y disponibilidad
+  IF p_reservation_type = 'fullday' THEN
+    PERFORM pg_advisory_xact_lock(hashtext('fullday:' || p_check_in_date::text));
+
+    SELECT COALESCE(SUM(num_guests), 0) INTO v_booked
+    FROM reservations
+    WHERE reservation_type = 'fullday'
+      AND check_in_date = p_check_in_date
+      AND status IN ('confirmed', 'pending');
+
+    IF v_booked + p_num_guests > c_max_fullday_capacity THEN
+      RAISE EXCEPTION 'Full day capacity exceeded for this date';
+    END IF;
+
+    v_total_price := p_num_guests * c_fullday_price;
+  ELSE
+    -- Una habitación repetida se reserva una vez (conservando el orden)
+    SELECT array_agg(id ORDER BY ord) INTO p_room_ids
+    FROM (
+      SELECT DISTINCT ON (id) id, ord
+      FROM unnest(p_room_ids) WITH ORDINALITY AS t(id, ord)
+      ORDER BY id, ord
+    ) AS d;
+
+    PERFORM 1 FROM rooms WHERE id = ANY(p_room_ids) ORDER BY id FOR UPDATE;
+    GET DIAGNOSTICS v_room_count = ROW_COUNT;
+
+    IF v_room_count <> cardinality(p_room_ids) THEN
+      RAISE EXCEPTION 'Room not found';
+    END IF;
+
+    IF EXISTS (
+      SELECT 1 FROM availability_blocks b
+      WHERE (b.room_id = ANY(p_room_ids) OR b.room_id IS NULL)
+        AND b.start_date < p_check_out_date
+        AND b.end_date >= p_check_in_date
+    ) OR EXISTS (
+      SELECT 1 FROM reservation_rooms rr
+      JOIN reservations r ON r.id = rr.reservation_id
+      WHERE rr.room_id = ANY(p_room_ids)
+        AND r.status IN ('confirmed', 'pending')
+        AND r.check_in_date < p_check_out_date
+        AND COALESCE(r.check_out_date, r.check_in_date) > p_check_in_date
+    ) THEN
+      RAISE EXCEPTION 'Room not available for selected dates';
+    END IF;
+
+    SELECT SUM(price_per_night) * (p_check_out_date - p_check_in_date) INTO v_total_price
+    FROM rooms WHERE id = ANY(p_room_ids);
+  END IF;
+
+  -- 3. Cliente (un documento = un nombre)
+  INSERT INTO clients (full_name, id_document, email, phone)
+  VALUES (p_client_name, p_client_document, p_client_email, p_client_phone)
+  ON CONFLICT (id_document) DO NOTHING
+  RETURNING * INTO v_client;
+
+  IF v_client.id IS NULL THEN
+    SELECT * INTO v_client FROM clients WHERE id_document = p_client_document FOR UPDATE;
+
+    IF lower(regexp_replace(trim(v_client.full_name), '\s+', ' ', 'g'))
+       <> lower(regexp_replace(trim(p_client_name), '\s+', ' ', 'g')) THEN
+      RAISE EXCEPTION 'El documento % ya está registrado con otro nombre (%). Si eres el mismo cliente, usa el nombre registrado.',
+        p_client_document, v_client.full_name;
+    END IF;
+
+    UPDATE clients SET email = p_client_email, phone = p_client_phone
+    WHERE id = v_client.id
+    RETURNING * INTO v_client;
+  END IF;
+
+  -- 4. Reserva y habitaciones
+  INSERT INTO reservations (
+    client_id, reservation_type, check_in_date, check_out_date, num_guests,
+    total_price, status, notes, whatsapp_confirmation_sent, email_confirmation_sent
+  ) VALUES (
+    v_client.id, p_reservation_type, p_check_in_date, p_check_out_date, p_num_guests,
+    v_total_price, 'pending', p_notes, false, false
+  ) RETURNING * INTO v_reservation;
+
+  IF p_reservation_type = 'hospedaje' THEN
+    INSERT INTO reservation_rooms (reservation_id, room_id)
+    SELECT v_reservation.id, unnest(p_room_ids);
+
+    SELECT array_agg(name ORDER BY array_position(p_room_ids, id)) INTO v_room_names
+    FROM rooms WHERE id = ANY(p_room_ids);
+  END IF;
+
+  RETURN json_build_object(
+    'id', v_reservation.id,
+    'reservation_type', v_reservation.reservation_type,
+    'check_in_date', v_reservation.check_in_date,
+    'check_out_date', v_reservation.check_out_date,
+    'num_guests', v_reservation.num_guests,
+    'total_price', v_reservation.total_price,
+    'status', v_reservation.status,
+    'client_name', v_client.full_name,
+    'client_phone', v_client.phone,
+    'client_email', v_client.email,
+    'rooms', COALESCE(v_room_names, ARRAY[]::TEXT[]),
+    'created_at', v_reservation.created_at
+  );
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+REVOKE EXECUTE ON FUNCTION create_reservation_atomic(
+  TEXT, TEXT, TEXT, TEXT, reservation_type, DATE, DATE, INTEGER, UUID[], TEXT
+) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION create_reservation_atomic(
+  TEXT, TEXT, TEXT, TEXT, reservation_type, DATE, DATE, INTEGER, UUID[], TEXT
+) TO service_role;
@@ -0,0 +1,43 @@
+-- =====================================================
+-- AGREGAR FUNCIÓN get_dashboard_stats (estadísticas del panel admin)
+-- Ejecutar en Supabase SQL Editor
+-- =====================================================
+
+-- Todas las métricas de DashboardStats en una sola pasada.
+-- p_month/p_year NULL = todo el historial. p_today lo envía el backend
+-- (fecha UTC) para calcular los check-ins de los próximos 7 días.
+CREATE OR REPLACE FUNCTION get_dashboard_stats(
+  p_month INTEGER DEFAULT NULL,
+  p_year INTEGER DEFAULT NULL,
+  p_today DATE DEFAULT CURRENT_DATE
+) RETURNS TABLE (
+  total_reservations BIGINT,
+  pending_reservations BIGINT,
+  confirmed_reservations BIGINT,
+  cancelled_reservations BIGINT,
+  total_revenue NUMERIC,
+  fullday_bookings BIGINT,
+  hospedaje_bookings BIGINT,
+  upcoming_checkins BIGINT
+) AS $$
+  SELECT
+    COUNT(*),
+    COUNT(*) FILTER (WHERE r.status = 'pending'),
+    COUNT(*) FILTER (WHERE r.status = 'confirmed'),
+    COUNT(*) FILTER (WHERE r.status = 'cancelled'),
+    COALESCE(SUM(r.total_price) FILTER (WHERE r.status IN ('confirmed', 'completed')), 0),
+    COUNT(*) FILTER (WHERE r.reservation_type = 'fullday'),
+    COUNT(*) FILTER (WHERE r.reservation_type = 'hospedaje'),
+    COUNT(*) FILTER (
+      WHERE r.status IN ('pending', 'confirmed')
+        AND r.check_in_date BETWEEN p_today AND p_today + 7
+    )
+  FROM reservations r
+  WHERE p_month IS NULL OR p_year IS NULL OR (
+    r.check_in_date >= make_date(p_year, p_month, 1)
+    AND r.check_in_date < make_date(p_year, p_month, 1) + INTERVAL '1 month'
+  );
+$$ LANGUAGE sql STABLE;
+
+-- Verificar
+SELECT * FROM get_dashboard_stats(EXTRACT(MONTH FROM CURRENT_DATE)::int, EXTRACT(YEAR FROM CURRENT_DATE)::int);
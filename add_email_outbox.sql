@@ -0,0 +1,44 @@
+-- =====================================================
+-- AGREGAR TABLA email_outbox
+-- Ejecutar en Supabase SQL Editor
+-- =====================================================
+
+-- Correos pendientes de envío. El backend inserta la fila y responde de
+-- inmediato; un worker en segundo plano la envía con reintentos.
+--   pending: esperando next_attempt_at
+--   sending: tomada por un worker hasta next_attempt_at (si el worker muere,
+--            otro la retoma al vencer ese plazo)
+--   sent:    enviada
+--   dead:    agotó los reintentos; revisar last_error
+-- Al pasar a sent o dead se vacía html: puede llevar un código de
+-- recuperación de contraseña.
+CREATE TABLE IF NOT EXISTS email_outbox (
+  id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+  kind VARCHAR(50) NOT NULL,
+  recipient VARCHAR(255) NOT NULL,
+  subject VARCHAR(255) NOT NULL,
+  html TEXT NOT NULL,
+  reservation_id UUID REFERENCES reservations(id) ON DELETE SET NULL,
+  status VARCHAR(20) NOT NULL DEFAULT 'pending'
+    CHECK (status IN ('pending', 'sending', 'sent', 'dead')),
+  attempts INTEGER NOT NULL DEFAULT 0,
+  next_attempt_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+  last_error TEXT,
+  sent_at TIMESTAMP WITH TIME ZONE,
+  created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+  updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- Cola de trabajo del worker: solo filas por enviar, por vencimiento
+CREATE INDEX IF NOT EXISTS idx_email_outbox_due
+  ON email_outbox (next_attempt_at)
+  WHERE status IN ('pending', 'sending');
+
+ALTER TABLE email_outbox ENABLE ROW LEVEL SECURITY;
+
+-- Sin políticas: con la anon key no se puede leer ni escribir la tabla.
+-- El backend la usa con la service key (get_admin_db), que no pasa por RLS.
+-- DROP por si se ejecutó una versión anterior de este script.
+DROP POLICY IF EXISTS "Allow read email_outbox" ON email_outbox;
+DROP POLICY IF EXISTS "Allow insert email_outbox" ON email_outbox;
+DROP POLICY IF EXISTS "Allow update email_outbox" ON email_outbox;
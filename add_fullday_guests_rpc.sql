@@ -0,0 +1,27 @@
+-- =====================================================
+-- AGREGAR FUNCIÓN get_fullday_guests (capacidad Full Day por fecha)
+-- Ejecutar en Supabase SQL Editor
+-- =====================================================
+
+-- Total de huéspedes Full Day (pendientes + confirmados) por fecha,
+-- solo para la ventana solicitada
+CREATE OR REPLACE FUNCTION get_fullday_guests(
+  p_start_date DATE,
+  p_end_date DATE
+) RETURNS TABLE (check_in_date DATE, total_guests BIGINT) AS $$
+  SELECT r.check_in_date, SUM(r.num_guests) AS total_guests
+  FROM reservations r
+  WHERE r.reservation_type = 'fullday'
+    AND r.status IN ('confirmed', 'pending')
+    AND r.check_in_date BETWEEN p_start_date AND p_end_date
+  GROUP BY r.check_in_date
+  ORDER BY r.check_in_date;
+$$ LANGUAGE sql STABLE;
+
+-- Índice parcial para que la agregación solo lea reservas Full Day activas
+CREATE INDEX IF NOT EXISTS idx_reservations_fullday_active
+ON reservations(check_in_date)
+WHERE reservation_type = 'fullday' AND status IN ('confirmed', 'pending');
+
+-- Verificar
+SELECT * FROM get_fullday_guests(CURRENT_DATE, (CURRENT_DATE + INTERVAL '90 days')::date);
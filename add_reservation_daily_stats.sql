@@ -0,0 +1,188 @@
+-- =====================================================
+-- AGREGAR ROLLUP reservation_daily_stats
+-- Ejecutar en Supabase SQL Editor (después de add_dashboard_stats_rpc.sql)
+-- =====================================================
+
+-- Una fila por fecha de check-in, tipo y estado. Los triggers la mantienen
+-- al día en cada INSERT/UPDATE/DELETE de reservations. reservations.status
+-- admite NULL; esas filas se cuentan como 'pending' (su valor por defecto).
+CREATE TABLE IF NOT EXISTS reservation_daily_stats (
+  stat_date DATE NOT NULL,
+  reservation_type reservation_type NOT NULL,
+  status reservation_status NOT NULL,
+  reservation_count INTEGER NOT NULL DEFAULT 0,
+  total_guests INTEGER NOT NULL DEFAULT 0,
+  total_revenue DECIMAL(12,2) NOT NULL DEFAULT 0,
+  updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+
+  PRIMARY KEY (stat_date, reservation_type, status)
+);
+
+ALTER TABLE reservation_daily_stats ENABLE ROW LEVEL SECURITY;
+
+-- Sumar (p_sign = 1) o restar (p_sign = -1) una reserva del rollup
+CREATE OR REPLACE FUNCTION apply_reservation_daily_stats(
+  p_date DATE,
+  p_type reservation_type,
+  p_status reservation_status,
+  p_guests INTEGER,
+  p_price DECIMAL,
+  p_sign INTEGER
+) RETURNS VOID AS $$
+BEGIN
+  INSERT INTO reservation_daily_stats AS s
+    (stat_date, reservation_type, status, reservation_count, total_guests, total_revenue)
+  VALUES
+    (p_date, p_type, p_status, p_sign, p_sign * COALESCE(p_guests, 0), p_sign * COALESCE(p_price, 0))
+  ON CONFLICT (stat_date, reservation_type, status) DO UPDATE SET
+    reservation_count = s.reservation_count + EXCLUDED.reservation_count,
+    total_guests = s.total_guests + EXCLUDED.total_guests,
+    total_revenue = s.total_revenue + EXCLUDED.total_revenue,
+    updated_at = NOW();
+
+  DELETE FROM reservation_daily_stats
+  WHERE stat_date = p_date
+    AND reservation_type = p_type
+    AND status = p_status
+    AND reservation_count = 0;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+CREATE OR REPLACE FUNCTION maintain_reservation_daily_stats()
+RETURNS TRIGGER AS $$
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    PERFORM apply_reservation_daily_stats(
+      OLD.check_in_date, OLD.reservation_type, COALESCE(OLD.status, 'pending'), OLD.num_guests, OLD.total_price, -1
+    );
+  END IF;
+
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    PERFORM apply_reservation_daily_stats(
+      NEW.check_in_date, NEW.reservation_type, COALESCE(NEW.status, 'pending'), NEW.num_guests, NEW.total_price, 1
+    );
+  END IF;
+
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+DROP TRIGGER IF EXISTS reservation_daily_stats_sync ON reservations;
+CREATE TRIGGER reservation_daily_stats_sync
+  AFTER INSERT OR UPDATE OR DELETE ON reservations
+  FOR EACH ROW
+  EXECUTE FUNCTION maintain_reservation_daily_stats();
+
+-- Recalcular el rollup completo desde reservations (backfill / reparación)
+CREATE OR REPLACE FUNCTION rebuild_reservation_daily_stats()
+RETURNS INTEGER AS $$
+DECLARE
+  row_count INTEGER;
+BEGIN
+  LOCK TABLE reservations IN SHARE MODE;
+
+  DELETE FROM reservation_daily_stats WHERE TRUE;
+
+  INSERT INTO reservation_daily_stats
+    (stat_date, reservation_type, status, reservation_count, total_guests, total_revenue)
+  SELECT check_in_date, reservation_type, COALESCE(status, 'pending'),
+         COUNT(*), COALESCE(SUM(num_guests), 0), COALESCE(SUM(total_price), 0)
+  FROM reservations
+  GROUP BY check_in_date, reservation_type, COALESCE(status, 'pending');
+
+  GET DIAGNOSTICS row_count = ROW_COUNT;
+  RETURN row_count;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+-- Comparar el rollup con un recálculo completo; devuelve solo las diferencias
+CREATE OR REPLACE FUNCTION check_reservation_daily_stats()
+RETURNS TABLE (
+  stat_date DATE,
+  reservation_type reservation_type,
+  status reservation_status,
+  rollup_count INTEGER,
+  actual_count BIGINT,
+  rollup_guests INTEGER,
+  actual_guests BIGINT,
+  rollup_revenue DECIMAL,
+  actual_revenue DECIMAL
+) AS $$
+  WITH actual AS (
+    SELECT check_in_date AS stat_date, reservation_type, COALESCE(status, 'pending') AS status,
+           COUNT(*) AS reservation_count,
+           COALESCE(SUM(num_guests), 0) AS total_guests,
+           COALESCE(SUM(total_price), 0) AS total_revenue
+    FROM reservations
+    GROUP BY check_in_date, reservation_type, COALESCE(status, 'pending')
+  )
+  SELECT
+    COALESCE(s.stat_date, a.stat_date),
+    COALESCE(s.reservation_type, a.reservation_type),
+    COALESCE(s.status, a.status),
+    s.reservation_count, a.reservation_count,
+    s.total_guests, a.total_guests,
+    s.total_revenue, a.total_revenue
+  FROM reservation_daily_stats s
+  FULL OUTER JOIN actual a
+    ON a.stat_date = s.stat_date
+   AND a.reservation_type = s.reservation_type
+   AND a.status = s.status
+  WHERE s.reservation_count IS DISTINCT FROM a.reservation_count
+     OR s.total_guests IS DISTINCT FROM a.total_guests
+     OR s.total_revenue IS DISTINCT FROM a.total_revenue
+  ORDER BY 1, 2, 3;
+$$ LANGUAGE sql STABLE SECURITY DEFINER SET search_path = public;
+
+-- get_dashboard_stats ahora lee el rollup en lugar de recorrer reservations
+CREATE OR REPLACE FUNCTION get_dashboard_stats(
+  p_month INTEGER DEFAULT NULL,
+  p_year INTEGER DEFAULT NULL,
+  p_today DATE DEFAULT CURRENT_DATE
+) RETURNS TABLE (
+  total_reservations BIGINT,
+  pending_reservations BIGINT,
+  confirmed_reservations BIGINT,
+  cancelled_reservations BIGINT,
+  total_revenue NUMERIC,
+  fullday_bookings BIGINT,
+  hospedaje_bookings BIGINT,
+  upcoming_checkins BIGINT
+) AS $$
+  SELECT
+    COALESCE(SUM(s.reservation_count), 0)::bigint,
+    COALESCE(SUM(s.reservation_count) FILTER (WHERE s.status = 'pending'), 0)::bigint,
+    COALESCE(SUM(s.reservation_count) FILTER (WHERE s.status = 'confirmed'), 0)::bigint,
+    COALESCE(SUM(s.reservation_count) FILTER (WHERE s.status = 'cancelled'), 0)::bigint,
+    COALESCE(SUM(s.total_revenue) FILTER (WHERE s.status IN ('confirmed', 'completed')), 0),
+    COALESCE(SUM(s.reservation_count) FILTER (WHERE s.reservation_type = 'fullday'), 0)::bigint,
+    COALESCE(SUM(s.reservation_count) FILTER (WHERE s.reservation_type = 'hospedaje'), 0)::bigint,
+    COALESCE(SUM(s.reservation_count) FILTER (
+      WHERE s.status IN ('pending', 'confirmed')
+        AND s.stat_date BETWEEN p_today AND p_today + 7
+    ), 0)::bigint
+  FROM reservation_daily_stats s
+  WHERE p_month IS NULL OR p_year IS NULL OR (
+    s.stat_date >= make_date(p_year, p_month, 1)
+    AND s.stat_date < make_date(p_year, p_month, 1) + INTERVAL '1 month'
+  );
+$$ LANGUAGE sql STABLE SECURITY DEFINER SET search_path = public;
+
+-- Solo el backend (service_role) ejecuta estas funciones; con la anon key
+-- cualquiera podría escribir en el rollup o bloquear reservations
+REVOKE EXECUTE ON FUNCTION apply_reservation_daily_stats(DATE, reservation_type, reservation_status, INTEGER, DECIMAL, INTEGER)
+  FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION maintain_reservation_daily_stats() FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION rebuild_reservation_daily_stats() FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION check_reservation_daily_stats() FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION get_dashboard_stats(INTEGER, INTEGER, DATE) FROM PUBLIC, anon, authenticated;
+
+GRANT EXECUTE ON FUNCTION rebuild_reservation_daily_stats() TO service_role;
+GRANT EXECUTE ON FUNCTION check_reservation_daily_stats() TO service_role;
+GRANT EXECUTE ON FUNCTION get_dashboard_stats(INTEGER, INTEGER, DATE) TO service_role;
+
+-- Backfill inicial
+SELECT rebuild_reservation_daily_stats() AS filas_rollup;
+
+-- Verificar (no debe devolver filas)
+SELECT * FROM check_reservation_daily_stats();
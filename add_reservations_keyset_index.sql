@@ -0,0 +1,14 @@
+-- =====================================================
+-- ÍNDICE PARA PAGINACIÓN POR CURSOR (created_at, id)
+-- Ejecutar en Supabase SQL Editor
+-- =====================================================
+
+-- Los listados de reservas se ordenan por (created_at DESC, id DESC) y
+-- continúan desde el último (created_at, id) visto. Se reemplaza
+-- idx_reservations_created por la versión compuesta para que cada página
+-- sea un recorrido de índice sin ordenar ni descartar filas.
+DROP INDEX IF EXISTS idx_reservations_created;
+CREATE INDEX idx_reservations_created ON reservations(created_at DESC, id DESC);
+
+-- Verificar
+SELECT indexname, indexdef FROM pg_indexes WHERE indexname = 'idx_reservations_created';
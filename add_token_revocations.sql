@@ -0,0 +1,30 @@
+-- =====================================================
+-- AGREGAR REVOCACIÓN PERSISTENTE DE TOKENS
+-- Ejecutar en Supabase SQL Editor
+-- =====================================================
+
+-- Restablecer la contraseña invalida todos los tokens emitidos antes de
+-- este instante (claim iat). NULL: ninguno revocado.
+ALTER TABLE admin_users
+  ADD COLUMN IF NOT EXISTS tokens_valid_after TIMESTAMP WITH TIME ZONE;
+
+-- Tokens cerrados con logout (claim jti). Solo hace falta guardarlos hasta
+-- que expiran; el backend borra los vencidos al revocar otro.
+CREATE TABLE IF NOT EXISTS revoked_tokens (
+  jti VARCHAR(64) PRIMARY KEY,
+  subject VARCHAR(100) NOT NULL,
+  expires_at TIMESTAMP WITH TIME ZONE NOT NULL,
+  created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_revoked_tokens_expires_at ON revoked_tokens (expires_at);
+
+ALTER TABLE revoked_tokens ENABLE ROW LEVEL SECURITY;
+
+-- Sin políticas: con la anon key no se puede leer ni escribir la tabla.
+-- El backend la lee y escribe con la service key (get_admin_db), que no
+-- pasa por RLS. DROP por si se ejecutó una versión anterior de este script.
+DROP POLICY IF EXISTS "Allow read revoked_tokens" ON revoked_tokens;
+DROP POLICY IF EXISTS "Allow insert revoked_tokens" ON revoked_tokens;
+DROP POLICY IF EXISTS "Allow update revoked_tokens" ON revoked_tokens;
+DROP POLICY IF EXISTS "Allow delete revoked_tokens" ON revoked_tokens;
@@ -1,17 +1,41 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import Dict, Optional, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from config import settings
+from database import get_admin_db
+from metrics import (
+    password_hash_in_flight, password_hash_rejected_total,
+    token_verifications_total, token_verify_duration_seconds
+)
+import asyncio
+import hashlib
+import logging
 import os
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
 
 # Configuration
 SECRET_KEY = os.environ.get("JWT_SECRET_KEY", "cabanas-aquavalle-super-secret-key-2024")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24  # 24 hours
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# min = max = default rounds: hashes made with any other cost need an update,
+# which verify_and_update() performs on the next successful login
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS,
+)
 security = HTTPBearer()
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -20,13 +44,71 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
+
+class PasswordHasherBusy(Exception):
+    """Every bcrypt worker is busy and the wait queue is full"""
+
+
+class PasswordHasher:
+    """Runs bcrypt on its own small thread pool, off the event loop.
+
+    A bcrypt call takes a few hundred milliseconds but releases the GIL, so
+    on worker threads it no longer stalls every other request. At most
+    ``workers + max_queue`` calls are accepted at once; beyond that
+    PasswordHasherBusy is raised straight away so a login burst is answered
+    with a 503 instead of queueing without bound.
+    """
+
+    def __init__(self, context: CryptContext, workers: int, max_queue: int):
+        self.context = context
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    async def _run(self, fn, *args):
+        with self._lock:
+            if self._pending >= self.workers + self.max_queue:
+                password_hash_rejected_total.inc()
+                raise PasswordHasherBusy()
+            self._pending += 1
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='bcrypt')
+        password_hash_in_flight.inc()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            password_hash_in_flight.dec()
+            with self._lock:
+                self._pending -= 1
+
+    async def verify_and_update(self, password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+        """(valid, new hash if the stored one uses an outdated cost, else None)"""
+        return await self._run(self.context.verify_and_update, password, hashed)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self.context.hash, password)
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+password_hasher = PasswordHasher(pwd_context, settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_MAX_QUEUE)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.now(timezone.utc) + expires_delta
     else:
         expire = datetime.now(timezone.utc) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
+    # jti keeps two tokens issued in the same second distinct for revocation.
+    # iat is a fractional NumericDate (RFC 7519 allows it) so it can be
+    # compared with a password reset's cutoff at the same resolution
+    to_encode.update({"exp": expire, "iat": time.time(), "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
@@ -37,10 +119,204 @@ def decode_token(token: str) -> dict:
     except JWTError:
         return None
 
+def token_digest(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class VerifiedTokenCache:
+    """Bounded LRU of verified JWT payloads keyed by the token's SHA-256 digest.
+
+    The admin panel sends bursts of requests with the same token; only the
+    first one pays for the signature check. Entries are dropped once their
+    ``exp`` passes, so a cached token never outlives the token itself.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, digest: str) -> Optional[dict]:
+        with self._lock:
+            payload = self._entries.get(digest)
+            if payload is None:
+                return None
+            if payload.get("exp", 0) <= time.time():
+                del self._entries[digest]
+                return None
+            self._entries.move_to_end(digest)
+            return payload
+
+    def put(self, digest: str, payload: dict):
+        with self._lock:
+            self._entries[digest] = payload
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def discard(self, digest: str):
+        with self._lock:
+            self._entries.pop(digest, None)
+
+    def discard_subject(self, subject: str):
+        with self._lock:
+            for digest in [d for d, p in self._entries.items() if p.get("sub") == subject]:
+                del self._entries[digest]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class TokenRevocations:
+    """Tokens rejected before their ``exp``, persisted so every worker sees them.
+
+    Logout stores the token's ``jti`` in ``revoked_tokens`` until the token
+    would have expired anyway; a password reset sets the account's
+    ``admin_users.tokens_valid_after``, revoking every token issued before
+    it. Each process keeps a copy of both and re-reads them after
+    ``TOKEN_REVOCATION_TTL_SECONDS``: a revocation made by this process
+    applies at once, one made by another worker within that TTL, and a
+    restart loses none of them. Pass it the service-role database: anon has
+    no access to ``revoked_tokens``.
+    """
+
+    def __init__(self, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+        self._tokens: Dict[str, float] = {}  # jti -> exp
+        self._subjects: Dict[str, float] = {}  # sub -> tokens issued before this are revoked
+        self._loaded_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def is_stale(self) -> bool:
+        if self._loaded_at is None:
+            return True
+        return (time.monotonic() - self._loaded_at) > self.ttl_seconds
+
+    def invalidate(self):
+        """Force a reload on the next check"""
+        self._loaded_at = None
+
+    async def ensure_loaded(self, db):
+        if not self.is_stale():
+            return
+        try:
+            await self.load(db)
+        except Exception as e:
+            # Keep the last known revocations and try again on the next request
+            logger.warning("Could not reload token revocations: %s", e)
+
+    async def load(self, db):
+        now = datetime.now(timezone.utc).isoformat()
+        tokens = await db.table('revoked_tokens').select('jti, expires_at').gt('expires_at', now).execute()
+        admins = await db.table('admin_users').select('email, tokens_valid_after').execute()
+        with self._lock:
+            # A revocation made here while the queries ran may be missing from
+            # their results; keep local entries that have not expired yet
+            current = time.time()
+            loaded = {row['jti']: _timestamp(row['expires_at']) for row in tokens.data}
+            self._tokens = {
+                **{jti: exp for jti, exp in self._tokens.items() if exp > current},
+                **loaded
+            }
+            subjects = dict(self._subjects)
+            for row in admins.data:
+                if row.get('tokens_valid_after'):
+                    cutoff = _timestamp(row['tokens_valid_after'])
+                    subjects[row['email']] = max(cutoff, subjects.get(row['email'], cutoff))
+            self._subjects = subjects
+            self._loaded_at = time.monotonic()
+
+    async def revoke_token(self, db, jti: str, subject: str, exp: float):
+        with self._lock:
+            self._tokens[jti] = exp
+        now = datetime.now(timezone.utc)
+        await db.table('revoked_tokens').upsert({
+            'jti': jti,
+            'subject': subject,
+            'expires_at': datetime.fromtimestamp(exp, timezone.utc).isoformat()
+        }, on_conflict='jti').execute()
+        # Entries are only needed until the token expires
+        await db.table('revoked_tokens').delete().lt('expires_at', now.isoformat()).execute()
+
+    async def revoke_subject(self, db, subject: str):
+        cutoff = time.time()
+        with self._lock:
+            self._subjects[subject] = cutoff
+        await db.table('admin_users').update({
+            'tokens_valid_after': datetime.fromtimestamp(cutoff, timezone.utc).isoformat()
+        }).eq('email', subject).execute()
+
+    def is_revoked(self, payload: dict) -> bool:
+        if payload.get("jti") in self._tokens:
+            return True
+        cutoff = self._subjects.get(payload.get("sub"))
+        return cutoff is not None and payload.get("iat", 0) < cutoff
+
+    def clear(self):
+        with self._lock:
+            self._tokens.clear()
+            self._subjects.clear()
+            self._loaded_at = None
+
+
+def _timestamp(value: str) -> float:
+    return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+
+
+verified_tokens = VerifiedTokenCache(settings.TOKEN_CACHE_SIZE)
+token_revocations = TokenRevocations(settings.TOKEN_REVOCATION_TTL_SECONDS)
+
+
+def verify_token(token: str) -> Optional[dict]:
+    """Payload of a valid, unrevoked token, from the cache when possible.
+
+    Revocations are checked against token_revocations as last loaded; call
+    its ensure_loaded() first.
+    """
+    started = time.perf_counter()
+    digest = token_digest(token)
+    payload = verified_tokens.get(digest)
+    source = "cache"
+    if payload is None:
+        source = "jwt"
+        payload = decode_token(token)
+        if payload is not None:
+            verified_tokens.put(digest, payload)
+
+    if payload is None:
+        result = "invalid"
+    elif token_revocations.is_revoked(payload):
+        result = "revoked"
+        payload = None
+    else:
+        result = "hit" if source == "cache" else "miss"
+    token_verifications_total.inc(result=result)
+    token_verify_duration_seconds.observe(time.perf_counter() - started, source=source)
+    return payload
+
+
+async def revoke_token(token: str):
+    """Reject this token from now until it expires (logout)"""
+    digest = token_digest(token)
+    payload = verified_tokens.get(digest) or decode_token(token)
+    if payload is None or not payload.get("jti"):
+        return
+    await token_revocations.revoke_token(get_admin_db(), payload["jti"], payload.get("sub"), payload.get("exp", time.time()))
+    verified_tokens.discard(digest)
+
+
+async def revoke_subject_tokens(subject: str):
+    """Reject every token issued so far for this account (password reset)"""
+    await token_revocations.revoke_subject(get_admin_db(), subject)
+    verified_tokens.discard_subject(subject)
+
+
 async def get_current_admin(credentials: HTTPAuthorizationCredentials = Depends(security)):
     """Verify JWT token and return admin info"""
     token = credentials.credentials
-    payload = decode_token(token)
+    await token_revocations.ensure_loaded(get_admin_db())
+    payload = verify_token(token)
     
     if payload is None:
         raise HTTPException(
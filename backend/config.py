@@ -10,17 +10,83 @@ class Settings:
     SUPABASE_URL: str = os.getenv('SUPABASE_URL', '')
     SUPABASE_ANON_KEY: str = os.getenv('SUPABASE_ANON_KEY', '')
     SUPABASE_SERVICE_KEY: str = os.getenv('SUPABASE_SERVICE_KEY', '')
+    DB_MAX_CONCURRENCY: int = int(os.getenv('DB_MAX_CONCURRENCY', '16'))
+    
+    # Supabase HTTP connection pools (one per client: anon and service role)
+    DB_POOL_MAX_CONNECTIONS: int = int(os.getenv('DB_POOL_MAX_CONNECTIONS', '20'))
+    DB_POOL_MAX_KEEPALIVE: int = int(os.getenv('DB_POOL_MAX_KEEPALIVE', '10'))
+    DB_POOL_KEEPALIVE_EXPIRY: float = float(os.getenv('DB_POOL_KEEPALIVE_EXPIRY', '60'))
+    DB_TIMEOUT_SECONDS: float = float(os.getenv('DB_TIMEOUT_SECONDS', '10'))
+    DB_HTTP2: bool = os.getenv('DB_HTTP2', 'true').lower() == 'true'
     
     # WhatsApp
     WHATSAPP_NUMBER: str = '584247739434'
     
-    # Full Day
+    # Full Day (the database enforces the same values: create_reservation_atomic,
+    # validate_fullday_capacity)
     FULLDAY_PRICE: float = 5.0
     MAX_FULLDAY_CAPACITY: int = 20
     
+    # Availability
+    OCCUPANCY_INDEX_TTL_SECONDS: int = int(os.getenv('OCCUPANCY_INDEX_TTL_SECONDS', '60'))
+    BLOCK_SNAPSHOT_MAX_AGE_SECONDS: int = int(os.getenv('BLOCK_SNAPSHOT_MAX_AGE_SECONDS', '300'))
+    
+    # HTTP caching of the public availability endpoints
+    AVAILABILITY_CACHE_MAX_AGE: int = int(os.getenv('AVAILABILITY_CACHE_MAX_AGE', '15'))
+    AVAILABILITY_STALE_WHILE_REVALIDATE: int = int(os.getenv('AVAILABILITY_STALE_WHILE_REVALIDATE', '60'))
+    AVAILABILITY_VERSION_MAX_AGE_SECONDS: int = int(os.getenv('AVAILABILITY_VERSION_MAX_AGE_SECONDS', '60'))
+    
+    # Per-month availability snapshots: current month + the next ones (0 disables);
+    # set AVAILABILITY_SNAPSHOT_DIR to keep them on disk across restarts
+    AVAILABILITY_SNAPSHOT_MONTHS: int = int(os.getenv('AVAILABILITY_SNAPSHOT_MONTHS', '3'))
+    AVAILABILITY_SNAPSHOT_MAX_AGE_SECONDS: int = int(os.getenv('AVAILABILITY_SNAPSHOT_MAX_AGE_SECONDS', '60'))
+    AVAILABILITY_SNAPSHOT_DIR: str = os.getenv('AVAILABILITY_SNAPSHOT_DIR', '')
+    
+    # Availability change stream (GET /api/availability/stream)
+    AVAILABILITY_STREAM_HEARTBEAT_SECONDS: float = float(os.getenv('AVAILABILITY_STREAM_HEARTBEAT_SECONDS', '15'))
+    AVAILABILITY_STREAM_HISTORY: int = int(os.getenv('AVAILABILITY_STREAM_HISTORY', '500'))
+    AVAILABILITY_STREAM_QUEUE_SIZE: int = int(os.getenv('AVAILABILITY_STREAM_QUEUE_SIZE', '100'))
+    AVAILABILITY_STREAM_MAX_DAYS: int = int(os.getenv('AVAILABILITY_STREAM_MAX_DAYS', '366'))
+    
+    # Rooms catalog (changes rarely; see POST /api/admin/rooms/refresh)
+    ROOM_CATALOG_TTL_SECONDS: int = int(os.getenv('ROOM_CATALOG_TTL_SECONDS', '300'))
+    
+    # Bulk reservation import
+    BULK_IMPORT_MAX_ROWS: int = int(os.getenv('BULK_IMPORT_MAX_ROWS', '2000'))
+    BULK_INSERT_CHUNK_SIZE: int = int(os.getenv('BULK_INSERT_CHUNK_SIZE', '200'))
+    
+    # Per-request DB instrumentation: requests above either threshold get a debug log line
+    DB_SLOW_REQUEST_CALLS: int = int(os.getenv('DB_SLOW_REQUEST_CALLS', '10'))
+    DB_SLOW_REQUEST_MS: float = float(os.getenv('DB_SLOW_REQUEST_MS', '500'))
+    
+    # Email outbox: background sending with retries (see add_email_outbox.sql)
+    EMAIL_OUTBOX_CONCURRENCY: int = int(os.getenv('EMAIL_OUTBOX_CONCURRENCY', '4'))
+    EMAIL_OUTBOX_BATCH_SIZE: int = int(os.getenv('EMAIL_OUTBOX_BATCH_SIZE', '20'))
+    EMAIL_OUTBOX_POLL_SECONDS: float = float(os.getenv('EMAIL_OUTBOX_POLL_SECONDS', '30'))
+    EMAIL_OUTBOX_MAX_ATTEMPTS: int = int(os.getenv('EMAIL_OUTBOX_MAX_ATTEMPTS', '6'))
+    EMAIL_OUTBOX_BACKOFF_SECONDS: float = float(os.getenv('EMAIL_OUTBOX_BACKOFF_SECONDS', '30'))
+    EMAIL_OUTBOX_MAX_BACKOFF_SECONDS: float = float(os.getenv('EMAIL_OUTBOX_MAX_BACKOFF_SECONDS', '3600'))
+    EMAIL_SEND_TIMEOUT_SECONDS: float = float(os.getenv('EMAIL_SEND_TIMEOUT_SECONDS', '60'))
+    
+    # Logging
+    LOG_LEVEL: str = os.getenv('LOG_LEVEL', 'INFO')
+    LOG_FORMAT: str = os.getenv('LOG_FORMAT', 'json')  # json | text
+    # Per-logger overrides, e.g. "services.availability_service=DEBUG,httpx=WARNING"
+    LOG_LEVELS: str = os.getenv('LOG_LEVELS', 'httpx=WARNING,httpcore=WARNING')
+    
+    # Password hashing: bcrypt cost (stored hashes with another cost are
+    # rehashed on login) and the worker pool that runs it off the event loop
+    BCRYPT_ROUNDS: int = int(os.getenv('BCRYPT_ROUNDS', '12'))
+    PASSWORD_HASH_WORKERS: int = int(os.getenv('PASSWORD_HASH_WORKERS', '2'))
+    PASSWORD_HASH_MAX_QUEUE: int = int(os.getenv('PASSWORD_HASH_MAX_QUEUE', '8'))
+    
     # JWT Secret
     SECRET_KEY: str = os.getenv('SECRET_KEY', 'your-secret-key-change-this')
     ALGORITHM: str = 'HS256'
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24  # 24 hours
+    # Verified admin tokens kept in memory (see auth.VerifiedTokenCache)
+    TOKEN_CACHE_SIZE: int = int(os.getenv('TOKEN_CACHE_SIZE', '256'))
+    # How long a worker trusts its copy of the revocations (see auth.TokenRevocations)
+    TOKEN_REVOCATION_TTL_SECONDS: int = int(os.getenv('TOKEN_REVOCATION_TTL_SECONDS', '30'))
 
 settings = Settings()
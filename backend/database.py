@@ -1,11 +1,58 @@
-from supabase import create_client, Client
+from supabase import create_client, Client, ClientOptions
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Tuple
 from config import settings
+from metrics import db_calls_total, db_call_duration_seconds
+import asyncio
+import httpx
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
+# PostgREST caps responses (1000 rows on Supabase), so bulk reads are paged
+PAGE_SIZE = 1000
+
+# Builder methods that decide which kind of statement a query is
+OPERATIONS = ('select', 'insert', 'upsert', 'update', 'delete')
+
+# The supabase client is synchronous; its requests run here instead of on the
+# event loop. The pool size is the max number of in-flight PostgREST calls.
+_executor: Optional[ThreadPoolExecutor] = None
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.DB_MAX_CONCURRENCY,
+            thread_name_prefix='supabase'
+        )
+    return _executor
+
+class DbCallStats:
+    """PostgREST calls made while handling one request, by (table, operation)"""
+
+    def __init__(self):
+        # (table, operation) -> [calls, seconds]
+        self.by_call: Dict[Tuple[str, str], List[float]] = {}
+        self.calls = 0
+        self.seconds = 0.0
+
+    def record(self, table: str, operation: str, seconds: float):
+        entry = self.by_call.setdefault((table, operation), [0, 0.0])
+        entry[0] += 1
+        entry[1] += seconds
+        self.calls += 1
+        self.seconds += seconds
+
+# Set per request by server_timing.ServerTimingMiddleware; None outside requests
+db_call_stats: ContextVar[Optional[DbCallStats]] = ContextVar('db_call_stats', default=None)
+
 class SupabaseClient:
     _instance: Client = None
+    _admin_instance: Client = None
+    _http_clients: List[httpx.Client] = []
     
     @classmethod
     def get_client(cls) -> Client:
@@ -14,10 +61,7 @@ class SupabaseClient:
                 logger.warning('Supabase credentials not configured')
                 return None
             
-            cls._instance = create_client(
-                settings.SUPABASE_URL,
-                settings.SUPABASE_ANON_KEY
-            )
+            cls._instance = cls._create_client(settings.SUPABASE_ANON_KEY)
             logger.info('Supabase client initialized')
         
         return cls._instance
@@ -25,15 +69,139 @@ class SupabaseClient:
     @classmethod
     def get_admin_client(cls) -> Client:
         """Client with service role key for admin operations"""
-        if not settings.SUPABASE_URL or not settings.SUPABASE_SERVICE_KEY:
-            logger.warning('Supabase service key not configured')
-            return None
+        if cls._admin_instance is None:
+            if not settings.SUPABASE_URL or not settings.SUPABASE_SERVICE_KEY:
+                logger.warning('Supabase service key not configured')
+                return None
             
+            cls._admin_instance = cls._create_client(settings.SUPABASE_SERVICE_KEY)
+            logger.info('Supabase admin client initialized')
+        
+        return cls._admin_instance
+    
+    @classmethod
+    def _create_client(cls, key: str) -> Client:
+        """Create a client backed by its own long-lived, keep-alive HTTP connection pool"""
+        http_client = httpx.Client(
+            limits=httpx.Limits(
+                max_connections=settings.DB_POOL_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.DB_POOL_MAX_KEEPALIVE,
+                keepalive_expiry=settings.DB_POOL_KEEPALIVE_EXPIRY
+            ),
+            timeout=settings.DB_TIMEOUT_SECONDS,
+            http2=settings.DB_HTTP2,
+            follow_redirects=True
+        )
+        cls._http_clients.append(http_client)
+        
         return create_client(
             settings.SUPABASE_URL,
-            settings.SUPABASE_SERVICE_KEY
+            key,
+            options=ClientOptions(httpx_client=http_client)
         )
+    
+    @classmethod
+    def close(cls):
+        """Close every connection pool opened by this class"""
+        for http_client in cls._http_clients:
+            http_client.close()
+        cls._http_clients = []
+        cls._instance = None
+        cls._admin_instance = None
+
+class AsyncQuery:
+    """Awaitable wrapper around a postgrest request builder.
+
+    Filter/modifier calls (eq, in_, order, range, single, ...) are forwarded
+    to the wrapped builder; execute() runs the blocking request on the DB
+    thread pool so the event loop keeps serving other requests.
+    """
+
+    def __init__(self, builder, table: str, operation: str = 'select'):
+        self._builder = builder
+        self.table = table
+        self.operation = operation
+
+    def __getattr__(self, name):
+        attr = getattr(self._builder, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            operation = name if name in OPERATIONS else self.operation
+            return AsyncQuery(attr(*args, **kwargs), self.table, operation)
+
+        return call
+
+    async def execute(self):
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        try:
+            return await loop.run_in_executor(_get_executor(), self._builder.execute)
+        finally:
+            elapsed = time.perf_counter() - started
+            db_calls_total.inc(table=self.table, operation=self.operation)
+            db_call_duration_seconds.observe(elapsed, table=self.table, operation=self.operation)
+            stats = db_call_stats.get()
+            if stats is not None:
+                stats.record(self.table, self.operation, elapsed)
+
+class AsyncDatabase:
+    """Async data-access layer over a synchronous supabase Client"""
+
+    def __init__(self, client: Client):
+        self.client = client
+
+    def table(self, name: str) -> AsyncQuery:
+        return AsyncQuery(self.client.table(name), name)
+
+    def rpc(self, fn: str, params: Optional[dict] = None) -> AsyncQuery:
+        return AsyncQuery(self.client.rpc(fn, params or {}), fn, 'rpc')
+
+_async_db: Optional[AsyncDatabase] = None
+_async_admin_db: Optional[AsyncDatabase] = None
 
 # Helper function
-def get_db() -> Client:
-    return SupabaseClient.get_client()
+def get_db() -> Optional[AsyncDatabase]:
+    global _async_db
+    if _async_db is None:
+        client = SupabaseClient.get_client()
+        if client is None:
+            return None
+        _async_db = AsyncDatabase(client)
+    return _async_db
+
+def get_admin_db() -> Optional[AsyncDatabase]:
+    """Service-role database, for the RPCs that are not executable by anon"""
+    global _async_admin_db
+    if _async_admin_db is None:
+        client = SupabaseClient.get_admin_client()
+        if client is None:
+            return None
+        _async_admin_db = AsyncDatabase(client)
+    return _async_admin_db
+
+def close_db():
+    """Release the DB thread pool and HTTP connection pools (called on application shutdown)"""
+    global _async_db, _async_admin_db, _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+    SupabaseClient.close()
+    _async_db = None
+    _async_admin_db = None
+
+async def fetch_all(build_query: Callable, page_size: int = PAGE_SIZE) -> List[dict]:
+    """Run a query page by page until every row has been read.
+
+    build_query must return a fresh, deterministically ordered query
+    builder on each call.
+    """
+    rows = []
+    offset = 0
+    while True:
+        page = (await build_query().range(offset, offset + page_size - 1).execute()).data or []
+        rows.extend(page)
+        if len(page) < page_size:
+            return rows
+        offset += page_size
@@ -0,0 +1,112 @@
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, List, Optional
+from datetime import datetime, timezone
+from config import settings
+import json
+import logging
+import queue
+import sys
+
+# Attributes every LogRecord has; anything else came in through ``extra=``
+RESERVED_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional[QueueHandler] = None
+_previous_handlers: List[logging.Handler] = []
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, message, extra fields and exception"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in RESERVED_ATTRS and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exc_info'] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class LocalQueueHandler(QueueHandler):
+    """QueueHandler for an in-process queue.
+
+    Only the message is interpolated on the calling thread (so later
+    changes to the arguments can't alter it); exception formatting and
+    serialisation are left to the listener thread.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def parse_levels(spec: str) -> Dict[str, str]:
+    """'a.b=DEBUG,httpx=WARNING' -> {'a.b': 'DEBUG', 'httpx': 'WARNING'}"""
+    levels = {}
+    for item in spec.split(','):
+        name, _, level = item.partition('=')
+        if name.strip() and level.strip():
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def setup_logging():
+    """Route all logging through a queue so request handlers never block on I/O.
+
+    Records are enqueued by a LocalQueueHandler on the root logger; a
+    QueueListener thread formats them (JSON or text per LOG_FORMAT) and
+    writes them to stderr.
+    """
+    global _listener, _queue_handler, _previous_handlers
+    if _listener is not None:
+        return
+
+    if settings.LOG_FORMAT == 'text':
+        formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    else:
+        formatter = JsonFormatter()
+
+    output = logging.StreamHandler(sys.stderr)
+    output.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    _previous_handlers = list(root.handlers)
+    for handler in _previous_handlers:
+        root.removeHandler(handler)
+    _queue_handler = LocalQueueHandler(log_queue)
+    root.addHandler(_queue_handler)
+    root.setLevel(settings.LOG_LEVEL.upper())
+
+    for name, level in parse_levels(settings.LOG_LEVELS).items():
+        logging.getLogger(name).setLevel(level)
+
+    _listener = QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+
+
+def shutdown_logging():
+    """Flush queued records, stop the listener thread and unhook the queue.
+
+    The root logger gets back the handlers it had before setup_logging,
+    or the listener's stderr handler if it had none, so records logged
+    after shutdown are still written instead of piling up in the queue.
+    """
+    global _listener, _queue_handler, _previous_handlers
+    if _listener is None:
+        return
+    root = logging.getLogger()
+    root.removeHandler(_queue_handler)
+    _listener.stop()
+    for handler in _previous_handlers or list(_listener.handlers):
+        root.addHandler(handler)
+    _listener, _queue_handler, _previous_handlers = None, None, []
@@ -0,0 +1,250 @@
+"""In-process metrics in the Prometheus text exposition format.
+
+Counters, gauges and histograms are kept per label combination in plain
+dicts guarded by a lock; render() produces the payload served at
+/api/metrics. Values are per process, so with several workers each one is
+scraped (or aggregated) separately.
+"""
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Tuple
+import bisect
+import threading
+import time
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Seconds; the Prometheus client defaults
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class Metric(ABC):
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        lines.extend(self._samples())
+        return lines
+
+    @abstractmethod
+    def _samples(self) -> List[str]:
+        """Sample lines of this metric, without the HELP/TYPE header"""
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}' for key, value in items]
+
+
+class Gauge(Counter):
+    kind = 'gauge'
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> (per-bucket counts (non-cumulative, last is +Inf), sum)
+        self._values: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+            counts[index] += 1
+            total[0] += value
+
+    def count(self, **labels) -> int:
+        entry = self._values.get(self._key(labels))
+        return sum(entry[0]) if entry else 0
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, (list(counts), total[0])) for key, (counts, total) in self._values.items())
+        lines = []
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f'{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}')
+            lines.append(f'{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}')
+            lines.append(f'{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}')
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def get(self, name: str) -> Optional[Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+# HTTP
+http_requests_total = registry.register(Counter(
+    'http_requests_total', 'HTTP requests handled', ('method', 'route', 'status')
+))
+http_requests_in_progress = registry.register(Gauge(
+    'http_requests_in_progress', 'HTTP requests currently being handled', ('method',)
+))
+http_request_duration_seconds = registry.register(Histogram(
+    'http_request_duration_seconds', 'HTTP request latency in seconds', ('method', 'route', 'status')
+))
+
+# Domain
+availability_checks_total = registry.register(Counter(
+    'availability_checks_total', 'Availability checks and calendars computed', ('kind',)
+))
+reservations_created_total = registry.register(Counter(
+    'reservations_created_total', 'Reservations created', ('type', 'source')
+))
+reservations_rejected_total = registry.register(Counter(
+    'reservations_rejected_total', 'Reservation attempts rejected', ('type', 'reason', 'source')
+))
+fullday_capacity_rejections_total = registry.register(Counter(
+    'fullday_capacity_rejections_total', 'Full Day bookings rejected for lack of capacity'
+))
+
+# Database (PostgREST round trips made through database.AsyncQuery)
+db_calls_total = registry.register(Counter(
+    'db_calls_total', 'PostgREST calls', ('table', 'operation')
+))
+db_call_duration_seconds = registry.register(Histogram(
+    'db_call_duration_seconds', 'PostgREST call latency in seconds', ('table', 'operation')
+))
+
+# Password hashing (auth.PasswordHasher)
+password_hash_in_flight = registry.register(Gauge(
+    'password_hash_in_flight', 'bcrypt hashes and verifications running or queued'
+))
+password_hash_rejected_total = registry.register(Counter(
+    'password_hash_rejected_total', 'bcrypt calls refused because the worker pool was saturated'
+))
+
+# Admin JWT verification (auth.verify_token)
+token_verifications_total = registry.register(Counter(
+    'token_verifications_total', 'Admin token checks by outcome (hit/miss of the verified-token cache, invalid, revoked)', ('result',)
+))
+token_verify_duration_seconds = registry.register(Histogram(
+    'token_verify_duration_seconds', 'Admin token check latency in seconds', ('source',),
+    buckets=(0.00001, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01)
+))
+
+# Email outbox (services.email_outbox)
+email_outbox_total = registry.register(Counter(
+    'email_outbox_total', 'Email send attempts by outcome (sent, retry, dead)', ('kind', 'result')
+))
+
+# Per-month availability snapshots (services.month_snapshots)
+availability_snapshot_requests_total = registry.register(Counter(
+    'availability_snapshot_requests_total', 'Availability reads answered from month snapshots (hit) or computed exactly (fallback)', ('result',)
+))
+availability_snapshot_builds_total = registry.register(Counter(
+    'availability_snapshot_builds_total', 'Month snapshots built from the database or loaded from disk', ('source',)
+))
+
+# Availability Server-Sent Events (services.availability_events)
+availability_stream_subscribers = registry.register(Gauge(
+    'availability_stream_subscribers', 'Open /api/availability/stream connections'
+))
+availability_stream_events_total = registry.register(Counter(
+    'availability_stream_events_total', 'Availability events published', ('event',)
+))
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording count, in-flight and latency of every HTTP request.
+
+    Requests are labelled by route template (``/api/rooms/{room_id}``), not
+    by raw path, so the number of series stays bounded; requests that match
+    no route are grouped under ``unmatched``.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        method = scope['method']
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message['type'] == 'http.response.start':
+                status_code = message['status']
+            await send(message)
+
+        http_requests_in_progress.inc(method=method)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            route = scope.get('route')
+            template = getattr(route, 'path_format', None) or 'unmatched'
+            http_requests_in_progress.dec(method=method)
+            http_requests_total.inc(method=method, route=template, status=status_code)
+            http_request_duration_seconds.observe(elapsed, method=method, route=template, status=status_code)
@@ -136,6 +136,24 @@ class ReservationResponse(BaseModel):
     rooms: List[str] = []  # Room names
     created_at: datetime
 
+class ReservationPage(BaseModel):
+    items: List[ReservationResponse]
+    next_cursor: Optional[str] = None  # Pass back as ?cursor= to get the next page
+
+class BulkReservationResult(BaseModel):
+    row: int  # Position in the submitted batch, starting at 1
+    status: str  # created | rejected | failed
+    reservation_id: Optional[str] = None
+    total_price: Optional[float] = None
+    error: Optional[str] = None
+
+class BulkImportReport(BaseModel):
+    total: int
+    created: int
+    rejected: int
+    failed: int
+    results: List[BulkReservationResult]
+
 # Availability Models
 class AvailabilityCheck(BaseModel):
     date: date
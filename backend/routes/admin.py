@@ -1,9 +1,24 @@
-from fastapi import APIRouter, HTTPException, status, Depends, Query
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Request, Response
 from typing import List, Optional
 from pydantic import BaseModel, EmailStr
 from datetime import datetime, timedelta, timezone, date
-from database import get_db
-from auth import verify_password, get_password_hash, create_access_token, get_current_admin
+from database import get_db, get_admin_db
+from models import BulkImportReport
+from fastapi.security import HTTPAuthorizationCredentials
+from auth import (
+    password_hasher, PasswordHasherBusy, create_access_token, get_current_admin,
+    security, revoke_token, revoke_subject_tokens
+)
+from services.occupancy_index import occupancy_index
+from services.room_catalog import room_catalog
+from services.block_snapshot import block_store
+from services.data_version import availability_version
+from services.availability_events import availability_events
+from services.month_snapshots import month_snapshots
+from services.pagination import apply_keyset, next_cursor
+from services.bulk_import_service import BulkImportService, rows_from_csv
+from config import settings
+import json
 import logging
 import random
 import string
@@ -73,6 +88,14 @@ def generate_reset_code() -> str:
     return ''.join(random.choices(string.digits, k=6))
 
 
+def hasher_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Servidor ocupado, intenta de nuevo en unos segundos",
+        headers={"Retry-After": "2"}
+    )
+
+
 # =====================================================
 # LOGIN ENDPOINT
 # =====================================================
@@ -84,38 +107,61 @@ async def admin_login(credentials: AdminLogin):
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Database not configured")
     
     try:
-        result = db.table('admin_users').select('*').eq('email', credentials.email).execute()
+        result = await db.table('admin_users').select('*').eq('email', credentials.email).execute()
         
         if not result.data:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Credenciales incorrectas")
         
         admin = result.data[0]
         
-        if not verify_password(credentials.password, admin['password_hash']):
+        valid, new_hash = await password_hasher.verify_and_update(credentials.password, admin['password_hash'])
+        if not valid:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Credenciales incorrectas")
         
+        if new_hash:
+            # Stored with an older BCRYPT_ROUNDS; a failed upgrade must not block the login
+            try:
+                await db.table('admin_users').update({'password_hash': new_hash}).eq('id', admin['id']).execute()
+            except Exception as e:
+                logger.warning("Could not rehash password for %s: %s", admin['email'], e)
+        
         access_token = create_access_token(data={"sub": admin['email'], "admin_id": admin['id']})
         
         return AdminLoginResponse(access_token=access_token, admin_email=admin['email'])
         
     except HTTPException:
         raise
+    except PasswordHasherBusy:
+        raise hasher_busy()
     except Exception as e:
-        logger.error(f"Login error: {str(e)}")
+        logger.error("Login error: %s", e)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error en el servidor")
 
 
+@router.post("/logout")
+async def admin_logout(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    admin: dict = Depends(get_current_admin)
+):
+    await revoke_token(credentials.credentials)
+    return {"message": "Sesión cerrada"}
+
+
 # =====================================================
 # PASSWORD RECOVERY ENDPOINTS
 # =====================================================
 @router.post("/request-password-reset")
 async def request_password_reset(request: PasswordResetRequest):
-    from services.email_service import send_password_reset_email, ADMIN_EMAIL
+    from services.email_service import password_reset_email, ADMIN_EMAIL
+    from services.email_outbox import email_outbox
     
     db = get_db()
     
+    if not email_outbox.enabled:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error enviando el email")
+    
     try:
-        result = db.table('admin_users').select('*').eq('email', ADMIN_EMAIL).execute()
+        result = await db.table('admin_users').select('*').eq('email', ADMIN_EMAIL).execute()
         
         if not result.data:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No se encontró la cuenta de administrador")
@@ -123,22 +169,21 @@ async def request_password_reset(request: PasswordResetRequest):
         reset_code = generate_reset_code()
         expires_at = datetime.now(timezone.utc) + timedelta(minutes=15)
         
-        db.table('admin_users').update({
+        await db.table('admin_users').update({
             'reset_code': reset_code,
             'reset_code_expires_at': expires_at.isoformat()
         }).eq('email', ADMIN_EMAIL).execute()
         
-        email_sent = send_password_reset_email(reset_code)
-        
-        if not email_sent:
-            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error enviando el email")
+        # Sent in the background (with retries) by the email outbox worker
+        subject, body = password_reset_email(reset_code)
+        await email_outbox.enqueue('password_reset', ADMIN_EMAIL, subject, body)
         
         return {"message": "Código de recuperación enviado", "email_hint": f"***{ADMIN_EMAIL[-15:]}"}
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error en recuperación: {str(e)}")
+        logger.error("Error en recuperación: %s", e)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error procesando la solicitud")
 
 
@@ -149,7 +194,7 @@ async def reset_password(request: PasswordResetVerify):
     db = get_db()
     
     try:
-        result = db.table('admin_users').select('*').eq('email', ADMIN_EMAIL).execute()
+        result = await db.table('admin_users').select('*').eq('email', ADMIN_EMAIL).execute()
         
         if not result.data:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Cuenta no encontrada")
@@ -168,20 +213,24 @@ async def reset_password(request: PasswordResetVerify):
         if len(request.new_password) < 6:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="La contraseña debe tener al menos 6 caracteres")
         
-        new_hash = get_password_hash(request.new_password)
-        db.table('admin_users').update({
+        new_hash = await password_hasher.hash(request.new_password)
+        await db.table('admin_users').update({
             'password_hash': new_hash,
             'reset_code': None,
             'reset_code_expires_at': None,
             'updated_at': datetime.now(timezone.utc).isoformat()
         }).eq('email', ADMIN_EMAIL).execute()
+        # Sessions opened with the old password end here
+        await revoke_subject_tokens(admin['email'])
         
         return {"message": "Contraseña actualizada exitosamente"}
         
     except HTTPException:
         raise
+    except PasswordHasherBusy:
+        raise hasher_busy()
     except Exception as e:
-        logger.error(f"Error reseteando contraseña: {str(e)}")
+        logger.error("Error reseteando contraseña: %s", e)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error actualizando contraseña")
 
 
@@ -199,87 +248,122 @@ async def get_dashboard_stats(
     year: Optional[int] = Query(None, ge=2020, le=2100),
     admin: dict = Depends(get_current_admin)
 ):
-    db = get_db()
+    # The stats RPCs are only executable by the service role
+    db = get_admin_db()
     
     try:
-        reservations = db.table('reservations').select('*').execute()
-        all_res = reservations.data
-        
         month_label = None
         if month and year:
             month_names = ['', 'Enero', 'Febrero', 'Marzo', 'Abril', 'Mayo', 'Junio',
                           'Julio', 'Agosto', 'Septiembre', 'Octubre', 'Noviembre', 'Diciembre']
             month_label = f"{month_names[month]} {year}"
-            
-            filtered_res = []
-            for r in all_res:
-                if r['check_in_date']:
-                    res_date = datetime.fromisoformat(r['check_in_date']).date()
-                    if res_date.month == month and res_date.year == year:
-                        filtered_res.append(r)
-            all_res = filtered_res
-        
-        total = len(all_res)
-        pending = len([r for r in all_res if r['status'] == 'pending'])
-        confirmed = len([r for r in all_res if r['status'] == 'confirmed'])
-        cancelled = len([r for r in all_res if r['status'] == 'cancelled'])
-        
-        total_revenue = sum(float(r['total_price'] or 0) for r in all_res if r['status'] in ['confirmed', 'completed'])
-        
-        fullday = len([r for r in all_res if r['reservation_type'] == 'fullday'])
-        hospedaje = len([r for r in all_res if r['reservation_type'] == 'hospedaje'])
-        
-        today = datetime.now(timezone.utc).date()
-        week_later = today + timedelta(days=7)
-        upcoming = len([r for r in all_res 
-                       if r['status'] in ['pending', 'confirmed'] 
-                       and r['check_in_date'] 
-                       and today <= datetime.fromisoformat(r['check_in_date']).date() <= week_later])
+        
+        result = await db.rpc('get_dashboard_stats', {
+            'p_month': month if month and year else None,
+            'p_year': year if month and year else None,
+            'p_today': datetime.now(timezone.utc).date().isoformat()
+        }).execute()
+        stats = result.data[0]
         
         return DashboardStats(
-            total_reservations=total,
-            pending_reservations=pending,
-            confirmed_reservations=confirmed,
-            cancelled_reservations=cancelled,
-            total_revenue=total_revenue,
-            fullday_bookings=fullday,
-            hospedaje_bookings=hospedaje,
-            upcoming_checkins=upcoming,
+            total_reservations=stats['total_reservations'],
+            pending_reservations=stats['pending_reservations'],
+            confirmed_reservations=stats['confirmed_reservations'],
+            cancelled_reservations=stats['cancelled_reservations'],
+            total_revenue=float(stats['total_revenue'] or 0),
+            fullday_bookings=stats['fullday_bookings'],
+            hospedaje_bookings=stats['hospedaje_bookings'],
+            upcoming_checkins=stats['upcoming_checkins'],
             month_label=month_label
         )
         
     except Exception as e:
-        logger.error(f"Error getting stats: {str(e)}")
+        logger.error("Error getting stats: %s", e)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error obteniendo estadísticas")
 
 
+@router.post("/stats/rebuild")
+async def rebuild_dashboard_stats(admin: dict = Depends(get_current_admin)):
+    """Recompute the reservation_daily_stats rollup from the reservations table"""
+    db = get_admin_db()
+    
+    try:
+        result = await db.rpc('rebuild_reservation_daily_stats').execute()
+        
+        return {"message": "Estadísticas recalculadas", "rows": result.data, "success": True}
+        
+    except Exception as e:
+        logger.error("Error rebuilding stats: %s", e)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error recalculando estadísticas")
+
+
+@router.get("/stats/consistency")
+async def check_dashboard_stats(admin: dict = Depends(get_current_admin)):
+    """Compare the reservation_daily_stats rollup against a full recompute"""
+    db = get_admin_db()
+    
+    try:
+        result = await db.rpc('check_reservation_daily_stats').execute()
+        mismatches = result.data or []
+        
+        if mismatches:
+            logger.warning("reservation_daily_stats out of sync: %d rows differ", len(mismatches))
+        
+        return {"consistent": not mismatches, "mismatches": mismatches}
+        
+    except Exception as e:
+        logger.error("Error checking stats: %s", e)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error verificando estadísticas")
+
+
 @router.get("/reservations")
 async def get_all_reservations(
+    response: Response,
     status_filter: Optional[str] = None,
     reservation_type: Optional[str] = None,
     month: Optional[int] = Query(None, ge=1, le=12),
     year: Optional[int] = Query(None, ge=2020, le=2100),
+    cursor: Optional[str] = None,
+    limit: int = Query(200, ge=1, le=1000),
     admin: dict = Depends(get_current_admin)
 ):
+    """List reservations newest first, one keyset page at a time.
+
+    The next page's cursor is returned in the X-Next-Cursor header (absent on
+    the last page); the first page also carries X-Total-Count.
+    """
     db = get_db()
     
     try:
-        query = db.table('reservations').select('*, clients(*), reservation_rooms(rooms(*))').order('created_at', desc=True)
+        query = db.table('reservations').select(
+            '*, clients(*), reservation_rooms(rooms(*))',
+            count=None if cursor else 'exact'
+        )
         
         if status_filter:
             query = query.eq('status', status_filter)
         if reservation_type:
             query = query.eq('reservation_type', reservation_type)
+        if month and year:
+            month_start = date(year, month, 1)
+            next_month = date(year + month // 12, month % 12 + 1, 1)
+            query = query.gte('check_in_date', month_start.isoformat()).lt('check_in_date', next_month.isoformat())
+        
+        try:
+            query = apply_keyset(query, cursor, limit)
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor inválido")
+        
+        result = await query.execute()
+        rows, following = next_cursor(result.data, limit)
         
-        result = query.execute()
+        if result.count is not None:
+            response.headers['X-Total-Count'] = str(result.count)
+        if following:
+            response.headers['X-Next-Cursor'] = following
         
         reservations = []
-        for data in result.data:
-            if month and year and data['check_in_date']:
-                res_date = datetime.fromisoformat(data['check_in_date']).date()
-                if res_date.month != month or res_date.year != year:
-                    continue
-            
+        for data in rows:
             room_names = []
             if 'reservation_rooms' in data and data['reservation_rooms']:
                 room_names = [rr['rooms']['name'] for rr in data['reservation_rooms'] if rr.get('rooms')]
@@ -306,17 +390,56 @@ async def get_all_reservations(
         
         return reservations
         
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Error getting reservations: {str(e)}")
+        logger.error("Error getting reservations: %s", e)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error obteniendo reservaciones")
 
 
+@router.post("/reservations/bulk", response_model=BulkImportReport)
+async def bulk_import_reservations(request: Request, admin: dict = Depends(get_current_admin)):
+    """Import a batch of reservations in one request.
+
+    The body is either JSON (a list of reservation objects, or
+    ``{"reservations": [...]}``) or CSV (``Content-Type: text/csv``) with the
+    same field names as columns. Each row is accepted or rejected on its
+    own; the report lists the outcome of every row.
+    """
+    body = await request.body()
+    
+    try:
+        if 'csv' in request.headers.get('content-type', ''):
+            rows = rows_from_csv(body.decode('utf-8'))
+        else:
+            payload = json.loads(body)
+            rows = payload.get('reservations') if isinstance(payload, dict) else payload
+            if not isinstance(rows, list):
+                raise ValueError('Expected a list of reservations')
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Formato de importación inválido")
+    
+    if not rows:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No hay reservaciones para importar")
+    if len(rows) > settings.BULK_IMPORT_MAX_ROWS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Máximo {settings.BULK_IMPORT_MAX_ROWS} reservaciones por importación"
+        )
+    
+    try:
+        return await BulkImportService.import_reservations(rows)
+    except Exception as e:
+        logger.error("Error importing reservations: %s", e)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error importando reservaciones")
+
+
 @router.put("/reservations/{reservation_id}")
 async def update_reservation(reservation_id: str, update_data: ReservationUpdate, admin: dict = Depends(get_current_admin)):
     db = get_db()
     
     try:
-        reservation = db.table('reservations').select('*, clients(*)').eq('id', reservation_id).execute()
+        reservation = await db.table('reservations').select('*, clients(*), reservation_rooms(room_id)').eq('id', reservation_id).execute()
         
         if not reservation.data:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Reservación no encontrada")
@@ -337,12 +460,28 @@ async def update_reservation(reservation_id: str, update_data: ReservationUpdate
         
         if update_data.num_guests is not None and reservation_type == 'fullday':
             update_dict['num_guests'] = update_data.num_guests
-            from config import settings
             update_dict['total_price'] = update_data.num_guests * settings.FULLDAY_PRICE
         
         if update_dict:
             update_dict['updated_at'] = datetime.now(timezone.utc).isoformat()
-            db.table('reservations').update(update_dict).eq('id', reservation_id).execute()
+            await db.table('reservations').update(update_dict).eq('id', reservation_id).execute()
+            availability_version.bump()
+            
+            room_ids = [rr['room_id'] for rr in res_data.get('reservation_rooms') or []]
+            if reservation_type == 'hospedaje':
+                occupancy_index.upsert_reservation(
+                    reservation_id,
+                    room_ids,
+                    update_dict.get('check_in_date', res_data['check_in_date']),
+                    update_dict.get('check_out_date', res_data['check_out_date']),
+                    update_dict.get('status', res_data['status'])
+                )
+            availability_events.publish_reservation(
+                reservation_type, room_ids,
+                (res_data['check_in_date'], res_data['check_out_date']),
+                (update_dict.get('check_in_date', res_data['check_in_date']),
+                 update_dict.get('check_out_date', res_data['check_out_date']))
+            )
         
         client_update = {}
         if update_data.client_name is not None:
@@ -352,14 +491,14 @@ async def update_reservation(reservation_id: str, update_data: ReservationUpdate
         
         if client_update and client_id:
             client_update['updated_at'] = datetime.now(timezone.utc).isoformat()
-            db.table('clients').update(client_update).eq('id', client_id).execute()
+            await db.table('clients').update(client_update).eq('id', client_id).execute()
         
         return {"message": "Reservación actualizada", "success": True}
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error updating reservation: {str(e)}")
+        logger.error("Error updating reservation: %s", e)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Error actualizando reservación")
 
 
@@ -368,7 +507,7 @@ async def cancel_reservation(reservation_id: str, admin: dict = Depends(get_curr
     db = get_db()
     
     try:
-        result = db.table('reservations').update({
+        result = await db.table('reservations').update({
             'status': 'cancelled',
             'updated_at': datetime.now(timezone.utc).isoformat()
         }).eq('id', reservation_id).execute()
@@ -376,12 +515,20 @@ async def cancel_reservation(reservation_id: str, admin: dict = Depends(get_curr
         if not result.data:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Reservación no encontrada")
         
-        return {"message": "Reservación cancelada", "data": result.data[0]}
+        occupancy_index.remove_reservation(reservation_id)
+        availability_version.bump()
+        cancelled = result.data[0]
+        # The rooms are not loaded here; every room in the stay's dates is re-read
+        availability_events.publish_reservation(
+            cancelled['reservation_type'], None, (cancelled['check_in_date'], cancelled['check_out_date'])
+        )
+        
+        return {"message": "Reservación cancelada", "data": cancelled}
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error cancelling reservation: {str(e)}")
+        logger.error("Error cancelling reservation: %s", e)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error cancelando reservación")
 
 
@@ -390,7 +537,7 @@ async def permanently_delete_reservation(reservation_id: str, admin: dict = Depe
     db = get_db()
     
     try:
-        reservation = db.table('reservations').select('*').eq('id', reservation_id).execute()
+        reservation = await db.table('reservations').select('*').eq('id', reservation_id).execute()
         
         if not reservation.data:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Reservación no encontrada")
@@ -398,10 +545,11 @@ async def permanently_delete_reservation(reservation_id: str, admin: dict = Depe
         if reservation.data[0]['status'] != 'cancelled':
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Solo se pueden eliminar reservaciones canceladas")
         
-        db.table('reservation_rooms').delete().eq('reservation_id', reservation_id).execute()
-        db.table('reservations').delete().eq('id', reservation_id).execute()
+        await db.table('reservation_rooms').delete().eq('reservation_id', reservation_id).execute()
+        await db.table('reservations').delete().eq('id', reservation_id).execute()
+        occupancy_index.remove_reservation(reservation_id)
         
-        verify = db.table('reservations').select('id').eq('id', reservation_id).execute()
+        verify = await db.table('reservations').select('id').eq('id', reservation_id).execute()
         if verify.data:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="No se pudo eliminar. Verifique políticas RLS en Supabase.")
         
@@ -410,7 +558,7 @@ async def permanently_delete_reservation(reservation_id: str, admin: dict = Depe
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error deleting reservation: {str(e)}")
+        logger.error("Error deleting reservation: %s", e)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error eliminando reservación")
 
 
@@ -419,7 +567,7 @@ async def delete_all_cancelled_reservations(admin: dict = Depends(get_current_ad
     db = get_db()
     
     try:
-        cancelled = db.table('reservations').select('id').eq('status', 'cancelled').execute()
+        cancelled = await db.table('reservations').select('id').eq('status', 'cancelled').execute()
         
         if not cancelled.data:
             return {"message": "No hay reservaciones canceladas", "deleted_count": 0}
@@ -427,11 +575,11 @@ async def delete_all_cancelled_reservations(admin: dict = Depends(get_current_ad
         initial_count = len(cancelled.data)
         
         for res_id in [r['id'] for r in cancelled.data]:
-            db.table('reservation_rooms').delete().eq('reservation_id', res_id).execute()
+            await db.table('reservation_rooms').delete().eq('reservation_id', res_id).execute()
         
-        db.table('reservations').delete().eq('status', 'cancelled').execute()
+        await db.table('reservations').delete().eq('status', 'cancelled').execute()
         
-        verify = db.table('reservations').select('id').eq('status', 'cancelled').execute()
+        verify = await db.table('reservations').select('id').eq('status', 'cancelled').execute()
         deleted_count = initial_count - len(verify.data)
         
         if deleted_count == 0:
@@ -442,7 +590,7 @@ async def delete_all_cancelled_reservations(admin: dict = Depends(get_current_ad
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error deleting cancelled: {str(e)}")
+        logger.error("Error deleting cancelled: %s", e)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error eliminando reservaciones")
 
 
@@ -454,7 +602,7 @@ async def get_all_blocks(admin: dict = Depends(get_current_admin)):
     db = get_db()
     
     try:
-        result = db.table('availability_blocks').select('*, rooms(name)').order('start_date', desc=False).execute()
+        result = await db.table('availability_blocks').select('*, rooms(name)').order('start_date', desc=False).execute()
         
         blocks = []
         for block in result.data:
@@ -473,7 +621,7 @@ async def get_all_blocks(admin: dict = Depends(get_current_admin)):
         return blocks
         
     except Exception as e:
-        logger.error(f"Error getting blocks: {str(e)}")
+        logger.error("Error getting blocks: %s", e)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error obteniendo bloqueos")
 
 
@@ -498,17 +646,22 @@ async def create_block(block_data: BlockCreate, admin: dict = Depends(get_curren
             'created_by': admin.get('admin_id')
         }
         
-        result = db.table('availability_blocks').insert(block_insert).execute()
+        result = await db.table('availability_blocks').insert(block_insert).execute()
         
         if not result.data:
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error creando bloqueo")
         
-        return {"message": "Bloqueo creado exitosamente", "data": result.data[0]}
+        block = result.data[0]
+        block_store.upsert(block)
+        availability_version.bump()
+        availability_events.publish_block(block)
+        
+        return {"message": "Bloqueo creado exitosamente", "data": block}
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error creating block: {str(e)}")
+        logger.error("Error creating block: %s", e)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Error creando bloqueo")
 
 
@@ -517,15 +670,53 @@ async def delete_block(block_id: str, admin: dict = Depends(get_current_admin)):
     db = get_db()
     
     try:
-        result = db.table('availability_blocks').delete().eq('id', block_id).execute()
+        result = await db.table('availability_blocks').delete().eq('id', block_id).execute()
         
         if not result.data:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Bloqueo no encontrado")
         
+        block_store.remove(block_id)
+        availability_version.bump()
+        availability_events.publish_block(result.data[0])
+        
         return {"message": "Bloqueo eliminado exitosamente"}
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error deleting block: {str(e)}")
+        logger.error("Error deleting block: %s", e)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error eliminando bloqueo")
+
+
+# =====================================================
+# ROOMS CATALOG
+# =====================================================
+@router.post("/rooms/refresh")
+async def refresh_rooms_catalog(admin: dict = Depends(get_current_admin)):
+    """Reload the cached rooms catalog after editing rooms in Supabase"""
+    db = get_db()
+    
+    try:
+        room_catalog.invalidate()
+        await room_catalog.ensure_loaded(db)
+        month_snapshots.clear()
+        availability_version.bump()
+        return {"message": "Catálogo de habitaciones actualizado", "rooms": len(room_catalog.active_rooms())}
+    except Exception as e:
+        logger.error("Error refreshing rooms catalog: %s", e)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error actualizando catálogo de habitaciones")
+
+
+# =====================================================
+# EMAIL OUTBOX
+# =====================================================
+@router.get("/emails/dead-letters")
+async def get_dead_letter_emails(limit: int = Query(100, ge=1, le=500), admin: dict = Depends(get_current_admin)):
+    """Emails that exhausted their retries, with the last error"""
+    from services.email_outbox import email_outbox
+    
+    try:
+        return await email_outbox.dead_letters(limit)
+    except Exception as e:
+        logger.error("Error fetching dead-letter emails: %s", e)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error obteniendo emails fallidos")
@@ -1,45 +1,59 @@
-from fastapi import APIRouter, HTTPException, status, Query
+from fastapi import APIRouter, HTTPException, status, Query, Request, Response, Header
+from fastapi.responses import StreamingResponse
 from typing import List, Optional
-from datetime import date, timedelta, datetime
+from datetime import date
 from models import Room
 from services.room_service import RoomService
-from services.reservation_service import ReservationService
-from database import get_db
+from services.availability_service import AvailabilityService
+from services.data_version import availability_version
+from services.availability_events import availability_events
+from services.http_cache import not_modified, http_date, last_modified_settled
 from config import settings
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/availability", tags=["availability"])
 
+
+def cache_headers(etag: str, modified_at: float) -> dict:
+    """Validators and Cache-Control for a response built from this data version"""
+    headers = {
+        "ETag": etag,
+        "Cache-Control": (
+            f"public, max-age={settings.AVAILABILITY_CACHE_MAX_AGE}, "
+            f"stale-while-revalidate={settings.AVAILABILITY_STALE_WHILE_REVALIDATE}"
+        )
+    }
+    if last_modified_settled(modified_at):
+        headers["Last-Modified"] = http_date(modified_at)
+    return headers
+
+
 @router.get("/rooms/{room_id}")
 async def get_room_availability(
+    request: Request,
+    response: Response,
     room_id: str,
     start_date: date = Query(...),
     end_date: date = Query(...)
 ):
     """Get available dates for a specific room"""
+    etag, modified_at = availability_version.current()
+    headers = cache_headers(etag, modified_at)
+    cached = not_modified(request, etag, headers, modified_at)
+    if cached:
+        return cached
+    
     try:
         # Get room to verify it exists
         room = await RoomService.get_room(room_id)
         
-        available_dates = []
-        unavailable_dates = []
-        
-        # Check each date in range
-        current_date = start_date
-        while current_date <= end_date:
-            next_date = current_date + timedelta(days=1)
-            is_available = await ReservationService.check_room_availability(
-                room_id, current_date, next_date
-            )
-            
-            if is_available:
-                available_dates.append(current_date.isoformat())
-            else:
-                unavailable_dates.append(current_date.isoformat())
-            
-            current_date = next_date
+        available_dates, unavailable_dates = await AvailabilityService.get_room_calendar(
+            room_id, start_date, end_date
+        )
         
+        response.headers.update(headers)
         return {
             "room_id": room_id,
             "room_name": room.name,
@@ -49,7 +63,7 @@ async def get_room_availability(
             "unavailable_dates": unavailable_dates
         }
     except Exception as e:
-        logger.error(f"Error checking availability: {str(e)}")
+        logger.error("Error checking availability: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e)
@@ -57,38 +71,41 @@ async def get_room_availability(
 
 @router.get("/rooms")
 async def get_all_rooms_availability(
+    request: Request,
+    response: Response,
     start_date: date = Query(...),
-    end_date: date = Query(...)
+    end_date: date = Query(...),
+    output: str = Query('dates', alias='format', pattern='^(dates|bitmap|rle)$')
 ):
-    """Get availability for all rooms in date range"""
+    """Get availability for all rooms in date range.
+
+    ``format=bitmap`` returns each room's days as a base64 bitmap and
+    ``format=rle`` as [offset, length] runs of available days, both relative
+    to start_date; the default lists available ISO dates.
+    """
+    etag, modified_at = availability_version.current()
+    headers = cache_headers(etag, modified_at)
+    cached = not_modified(request, etag, headers, modified_at)
+    if cached:
+        return cached
+    
     try:
         rooms = await RoomService.get_rooms()
         
-        result = []
-        for room in rooms:
-            available_dates = []
-            current_date = start_date
-            
-            while current_date <= end_date:
-                next_date = current_date + timedelta(days=1)
-                is_available = await ReservationService.check_room_availability(
-                    room.id, current_date, next_date
-                )
-                
-                if is_available:
-                    available_dates.append(current_date.isoformat())
-                
-                current_date = next_date
-            
-            result.append({
-                "room_id": room.id,
-                "room_name": room.name,
-                "available_dates": available_dates
-            })
+        result = await AvailabilityService.get_rooms_availability(rooms, start_date, end_date, output)
+        response.headers.update(headers)
+        
+        if output == 'dates':
+            return result
         
-        return result
+        return {
+            "start_date": start_date.isoformat(),
+            "end_date": end_date.isoformat(),
+            "format": output,
+            "rooms": result
+        }
     except Exception as e:
-        logger.error(f"Error checking availability: {str(e)}")
+        logger.error("Error checking availability: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e)
@@ -97,71 +114,25 @@ async def get_all_rooms_availability(
 
 @router.get("/fullday")
 async def get_fullday_availability(
+    request: Request,
+    response: Response,
     start_date: date = Query(...),
     end_date: date = Query(...),
     num_guests: int = Query(..., ge=1, le=20)
 ):
     """Get available dates for Full Day based on requested number of guests"""
-    db = get_db()
+    etag, modified_at = availability_version.current()
+    headers = cache_headers(etag, modified_at)
+    cached = not_modified(request, etag, headers, modified_at)
+    if cached:
+        return cached
     
     try:
-        available_dates = []
-        unavailable_dates = []
-        
-        # Get all fullday reservations in the date range
-        reservations = db.table('reservations').select('*').eq(
-            'reservation_type', 'fullday'
-        ).in_('status', ['pending', 'confirmed']).execute()
-        
-        # Get all blocks
-        blocks = db.table('availability_blocks').select('*').execute()
-        
-        # Build a map of date -> total guests booked
-        guests_per_date = {}
-        for res in reservations.data:
-            res_date = res['check_in_date']
-            if res_date not in guests_per_date:
-                guests_per_date[res_date] = 0
-            guests_per_date[res_date] += res['num_guests'] or 0
-        
-        # Build a set of blocked dates for fullday
-        blocked_dates = set()
-        for block in blocks.data:
-            # Consider blocks that explicitly block fullday OR blocks for all rooms (room_id is null)
-            blocks_fullday = block.get('blocks_fullday', False)
-            is_all_rooms = block['room_id'] is None
-            
-            # Block fullday if: blocks_fullday is True OR it's a block for all rooms
-            if not blocks_fullday and not is_all_rooms:
-                continue
-                
-            block_start = datetime.fromisoformat(block['start_date']).date() if isinstance(block['start_date'], str) else block['start_date']
-            block_end = datetime.fromisoformat(block['end_date']).date() if isinstance(block['end_date'], str) else block['end_date']
-            current = block_start
-            while current <= block_end:
-                blocked_dates.add(current.isoformat())
-                current += timedelta(days=1)
-        
-        # Check each date
-        current_date = start_date
-        while current_date <= end_date:
-            date_str = current_date.isoformat()
-            
-            # Check if date is blocked
-            if date_str in blocked_dates:
-                unavailable_dates.append(date_str)
-            else:
-                # Check capacity
-                current_guests = guests_per_date.get(date_str, 0)
-                remaining_capacity = settings.MAX_FULLDAY_CAPACITY - current_guests
-                
-                if remaining_capacity >= num_guests:
-                    available_dates.append(date_str)
-                else:
-                    unavailable_dates.append(date_str)
-            
-            current_date += timedelta(days=1)
+        available_dates, unavailable_dates = await AvailabilityService.get_fullday_calendar(
+            start_date, end_date, num_guests
+        )
         
+        response.headers.update(headers)
         return {
             "start_date": start_date.isoformat(),
             "end_date": end_date.isoformat(),
@@ -172,9 +143,50 @@ async def get_fullday_availability(
         }
         
     except Exception as e:
-        logger.error(f"Error checking fullday availability: {str(e)}")
+        logger.error("Error checking fullday availability: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e)
         )
 
+
+@router.get("/stream")
+async def stream_availability(
+    from_date: date = Query(..., alias='from'),
+    to_date: date = Query(..., alias='to'),
+    last_event_id: Optional[str] = Header(None)
+):
+    """Server-Sent Events with availability changes for the days [from, to].
+
+    ``availability`` events carry the new state of each changed day,
+    ``invalidate`` events a range to refetch and ``reset`` means refetch the
+    whole window. Reconnecting with Last-Event-ID replays what was missed.
+    """
+    if to_date < from_date or (to_date - from_date).days >= settings.AVAILABILITY_STREAM_MAX_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Rango inválido (máximo {settings.AVAILABILITY_STREAM_MAX_DAYS} días)"
+        )
+    
+    subscription = availability_events.subscribe(from_date, to_date, last_event_id)
+    
+    async def events():
+        try:
+            yield f"retry: {int(settings.AVAILABILITY_STREAM_HEARTBEAT_SECONDS * 1000)}\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(
+                        subscription.queue.get(), timeout=settings.AVAILABILITY_STREAM_HEARTBEAT_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    yield ": heartbeat\n\n"
+                    continue
+                yield event.encode()
+        finally:
+            availability_events.unsubscribe(subscription)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
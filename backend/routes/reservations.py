@@ -1,6 +1,6 @@
-from fastapi import APIRouter, HTTPException, status
-from typing import List
-from models import ReservationCreate, ReservationResponse, AvailabilityCheck, AvailabilityResponse
+from fastapi import APIRouter, HTTPException, status, Query
+from typing import Optional
+from models import ReservationCreate, ReservationResponse, ReservationPage, AvailabilityCheck, AvailabilityResponse
 from services.reservation_service import ReservationService
 import logging
 
@@ -11,22 +11,34 @@ router = APIRouter(prefix="/reservations", tags=["reservations"])
 async def create_reservation(reservation: ReservationCreate):
     """Create a new reservation"""
     try:
-        logger.info(f"Received reservation request: {reservation.dict()}")
+        logger.info(
+            "Received reservation request: %s %s rooms=%d guests=%d",
+            reservation.reservation_type.value, reservation.check_in_date,
+            len(reservation.room_ids or []), reservation.num_guests
+        )
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Reservation payload: %s", reservation.dict())
         return await ReservationService.create_reservation(reservation)
     except Exception as e:
-        logger.error(f"Error creating reservation: {str(e)}", exc_info=True)
+        # Rejections (no capacity, dates taken) are routine; tracebacks only when debugging
+        logger.error("Error creating reservation: %s", e, exc_info=logger.isEnabledFor(logging.DEBUG))
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
 
-@router.get("/", response_model=List[ReservationResponse])
-async def get_reservations(skip: int = 0, limit: int = 100):
-    """Get all reservations"""
+@router.get("/", response_model=ReservationPage)
+async def get_reservations(cursor: Optional[str] = None, limit: int = Query(100, ge=1, le=1000)):
+    """Get reservations, newest first; follow next_cursor for older pages"""
     try:
-        return await ReservationService.get_reservations(skip, limit)
+        return await ReservationService.get_reservations(cursor, limit)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
     except Exception as e:
-        logger.error(f"Error getting reservations: {str(e)}")
+        logger.error("Error getting reservations: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error fetching reservations"
@@ -38,7 +50,7 @@ async def get_reservation(reservation_id: str):
     try:
         return await ReservationService.get_reservation(reservation_id)
     except Exception as e:
-        logger.error(f"Error getting reservation: {str(e)}")
+        logger.error("Error getting reservation: %s", e)
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Reservation not found"
@@ -58,7 +70,7 @@ async def check_availability(check: AvailabilityCheck):
                 from database import get_db
                 from config import settings
                 db = get_db()
-                response = db.table('reservations').select('num_guests').eq(
+                response = await db.table('reservations').select('num_guests').eq(
                     'reservation_type', 'fullday'
                 ).eq('check_in_date', check.date.isoformat()).in_(
                     'status', ['confirmed', 'pending']
@@ -101,7 +113,7 @@ async def check_availability(check: AvailabilityCheck):
                     available_rooms=[]
                 )
     except Exception as e:
-        logger.error(f"Error checking availability: {str(e)}")
+        logger.error("Error checking availability: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error checking availability"
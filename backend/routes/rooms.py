@@ -1,32 +1,54 @@
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, status, Request, Response
 from typing import List
 from models import Room
 from services.room_service import RoomService
+from services.http_cache import not_modified
 import logging
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/rooms", tags=["rooms"])
 
+# Browsers and the CDN may store rooms but must revalidate them (cheap 304s)
+CACHE_CONTROL = "no-cache"
+
 @router.get("/", response_model=List[Room])
-async def get_rooms():
+async def get_rooms(request: Request, response: Response):
     """Get all active rooms"""
     try:
-        return await RoomService.get_rooms()
+        rooms = await RoomService.get_rooms()
     except Exception as e:
-        logger.error(f"Error getting rooms: {str(e)}")
+        logger.error("Error getting rooms: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error fetching rooms"
         )
+    
+    etag = RoomService.get_rooms_etag()
+    cached = not_modified(request, etag, {"Cache-Control": CACHE_CONTROL})
+    if cached:
+        return cached
+    if etag:
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = CACHE_CONTROL
+    return rooms
 
 @router.get("/{room_id}", response_model=Room)
-async def get_room(room_id: str):
+async def get_room(room_id: str, request: Request, response: Response):
     """Get room by ID"""
     try:
-        return await RoomService.get_room(room_id)
+        room = await RoomService.get_room(room_id)
     except Exception as e:
-        logger.error(f"Error getting room: {str(e)}")
+        logger.error("Error getting room: %s", e)
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Room not found"
         )
+    
+    etag = RoomService.get_room_etag(room_id)
+    cached = not_modified(request, etag, {"Cache-Control": CACHE_CONTROL})
+    if cached:
+        return cached
+    if etag:
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = CACHE_CONTROL
+    return room
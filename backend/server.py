@@ -1,4 +1,4 @@
-from fastapi import FastAPI, APIRouter
+from fastapi import FastAPI, APIRouter, Response
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 import os
@@ -7,7 +7,13 @@ from pathlib import Path
 
 # Import routes
 from routes import reservations, rooms, availability, admin
-from database import SupabaseClient
+from database import SupabaseClient, close_db
+from auth import password_hasher
+from services.email_outbox import email_outbox
+from services.email_service import default_transport
+from logging_config import setup_logging, shutdown_logging
+from metrics import MetricsMiddleware, registry, CONTENT_TYPE
+from server_timing import ServerTimingMiddleware
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -31,6 +37,11 @@ async def root():
         "version": "1.0.0"
     }
 
+# Prometheus scrape endpoint (this process's counters and histograms)
+@api_router.get("/metrics", include_in_schema=False)
+async def metrics():
+    return Response(content=registry.render(), media_type=CONTENT_TYPE)
+
 # Include route modules
 api_router.include_router(reservations.router)
 api_router.include_router(rooms.router)
@@ -54,18 +65,29 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],    # Permitir todos los métodos (GET, POST, PUT, DELETE)
     allow_headers=["*"],    # Permitir todos los headers
+    expose_headers=["X-Total-Count", "X-Next-Cursor"],  # Paginación del panel admin
 )
 
+# Per-request DB call counts/timings as a Server-Timing header
+app.add_middleware(ServerTimingMiddleware)
+# Outermost, so the timing covers CORS and error handling too
+app.add_middleware(MetricsMiddleware)
 
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+
+# Configure logging (JSON lines written from a background thread; see LOG_* settings)
+setup_logging()
 logger = logging.getLogger(__name__)
 
+@app.on_event("startup")
+async def start_email_outbox():
+    email_outbox.transport = default_transport()
+    email_outbox.start()
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
-    # Supabase client doesn't require explicit cleanup
-    logger.info("Application shutdown complete")
\ No newline at end of file
+    await email_outbox.stop()
+    close_db()
+    password_hasher.shutdown()
+    logger.info("Application shutdown complete")
+    shutdown_logging()
\ No newline at end of file
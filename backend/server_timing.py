@@ -0,0 +1,59 @@
+from database import DbCallStats, db_call_stats
+from config import settings
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def server_timing_header(stats: DbCallStats, total_seconds: float) -> str:
+    """Server-Timing value: request total, DB total and one entry per table/operation"""
+    entries = [
+        f'total;dur={total_seconds * 1000:.1f}',
+        f'db;dur={stats.seconds * 1000:.1f};desc="{stats.calls} calls"'
+    ]
+    for (table, operation), (calls, seconds) in sorted(stats.by_call.items()):
+        entries.append(f'db-{table}-{operation};dur={seconds * 1000:.1f};desc="{calls}"')
+    return ', '.join(entries)
+
+
+class ServerTimingMiddleware:
+    """ASGI middleware that counts and times the PostgREST calls of each request.
+
+    AsyncQuery.execute() records into the DbCallStats bound to the request's
+    context; the totals go out as a Server-Timing header, and requests over
+    DB_SLOW_REQUEST_CALLS round trips or DB_SLOW_REQUEST_MS of DB time get
+    a debug log line with the breakdown.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        stats = DbCallStats()
+        token = db_call_stats.set(stats)
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            if message['type'] == 'http.response.start':
+                header = server_timing_header(stats, time.perf_counter() - started)
+                message['headers'] = list(message.get('headers', [])) + [(b'server-timing', header.encode('latin-1'))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            db_call_stats.reset(token)
+            if stats.calls > settings.DB_SLOW_REQUEST_CALLS or stats.seconds * 1000 > settings.DB_SLOW_REQUEST_MS:
+                logger.debug(
+                    'DB-heavy request %s %s: %d calls, %.1f ms',
+                    scope['method'], scope['path'], stats.calls, stats.seconds * 1000,
+                    extra={'db_calls': {
+                        f'{table}.{operation}': {'calls': calls, 'ms': round(seconds * 1000, 1)}
+                        for (table, operation), (calls, seconds) in stats.by_call.items()
+                    }}
+                )
@@ -0,0 +1,236 @@
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+from collections import deque
+from datetime import date, timedelta
+from config import settings
+from database import get_db
+from services.occupancy_index import to_date
+from services.room_catalog import room_catalog
+from services.availability_service import AvailabilityService, build_availability_matrix, date_range
+from services.month_snapshots import month_snapshots
+from metrics import availability_stream_subscribers, availability_stream_events_total
+import asyncio
+import json
+import logging
+import uuid
+
+logger = logging.getLogger(__name__)
+
+
+class Change(NamedTuple):
+    """Days whose availability a write may have changed"""
+    start: date
+    end: date  # inclusive
+    room_ids: Optional[Tuple[str, ...]]  # None: every room; () : no room
+    fullday: bool
+
+
+class Event(NamedTuple):
+    id: str
+    name: str  # availability | invalidate | reset
+    data: dict
+
+    def for_window(self, start: date, end: date) -> Optional['Event']:
+        """This event restricted to the days [start, end]; None if it does not touch them"""
+        if self.name == 'availability':
+            dates = {day: delta for day, delta in self.data['dates'].items() if start <= date.fromisoformat(day) <= end}
+            return Event(self.id, self.name, {'dates': dates}) if dates else None
+        if self.name == 'invalidate':
+            first = max(date.fromisoformat(self.data['start']), start)
+            last = min(date.fromisoformat(self.data['end']), end)
+            if first > last:
+                return None
+            return Event(self.id, self.name, {**self.data, 'start': first.isoformat(), 'end': last.isoformat()})
+        return self
+
+    def encode(self) -> str:
+        return f'id: {self.id}\nevent: {self.name}\ndata: {json.dumps(self.data, separators=(",", ":"))}\n\n'
+
+
+class Subscription:
+    def __init__(self, start: date, end: date, queue_size: int):
+        self.start = start
+        self.end = end
+        self.queue: asyncio.Queue = asyncio.Queue(queue_size)
+
+    def offer(self, event: Event):
+        event = event.for_window(self.start, self.end)
+        if event is None:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Too slow to keep up: drop what is queued and tell it to refetch
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(Event(event.id, 'reset', {'reason': 'overflow'}))
+
+
+class AvailabilityBroadcaster:
+    """Fans availability changes out to Server-Sent Events subscribers.
+
+    Write paths call publish() with the days they touched. While someone is
+    subscribed, the new state of those days is read back (one query for
+    rooms, one RPC for Full Day) and sent as an ``availability`` event:
+    ``{"dates": {day: {"rooms": {room_id: available}, "fullday_remaining": n,
+    "fullday_closed": bool}}}``. With nobody listening only an ``invalidate``
+    event naming the range is recorded, so a client resuming later knows what
+    to refetch. The last ``AVAILABILITY_STREAM_HISTORY`` events are kept for
+    Last-Event-ID resume; older ids get a ``reset`` event.
+
+    Events are computed one at a time, in publish order, off the request
+    path. Only writes made through this process are seen.
+    """
+
+    def __init__(self, history_size: int, queue_size: int):
+        self.queue_size = queue_size
+        self._epoch = uuid.uuid4().hex[:8]
+        self._counter = 0
+        self._history: deque = deque(maxlen=history_size)
+        self._subscribers: List[Subscription] = []
+        self._lock: Optional[asyncio.Lock] = None
+        self._lock_loop = None
+        self._tasks = set()
+
+    # ------------------------------------------------------------------
+    # Subscribers
+    # ------------------------------------------------------------------
+    def subscribe(self, start: date, end: date, last_event_id: Optional[str] = None) -> Subscription:
+        """Register a subscriber for [start, end], queueing the events it missed since last_event_id"""
+        subscription = Subscription(start, end, self.queue_size)
+        if last_event_id:
+            for event in self.since(last_event_id):
+                subscription.offer(event)
+        self._subscribers.append(subscription)
+        availability_stream_subscribers.inc()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        if subscription in self._subscribers:
+            self._subscribers.remove(subscription)
+            availability_stream_subscribers.dec()
+
+    def since(self, last_event_id: str) -> List[Event]:
+        """Events after last_event_id, or a single reset event if they are no longer known"""
+        epoch, _, counter = last_event_id.partition('-')
+        oldest = self._history[0] if self._history else None
+        known = (
+            epoch == self._epoch and counter.isdigit()
+            and int(counter) <= self._counter
+            and (oldest is None or int(counter) >= int(oldest.id.partition('-')[2]) - 1)
+        )
+        if not known:
+            return [Event(self._next_id(advance=False), 'reset', {'reason': 'unknown_event_id'})]
+        return [event for event in self._history if int(event.id.partition('-')[2]) > int(counter)]
+
+    # ------------------------------------------------------------------
+    # Publishing
+    # ------------------------------------------------------------------
+    def publish(self, start, end, room_ids: Optional[Iterable[str]] = None, fullday: bool = False):
+        """Announce that [start, end] (dates or ISO strings, inclusive) may have changed.
+
+        ``room_ids`` None means every room, an empty list no room. The month
+        snapshots covering the range are dropped right away; the event is
+        built in the background.
+        """
+        change = Change(to_date(start), to_date(end), tuple(room_ids) if room_ids is not None else None, fullday)
+        if change.end < change.start or (change.room_ids == () and not change.fullday):
+            return
+        month_snapshots.invalidate(change.start, change.end)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        task = loop.create_task(self._publish(change))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def publish_reservation(self, reservation_type: str, room_ids: Optional[Iterable[str]], *stays):
+        """publish() for the days of one or more (check_in, check_out) stays of a reservation"""
+        spans = [stay_days(check_in, check_out) for check_in, check_out in stays if check_in]
+        if not spans:
+            return
+        fullday = reservation_type == 'fullday'
+        self.publish(
+            min(start for start, _ in spans), max(end for _, end in spans),
+            room_ids=[] if fullday else room_ids, fullday=fullday
+        )
+
+    def publish_block(self, block: dict):
+        """publish() for the days an availability_blocks row covers"""
+        self.publish(
+            block['start_date'], block['end_date'],
+            room_ids=[block['room_id']] if block.get('room_id') else None,
+            fullday=not block.get('room_id') or bool(block.get('blocks_fullday'))
+        )
+
+    async def drain(self):
+        """Wait until every scheduled event has been published"""
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+    async def _publish(self, change: Change):
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._lock_loop is not loop:
+            self._lock, self._lock_loop = asyncio.Lock(), loop
+        async with self._lock:
+            try:
+                if self._subscribers:
+                    dates = await self._deltas(change)
+                    event = Event(self._next_id(), 'availability', {'dates': dates})
+                else:
+                    event = self._invalidate(change)
+            except Exception as e:
+                logger.error('Could not compute availability event for %s..%s: %s', change.start, change.end, e)
+                event = self._invalidate(change)
+
+            self._history.append(event)
+            availability_stream_events_total.inc(event=event.name)
+            for subscription in list(self._subscribers):
+                subscription.offer(event)
+
+    def _invalidate(self, change: Change) -> Event:
+        return Event(self._next_id(), 'invalidate', {
+            'start': change.start.isoformat(),
+            'end': change.end.isoformat(),
+            'rooms': list(change.room_ids) if change.room_ids is not None else None,
+            'fullday': change.fullday
+        })
+
+    def _next_id(self, advance: bool = True) -> str:
+        if advance:
+            self._counter += 1
+        return f'{self._epoch}-{self._counter}'
+
+    async def _deltas(self, change: Change) -> Dict[str, dict]:
+        days = [day.isoformat() for day in date_range(change.start, change.end)]
+        deltas: Dict[str, dict] = {day: {} for day in days}
+
+        if change.room_ids != ():
+            room_ids = change.room_ids
+            if room_ids is None:
+                await room_catalog.ensure_loaded(get_db())
+                room_ids = [room.id for room in room_catalog.active_rooms()]
+            single = room_ids[0] if len(room_ids) == 1 else None
+            intervals = await AvailabilityService.get_occupied_intervals(change.start, change.end, single)
+            matrix = build_availability_matrix(list(room_ids), intervals, change.start, change.end)
+            for i, day in enumerate(days):
+                deltas[day]['rooms'] = {room_id: bool(matrix[r, i]) for r, room_id in enumerate(room_ids)}
+
+        if change.fullday:
+            for day, remaining, closed in await AvailabilityService.get_fullday_capacity(change.start, change.end):
+                deltas[day]['fullday_remaining'] = max(remaining, 0)
+                deltas[day]['fullday_closed'] = closed
+
+        return deltas
+
+
+availability_events = AvailabilityBroadcaster(
+    settings.AVAILABILITY_STREAM_HISTORY, settings.AVAILABILITY_STREAM_QUEUE_SIZE
+)
+
+
+def stay_days(check_in, check_out) -> Tuple[date, date]:
+    """Inclusive day range occupied by a stay [check_in, check_out)"""
+    check_in = to_date(check_in)
+    check_out = to_date(check_out) if check_out else check_in + timedelta(days=1)
+    return check_in, max(check_out - timedelta(days=1), check_in)
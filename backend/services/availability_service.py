@@ -0,0 +1,244 @@
+from typing import Dict, List, Optional, Tuple
+from datetime import date, timedelta
+from models import Room
+from database import get_db, fetch_all
+from config import settings
+from services.occupancy_index import ACTIVE_STATUSES, to_date
+from services.block_snapshot import block_store
+from metrics import availability_checks_total
+import base64
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def date_range(start_date: date, end_date: date) -> List[date]:
+    """Every date from start_date to end_date, both inclusive"""
+    return [start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1)]
+
+
+def blocked_days(intervals: List[Tuple[date, date]], start_date: date, end_date: date) -> List[bool]:
+    """Flag each day of [start_date, end_date] covered by a half-open [start, end) interval.
+
+    A night-by-night availability check for day d asks about [d, d + 1), so
+    day d is unavailable exactly when some interval has start <= d < end.
+    All intervals are painted onto a difference array in one pass.
+    """
+    num_days = (end_date - start_date).days + 1
+    if num_days <= 0:
+        return []
+
+    diff = [0] * (num_days + 1)
+    for start, end in intervals:
+        first = max((start - start_date).days, 0)
+        last = min((end - start_date).days, num_days)
+        if first < last:
+            diff[first] += 1
+            diff[last] -= 1
+
+    flags = []
+    covered = 0
+    for i in range(num_days):
+        covered += diff[i]
+        flags.append(covered > 0)
+    return flags
+
+
+def build_availability_matrix(
+    room_ids: List[str],
+    intervals: Dict[Optional[str], List[Tuple[date, date]]],
+    start_date: date,
+    end_date: date
+) -> np.ndarray:
+    """Boolean rooms x days matrix, True where the room is free that night.
+
+    Every interval becomes a +1/-1 pair on a per-room difference matrix; a
+    cumulative sum along the days axis then marks covered cells, so the cost
+    is one vectorized pass regardless of how long the stays are. Intervals
+    under the ``None`` key (blocks for all rooms) apply to every row.
+    """
+    num_days = max((end_date - start_date).days + 1, 0)
+    row_of = {room_id: i for i, room_id in enumerate(room_ids)}
+    global_row = len(room_ids)
+
+    rows, firsts, lasts = [], [], []
+    for room_id, room_intervals in intervals.items():
+        row = global_row if room_id is None else row_of.get(room_id)
+        if row is None:
+            continue
+        for start, end in room_intervals:
+            rows.append(row)
+            firsts.append((start - start_date).days)
+            lasts.append((end - start_date).days)
+
+    diff = np.zeros((len(room_ids) + 1, num_days + 1), dtype=np.int32)
+    if rows:
+        rows = np.asarray(rows)
+        firsts = np.clip(np.asarray(firsts), 0, num_days)
+        lasts = np.clip(np.asarray(lasts), 0, num_days)
+        keep = firsts < lasts
+        np.add.at(diff, (rows[keep], firsts[keep]), 1)
+        np.add.at(diff, (rows[keep], lasts[keep]), -1)
+
+    covered = np.cumsum(diff[:, :num_days], axis=1) > 0
+    return ~(covered[:-1] | covered[-1])
+
+
+def encode_bitmap(row: np.ndarray) -> str:
+    """Base64 of the row packed MSB-first, one bit per day (1 = available)"""
+    return base64.b64encode(np.packbits(row).tobytes()).decode('ascii')
+
+
+def encode_runs(row: np.ndarray) -> List[List[int]]:
+    """[offset, length] runs of available days, offsets relative to start_date"""
+    padded = np.concatenate(([False], row, [False]))
+    edges = np.flatnonzero(padded[1:] != padded[:-1])
+    return [[int(start), int(end - start)] for start, end in zip(edges[::2], edges[1::2])]
+
+
+def month_snapshots():
+    """The month snapshot store (imported late: it builds snapshots through this module)"""
+    from services.month_snapshots import month_snapshots as store
+    return store
+
+
+class AvailabilityService:
+    @staticmethod
+    async def get_occupied_intervals(
+        start_date: date,
+        end_date: date,
+        room_id: Optional[str] = None
+    ) -> Dict[Optional[str], List[Tuple[date, date]]]:
+        """Stays and blocks touching [start_date, end_date].
+
+        Stays come from one paged query; blocks from the block snapshot.
+        Returns room_id -> half-open [start, end) intervals; blocks that apply
+        to every room are returned under the ``None`` key. Stays are
+        [check_in, check_out) and blocks [start_date, end_date + 1 day),
+        matching ReservationService.check_room_availability.
+        """
+        db = get_db()
+
+        def stays_query():
+            query = db.table('reservation_rooms').select(
+                'room_id, reservations!inner(check_in_date, check_out_date, status)'
+            ).in_('reservations.status', list(ACTIVE_STATUSES)).lte(
+                'reservations.check_in_date', end_date.isoformat()
+            ).gt('reservations.check_out_date', start_date.isoformat())
+            if room_id:
+                query = query.eq('room_id', room_id)
+            return query.order('id')
+
+        blocks = await block_store.ensure_loaded(db)
+        intervals = blocks.intervals(start_date, end_date, room_id)
+
+        for rr in await fetch_all(stays_query):
+            res = rr['reservations']
+            intervals.setdefault(rr['room_id'], []).append(
+                (to_date(res['check_in_date']), to_date(res['check_out_date']))
+            )
+
+        return intervals
+
+    @staticmethod
+    async def get_room_calendar(room_id: str, start_date: date, end_date: date) -> Tuple[List[str], List[str]]:
+        """Split [start_date, end_date] into available and unavailable ISO dates for a room"""
+        availability_checks_total.inc(kind='room_calendar')
+        matrix = await month_snapshots().room_matrix([room_id], start_date, end_date)
+        if matrix is not None:
+            flags = list(~matrix[0])
+        else:
+            intervals = await AvailabilityService.get_occupied_intervals(start_date, end_date, room_id)
+            flags = blocked_days(intervals.get(room_id, []) + intervals.get(None, []), start_date, end_date)
+
+        available_dates = []
+        unavailable_dates = []
+        for day, blocked in zip(date_range(start_date, end_date), flags):
+            if blocked:
+                unavailable_dates.append(day.isoformat())
+            else:
+                available_dates.append(day.isoformat())
+
+        return available_dates, unavailable_dates
+
+    @staticmethod
+    async def get_rooms_availability(rooms: List[Room], start_date: date, end_date: date, output: str = 'dates') -> list:
+        """Availability of every room over [start_date, end_date] from one bulk load.
+
+        ``output`` selects the per-room encoding: ``dates`` (ISO date list, the
+        original shape), ``bitmap`` (see encode_bitmap) or ``rle`` (see
+        encode_runs).
+        """
+        availability_checks_total.inc(kind='rooms_calendar')
+        room_ids = [room.id for room in rooms]
+        matrix = await month_snapshots().room_matrix(room_ids, start_date, end_date)
+        if matrix is None:
+            intervals = await AvailabilityService.get_occupied_intervals(start_date, end_date)
+            matrix = build_availability_matrix(room_ids, intervals, start_date, end_date)
+
+        if output == 'dates':
+            days = np.array(date_range(start_date, end_date), dtype=object)
+            return [
+                {
+                    "room_id": room.id,
+                    "room_name": room.name,
+                    "available_dates": [day.isoformat() for day in days[matrix[i]]]
+                }
+                for i, room in enumerate(rooms)
+            ]
+
+        encode, key = (encode_bitmap, 'available_bitmap') if output == 'bitmap' else (encode_runs, 'available_runs')
+        return [
+            {
+                "room_id": room.id,
+                "room_name": room.name,
+                key: encode(matrix[i])
+            }
+            for i, room in enumerate(rooms)
+        ]
+
+    @staticmethod
+    async def get_fullday_capacity(start_date: date, end_date: date) -> List[Tuple[str, int, bool]]:
+        """(ISO date, remaining Full Day capacity, closed by a block) for each day of [start_date, end_date].
+
+        Always exact; the calendar endpoints read month snapshots first.
+
+        Guest totals come pre-aggregated per date from the get_fullday_guests
+        RPC; blocks for all rooms or flagged blocks_fullday (from the block
+        snapshot) close the day.
+        """
+        db = get_db()
+
+        totals = await db.rpc('get_fullday_guests', {
+            'p_start_date': start_date.isoformat(),
+            'p_end_date': end_date.isoformat()
+        }).execute()
+        guests_per_date = {row['check_in_date']: row['total_guests'] or 0 for row in totals.data or []}
+
+        blocks = await block_store.ensure_loaded(db)
+        closed = blocked_days(blocks.fullday_intervals(start_date, end_date), start_date, end_date)
+
+        return [
+            (day.isoformat(), settings.MAX_FULLDAY_CAPACITY - guests_per_date.get(day.isoformat(), 0), is_closed)
+            for day, is_closed in zip(date_range(start_date, end_date), closed)
+        ]
+
+    @staticmethod
+    async def get_fullday_calendar(start_date: date, end_date: date, num_guests: int) -> Tuple[List[str], List[str]]:
+        """Split [start_date, end_date] into Full Day dates with/without room for num_guests"""
+        availability_checks_total.inc(kind='fullday_calendar')
+
+        capacity = await month_snapshots().fullday_capacity(start_date, end_date)
+        if capacity is None:
+            capacity = await AvailabilityService.get_fullday_capacity(start_date, end_date)
+
+        available_dates = []
+        unavailable_dates = []
+        for date_str, remaining_capacity, is_closed in capacity:
+            if is_closed or remaining_capacity < num_guests:
+                unavailable_dates.append(date_str)
+            else:
+                available_dates.append(date_str)
+
+        return available_dates, unavailable_dates
@@ -0,0 +1,175 @@
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from datetime import date, timedelta
+from config import settings
+from database import fetch_all
+from services.occupancy_index import to_date, merge_intervals, intervals_overlap
+import asyncio
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class Block(NamedTuple):
+    id: str
+    room_id: Optional[str]  # None blocks every room
+    start: date
+    end: date  # exclusive: end_date + 1 day
+    blocks_fullday: bool
+
+
+def parse_block(row: dict) -> Block:
+    return Block(
+        row['id'],
+        row.get('room_id'),
+        to_date(row['start_date']),
+        to_date(row['end_date']) + timedelta(days=1),
+        bool(row.get('blocks_fullday'))
+    )
+
+
+def in_window(blocks, start_date: date, end_date: date) -> List[Tuple[date, date]]:
+    """[start, end) of the blocks touching the days [start_date, end_date]"""
+    return [(b.start, b.end) for b in blocks if b.start <= end_date and b.end > start_date]
+
+
+class BlockSnapshot:
+    """Immutable, pre-parsed copy of availability_blocks at one version.
+
+    Blocks are grouped by room, with blocks for every room kept under
+    ``global_blocks`` and the ones that close Full Day (global or flagged
+    ``blocks_fullday``) under ``fullday_blocks``. Never mutated: changes
+    produce a new snapshot with the next version.
+    """
+
+    def __init__(self, version: int, blocks: Dict[str, Block]):
+        self.version = version
+        self.blocks = blocks
+
+        by_room: Dict[str, List[Block]] = {}
+        for block in blocks.values():
+            if block.room_id is not None:
+                by_room.setdefault(block.room_id, []).append(block)
+        self.by_room: Dict[str, Tuple[Block, ...]] = {room_id: tuple(b) for room_id, b in by_room.items()}
+        self.global_blocks = tuple(b for b in blocks.values() if b.room_id is None)
+        self.fullday_blocks = tuple(b for b in blocks.values() if b.room_id is None or b.blocks_fullday)
+
+        self._merged = {
+            room_id: merge_intervals([(b.start, b.end) for b in room_blocks])
+            for room_id, room_blocks in list(self.by_room.items()) + [(None, self.global_blocks)]
+        }
+
+    def is_available(self, room_id: str, check_in: date, check_out: date) -> bool:
+        """False if a block for this room or for every room overlaps [check_in, check_out)"""
+        for key in (room_id, None):
+            starts, ends = self._merged.get(key, ([], []))
+            if intervals_overlap(starts, ends, check_in, check_out):
+                return False
+        return True
+
+    def intervals(self, start_date: date, end_date: date, room_id: Optional[str] = None) -> Dict[Optional[str], List[Tuple[date, date]]]:
+        """room_id -> [start, end) of blocks touching [start_date, end_date]; global blocks under None"""
+        rooms = [room_id] if room_id else list(self.by_room)
+        intervals = {key: in_window(self.by_room.get(key, ()), start_date, end_date) for key in rooms}
+        intervals[None] = in_window(self.global_blocks, start_date, end_date)
+        return {key: value for key, value in intervals.items() if value}
+
+    def fullday_intervals(self, start_date: date, end_date: date) -> List[Tuple[date, date]]:
+        return in_window(self.fullday_blocks, start_date, end_date)
+
+
+class BlockStore:
+    """Holds the current BlockSnapshot and swaps it atomically.
+
+    The snapshot is downloaded once and then replaced by the admin block
+    endpoints on every change; ``BLOCK_SNAPSHOT_MAX_AGE_SECONDS`` bounds how
+    long blocks edited outside the API (Supabase dashboard, other workers)
+    can go unnoticed.
+    """
+
+    def __init__(self, max_age_seconds: int):
+        self.max_age_seconds = max_age_seconds
+        self._lock = threading.Lock()
+        self._load_lock: Optional[asyncio.Lock] = None
+        self._load_lock_loop = None
+        self._snapshot = BlockSnapshot(0, {})
+        self._loaded_at: Optional[float] = None
+        self._loading = False
+        self._pending: List[Tuple] = []
+
+    @property
+    def snapshot(self) -> BlockSnapshot:
+        return self._snapshot
+
+    def is_stale(self) -> bool:
+        if self._loaded_at is None:
+            return True
+        return (time.monotonic() - self._loaded_at) > self.max_age_seconds
+
+    def invalidate(self):
+        """Force a reload on the next read"""
+        self._loaded_at = None
+
+    async def ensure_loaded(self, db) -> BlockSnapshot:
+        if self.is_stale():
+            loop = asyncio.get_running_loop()
+            if self._load_lock is None or self._load_lock_loop is not loop:
+                self._load_lock, self._load_lock_loop = asyncio.Lock(), loop
+            async with self._load_lock:
+                if self.is_stale():
+                    await self.load(db)
+        return self._snapshot
+
+    async def load(self, db):
+        """Download every block and swap in a fresh snapshot"""
+        self._loading = True
+        try:
+            rows = await fetch_all(
+                lambda: db.table('availability_blocks').select(
+                    'id, room_id, start_date, end_date, blocks_fullday'
+                ).order('id')
+            )
+            blocks = {row['id']: parse_block(row) for row in rows}
+            with self._lock:
+                self._snapshot = BlockSnapshot(self._snapshot.version + 1, blocks)
+                self._loaded_at = time.monotonic()
+                pending, self._pending = self._pending, []
+        finally:
+            self._loading = False
+
+        # Replay changes made while the rows were being downloaded
+        for method, args in pending:
+            method(*args)
+
+        logger.info('Block snapshot v%d loaded: %d blocks', self._snapshot.version, len(self._snapshot.blocks))
+
+    def upsert(self, row: dict):
+        """Record a created/updated block from its Supabase row"""
+        self._apply(self._upsert, (parse_block(row),))
+
+    def remove(self, block_id: str):
+        self._apply(self._remove, (block_id,))
+
+    def _apply(self, method, args):
+        if self._loading:
+            self._pending.append((method, args))
+        if self._loaded_at is not None:
+            method(*args)
+
+    def _upsert(self, block: Block):
+        with self._lock:
+            blocks = dict(self._snapshot.blocks)
+            blocks[block.id] = block
+            self._snapshot = BlockSnapshot(self._snapshot.version + 1, blocks)
+
+    def _remove(self, block_id: str):
+        with self._lock:
+            if block_id not in self._snapshot.blocks:
+                return
+            blocks = dict(self._snapshot.blocks)
+            del blocks[block_id]
+            self._snapshot = BlockSnapshot(self._snapshot.version + 1, blocks)
+
+
+block_store = BlockStore(settings.BLOCK_SNAPSHOT_MAX_AGE_SECONDS)
@@ -0,0 +1,260 @@
+from typing import Dict, List, Optional, Tuple
+from datetime import date, timedelta
+from pydantic import ValidationError
+from models import (
+    ReservationCreate, ReservationType, ReservationStatus, Room,
+    BulkReservationResult, BulkImportReport
+)
+from database import get_db, get_admin_db
+from config import settings
+from services.availability_service import AvailabilityService
+from services.occupancy_index import occupancy_index
+from services.room_catalog import room_catalog
+from services.data_version import availability_version
+from services.availability_events import availability_events, stay_days
+from services.reservation_service import record_rejection
+from metrics import reservations_created_total
+import csv
+import io
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+# Separators accepted between room ids inside a single CSV cell
+ROOM_IDS_SEPARATOR = re.compile(r'[;|]')
+
+
+def rows_from_csv(text: str) -> List[dict]:
+    """Parse a CSV with ReservationCreate column names into raw row dicts.
+
+    Empty cells are dropped so optional fields fall back to their defaults;
+    room_ids holds one or more ids separated by ';' or '|'.
+    """
+    rows = []
+    for record in csv.DictReader(io.StringIO(text.lstrip('\ufeff'))):
+        row = {key.strip(): value.strip() for key, value in record.items() if key and value and value.strip()}
+        if 'room_ids' in row:
+            row['room_ids'] = [room_id.strip() for room_id in ROOM_IDS_SEPARATOR.split(row['room_ids']) if room_id.strip()]
+        rows.append(row)
+    return rows
+
+
+def format_validation_error(error: ValidationError) -> str:
+    return '; '.join(
+        f"{'.'.join(str(part) for part in e['loc'])}: {e['msg']}" if e['loc'] else e['msg']
+        for e in error.errors()
+    )
+
+
+def normalize_name(name: str) -> str:
+    return ' '.join(name.lower().split())
+
+
+def chunks(items: list, size: int):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+class BulkImportService:
+    @staticmethod
+    async def import_reservations(raw_rows: List[dict]) -> BulkImportReport:
+        """Validate and create a batch of reservations.
+
+        Every row is first checked against a single snapshot of room
+        occupancy, Full Day guest totals, rooms and existing clients, loaded
+        with a handful of queries for the whole date window of the batch.
+        Accepted rows are added to that snapshot as they go, so two rows of
+        the same batch cannot claim the same room night or the same Full Day
+        seats. This pre-check only saves round trips: the rows it accepts are
+        created by the create_reservations_bulk RPC, which locks and re-checks
+        them the way create_reservation_atomic does for a single booking.
+        """
+        db = get_db()
+        # create_reservations_bulk is only executable by the service role
+        admin_db = get_admin_db()
+
+        if not db or not admin_db:
+            raise Exception('Database not configured')
+
+        results: List[BulkReservationResult] = []
+        reservations: List[Tuple[int, ReservationCreate]] = []
+
+        # 1. Validate every row's shape
+        for row_number, raw in enumerate(raw_rows, start=1):
+            try:
+                if not isinstance(raw, dict):
+                    raise ValueError('Each row must be an object')
+                reservation = ReservationCreate(**raw)
+                # validator('check_out_date') does not run when the field is left out
+                if reservation.reservation_type == ReservationType.HOSPEDAJE and not reservation.check_out_date:
+                    raise ValueError('check_out_date: check_out_date es requerido para hospedaje')
+                reservations.append((row_number, reservation))
+            except ValidationError as e:
+                results.append(BulkReservationResult(row=row_number, status='rejected', error=format_validation_error(e)))
+                record_rejection('unknown', '', 'bulk', reason='invalid')
+            except ValueError as e:
+                results.append(BulkReservationResult(row=row_number, status='rejected', error=str(e)))
+                record_rejection('unknown', '', 'bulk', reason='invalid')
+
+        # 2. Load the snapshot
+        snapshot = await BulkImportService._load_snapshot(db, [r for _, r in reservations])
+        intervals, guests_per_date, rooms, clients = snapshot
+
+        # 3. Check availability row by row, claiming what each accepted row uses
+        accepted = []
+        for row_number, reservation in reservations:
+            error = None
+            client = clients.get(reservation.client_document)
+            if client and normalize_name(client['full_name']) != normalize_name(reservation.client_name):
+                error = (
+                    f'El documento {reservation.client_document} ya está registrado con otro nombre '
+                    f'({client["full_name"]}). Si eres el mismo cliente, usa el nombre registrado.'
+                )
+            elif reservation.reservation_type == ReservationType.FULLDAY:
+                day = reservation.check_in_date
+                if guests_per_date.get(day, 0) + reservation.num_guests > settings.MAX_FULLDAY_CAPACITY:
+                    error = 'Full day capacity exceeded for this date'
+                else:
+                    guests_per_date[day] = guests_per_date.get(day, 0) + reservation.num_guests
+            else:
+                check_in, check_out = reservation.check_in_date, reservation.check_out_date
+                if any(room_id not in rooms for room_id in reservation.room_ids):
+                    error = 'Room not found'
+                elif any(
+                    start < check_out and check_in < end
+                    for room_id in reservation.room_ids + [None]
+                    for start, end in intervals.get(room_id, [])
+                ):
+                    error = 'Room not available for selected dates'
+                else:
+                    for room_id in reservation.room_ids:
+                        intervals.setdefault(room_id, []).append((check_in, check_out))
+
+            if error:
+                results.append(BulkReservationResult(row=row_number, status='rejected', error=error))
+                record_rejection(reservation.reservation_type.value, error, 'bulk')
+                continue
+
+            # A new document is registered under the first row's name
+            if not client:
+                clients[reservation.client_document] = {'full_name': reservation.client_name}
+            accepted.append((row_number, reservation))
+
+        # 4. Create accepted rows, re-checked under the booking locks
+        results.extend(await BulkImportService._create(admin_db, accepted))
+        if any(r.status == 'created' for r in results):
+            availability_version.bump()
+            availability_events.publish(
+                min(r.check_in_date for _, r in accepted),
+                max(stay_days(r.check_in_date, r.check_out_date)[1] for _, r in accepted),
+                room_ids=None, fullday=True
+            )
+        results.sort(key=lambda r: r.row)
+
+        report = BulkImportReport(
+            total=len(raw_rows),
+            created=sum(1 for r in results if r.status == 'created'),
+            rejected=sum(1 for r in results if r.status == 'rejected'),
+            failed=sum(1 for r in results if r.status == 'failed'),
+            results=results
+        )
+        logger.info(
+            'Bulk import: %d rows, %d created, %d rejected, %d failed',
+            report.total, report.created, report.rejected, report.failed
+        )
+        return report
+
+    @staticmethod
+    async def _load_snapshot(db, reservations: List[ReservationCreate]):
+        """Occupancy, Full Day totals, rooms and clients touched by the batch"""
+        intervals: Dict[Optional[str], List[Tuple[date, date]]] = {}
+        guests_per_date: Dict[date, int] = {}
+        rooms: Dict[str, Room] = {}
+        clients: Dict[str, dict] = {}
+
+        stays = [r for r in reservations if r.reservation_type == ReservationType.HOSPEDAJE]
+        if stays:
+            intervals = await AvailabilityService.get_occupied_intervals(
+                min(r.check_in_date for r in stays),
+                max(r.check_out_date for r in stays) - timedelta(days=1)
+            )
+            await room_catalog.ensure_loaded(db)
+            for room_id in {room_id for r in stays for room_id in r.room_ids}:
+                room = room_catalog.get(room_id)
+                if room:
+                    rooms[room_id] = room
+
+        fulldays = [r for r in reservations if r.reservation_type == ReservationType.FULLDAY]
+        if fulldays:
+            totals = await db.rpc('get_fullday_guests', {
+                'p_start_date': min(r.check_in_date for r in fulldays).isoformat(),
+                'p_end_date': max(r.check_in_date for r in fulldays).isoformat()
+            }).execute()
+            guests_per_date = {
+                date.fromisoformat(row['check_in_date'][:10]): row['total_guests'] or 0
+                for row in totals.data or []
+            }
+
+        documents = sorted({r.client_document for r in reservations})
+        for batch in chunks(documents, settings.BULK_INSERT_CHUNK_SIZE):
+            response = await db.table('clients').select('full_name, id_document, email, phone').in_('id_document', batch).execute()
+            clients.update({client['id_document']: client for client in response.data})
+
+        return intervals, guests_per_date, rooms, clients
+
+    @staticmethod
+    async def _create(db, accepted: List[Tuple[int, ReservationCreate]]) -> List[BulkReservationResult]:
+        """Create accepted rows through create_reservations_bulk, one chunk per call.
+
+        The RPC takes the room and Full Day date locks create_reservation_atomic
+        takes and re-checks every row under them, so a booking that landed
+        after the snapshot turns only the rows it conflicts with into
+        rejections.
+        """
+        results = []
+        for batch in chunks(accepted, settings.BULK_INSERT_CHUNK_SIZE):
+            by_row = dict(batch)
+            try:
+                response = await db.rpc('create_reservations_bulk', {'p_rows': [
+                    {
+                        'row': row_number,
+                        'client_name': reservation.client_name,
+                        'client_document': reservation.client_document,
+                        'client_email': reservation.client_email,
+                        'client_phone': reservation.client_phone,
+                        'reservation_type': reservation.reservation_type.value,
+                        'check_in_date': reservation.check_in_date.isoformat(),
+                        'check_out_date': reservation.check_out_date.isoformat() if reservation.check_out_date else None,
+                        'num_guests': reservation.num_guests,
+                        'room_ids': reservation.room_ids,
+                        'notes': reservation.notes
+                    }
+                    for row_number, reservation in batch
+                ]}).execute()
+            except Exception as e:
+                logger.error('Bulk import: error creating rows %d-%d: %s', batch[0][0], batch[-1][0], e)
+                results.extend(
+                    BulkReservationResult(row=row_number, status='failed', error='Error saving reservation')
+                    for row_number, _ in batch
+                )
+                continue
+
+            for outcome in response.data:
+                result = BulkReservationResult(**outcome)
+                reservation = by_row[result.row]
+                if result.status == 'created':
+                    if reservation.reservation_type == ReservationType.HOSPEDAJE:
+                        occupancy_index.upsert_reservation(
+                            result.reservation_id,
+                            reservation.room_ids,
+                            reservation.check_in_date,
+                            reservation.check_out_date,
+                            ReservationStatus.PENDING.value
+                        )
+                    reservations_created_total.inc(type=reservation.reservation_type.value, source='bulk')
+                elif result.status == 'rejected':
+                    record_rejection(reservation.reservation_type.value, result.error or '', 'bulk')
+                results.append(result)
+
+        return results
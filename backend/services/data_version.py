@@ -0,0 +1,41 @@
+from typing import Tuple
+from config import settings
+import threading
+import time
+import uuid
+
+
+class DataVersion:
+    """Process-wide version of the reservation/block data behind availability.
+
+    Every write path calls bump(); read endpoints turn the current version
+    into an ETag/Last-Modified pair so clients can revalidate without the
+    server recomputing anything. Writes made outside this process (another
+    worker, the Supabase dashboard) are not seen, so the version also rolls
+    over on its own once ``max_age_seconds`` pass without a bump.
+    """
+
+    def __init__(self, max_age_seconds: int):
+        self.max_age_seconds = max_age_seconds
+        self._lock = threading.Lock()
+        # Distinguishes this process's counter from other workers/restarts
+        self._epoch = uuid.uuid4().hex[:8]
+        self._counter = 0
+        self._modified_at = time.time()
+        self._bumped_at = time.monotonic()
+
+    def bump(self):
+        with self._lock:
+            self._counter += 1
+            self._modified_at = time.time()
+            self._bumped_at = time.monotonic()
+
+    def current(self) -> Tuple[str, float]:
+        """(ETag, Last-Modified timestamp) of the data as of now"""
+        if self.max_age_seconds and time.monotonic() - self._bumped_at > self.max_age_seconds:
+            self.bump()
+        with self._lock:
+            return f'W/"{self._epoch}-{self._counter}"', self._modified_at
+
+
+availability_version = DataVersion(settings.AVAILABILITY_VERSION_MAX_AGE_SECONDS)
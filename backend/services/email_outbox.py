@@ -0,0 +1,199 @@
+from typing import List, Optional
+from datetime import datetime, timedelta, timezone
+from config import settings
+from database import get_admin_db
+from metrics import email_outbox_total
+import asyncio
+import logging
+import random
+
+logger = logging.getLogger(__name__)
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def backoff_seconds(attempts: int) -> float:
+    """Delay before retry number ``attempts``: exponential, capped, with +-20% jitter"""
+    delay = min(
+        settings.EMAIL_OUTBOX_BACKOFF_SECONDS * 2 ** max(attempts - 1, 0),
+        settings.EMAIL_OUTBOX_MAX_BACKOFF_SECONDS
+    )
+    return delay * random.uniform(0.8, 1.2)
+
+
+class EmailOutbox:
+    """Persistent email queue (table ``email_outbox``) drained by a background task.
+
+    Handlers call enqueue(), which stores the message and returns at once;
+    the worker sends due rows with at most ``EMAIL_OUTBOX_CONCURRENCY`` in
+    flight. A failed send is retried with exponential backoff and, after
+    ``EMAIL_OUTBOX_MAX_ATTEMPTS``, left in status ``dead`` with its last
+    error. Rows are claimed by moving ``next_attempt_at`` forward (a lease)
+    with a compare-and-set update, so several workers can share the table
+    and a row held by a worker that died is picked up once the lease ends.
+    Delivery is at least once.
+
+    The table is only reachable with the service key, and a row's ``html``
+    is cleared once it is sent or dead: a password reset email carries the
+    reset code.
+
+    ``transport`` is anything with ``send(recipient, subject, body)``; it
+    runs in a thread. Without one, nothing is enqueued.
+    """
+
+    def __init__(self, transport=None):
+        self.transport = transport
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        # Earliest retry this worker scheduled; it wakes up for it instead of
+        # waiting out the whole poll interval
+        self._next_retry: Optional[datetime] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.transport is not None
+
+    async def enqueue(self, kind: str, recipient: str, subject: str, body: str,
+                      reservation_id: Optional[str] = None) -> str:
+        """Store a message for sending and return its outbox id"""
+        db = get_admin_db()
+        if not db:
+            raise Exception('Database not configured')
+        result = await db.table('email_outbox').insert({
+            'kind': kind,
+            'recipient': recipient,
+            'subject': subject,
+            'html': body,
+            'reservation_id': reservation_id,
+            'status': 'pending',
+            'attempts': 0,
+            'next_attempt_at': _now().isoformat()
+        }).execute()
+        if self._wake is not None:
+            self._wake.set()
+        return result.data[0]['id']
+
+    # ------------------------------------------------------------------
+    # Worker
+    # ------------------------------------------------------------------
+    def start(self):
+        if self._task is None and self.enabled:
+            self._wake = asyncio.Event()
+            self._task = asyncio.create_task(self._run(), name='email-outbox')
+            logger.info('Email outbox worker started')
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self._wake = None
+
+    async def _run(self):
+        while True:
+            try:
+                while await self.run_once() == settings.EMAIL_OUTBOX_BATCH_SIZE:
+                    pass
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error('Email outbox pass failed: %s', e)
+
+            timeout = settings.EMAIL_OUTBOX_POLL_SECONDS
+            if self._next_retry is not None:
+                timeout = min(timeout, max((self._next_retry - _now()).total_seconds(), 0))
+                self._next_retry = None
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    async def run_once(self) -> int:
+        """Send one batch of due messages; returns how many rows were due"""
+        db = get_admin_db()
+        if not db:
+            raise Exception('Database not configured')
+        now = _now()
+        due = await db.table('email_outbox').select('*').in_(
+            'status', ['pending', 'sending']
+        ).lte('next_attempt_at', now.isoformat()).order('next_attempt_at').limit(
+            settings.EMAIL_OUTBOX_BATCH_SIZE
+        ).execute()
+
+        semaphore = asyncio.Semaphore(settings.EMAIL_OUTBOX_CONCURRENCY)
+
+        async def deliver(row):
+            async with semaphore:
+                if await self._claim(db, row):
+                    await self._send(db, row)
+
+        await asyncio.gather(*(deliver(row) for row in due.data))
+        return len(due.data)
+
+    async def _claim(self, db, row: dict) -> bool:
+        """Take the row for one send attempt unless another worker got it first"""
+        lease_until = _now() + timedelta(seconds=settings.EMAIL_SEND_TIMEOUT_SECONDS)
+        result = await db.table('email_outbox').update({
+            'status': 'sending',
+            'next_attempt_at': lease_until.isoformat()
+        }).eq('id', row['id']).eq('next_attempt_at', row['next_attempt_at']).execute()
+        return bool(result.data)
+
+    async def _send(self, db, row: dict):
+        attempts = row['attempts'] + 1
+        try:
+            await asyncio.wait_for(
+                asyncio.to_thread(self.transport.send, row['recipient'], row['subject'], row['html']),
+                timeout=settings.EMAIL_SEND_TIMEOUT_SECONDS
+            )
+        except Exception as e:
+            error = str(e) or type(e).__name__
+            if attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+                logger.error('Email %s (%s) dead after %d attempts: %s', row['id'], row['kind'], attempts, error)
+                update = {'status': 'dead', 'html': ''}
+                result = 'dead'
+            else:
+                retry_at = _now() + timedelta(seconds=backoff_seconds(attempts))
+                logger.warning('Email %s (%s) attempt %d failed, retrying at %s: %s',
+                               row['id'], row['kind'], attempts, retry_at.isoformat(), error)
+                update = {'status': 'pending', 'next_attempt_at': retry_at.isoformat()}
+                result = 'retry'
+                if self._next_retry is None or retry_at < self._next_retry:
+                    self._next_retry = retry_at
+            update.update({'attempts': attempts, 'last_error': error[:1000], 'updated_at': _now().isoformat()})
+            await db.table('email_outbox').update(update).eq('id', row['id']).execute()
+            email_outbox_total.inc(kind=row['kind'], result=result)
+            return
+
+        await db.table('email_outbox').update({
+            'status': 'sent',
+            'html': '',
+            'attempts': attempts,
+            'sent_at': _now().isoformat(),
+            'updated_at': _now().isoformat()
+        }).eq('id', row['id']).execute()
+        if row.get('reservation_id'):
+            await db.table('reservations').update({
+                'email_confirmation_sent': True
+            }).eq('id', row['reservation_id']).execute()
+        email_outbox_total.inc(kind=row['kind'], result='sent')
+
+    async def dead_letters(self, limit: int = 100) -> List[dict]:
+        """Messages that exhausted their retries, newest first"""
+        db = get_admin_db()
+        if not db:
+            raise Exception('Database not configured')
+        result = await db.table('email_outbox').select(
+            'id, kind, recipient, subject, reservation_id, attempts, last_error, created_at, updated_at'
+        ).eq('status', 'dead').order('updated_at', desc=True).limit(limit).execute()
+        return result.data
+
+
+email_outbox = EmailOutbox()
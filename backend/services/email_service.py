@@ -1,6 +1,8 @@
 import resend
+import html
 import os
 import logging
+from typing import Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
@@ -14,40 +16,71 @@ ADMIN_EMAIL = "cabanasaquavalle@gmail.com"
 FROM_EMAIL = os.environ.get("FROM_EMAIL", "onboarding@resend.dev")
 
 
-def send_password_reset_email(reset_code: str) -> bool:
+class ResendTransport:
+    """Sends one message through the Resend API (blocking; the outbox runs it in a thread)"""
+
+    def send(self, recipient: str, subject: str, body: str):
+        response = resend.Emails.send({
+            "from": FROM_EMAIL,
+            "to": [recipient],
+            "subject": subject,
+            "html": body
+        })
+        logger.info("Email enviado: %s", response)
+
+
+def default_transport() -> Optional[ResendTransport]:
+    """The Resend transport, or None when RESEND_API_KEY is not configured"""
     if not resend.api_key:
         logger.error("RESEND_API_KEY no está configurada")
-        return False
-    
-    try:
-        html_content = f"""
+        return None
+    return ResendTransport()
+
+
+def _layout(title: str, body: str) -> str:
+    return f"""
         <!DOCTYPE html>
         <html>
         <body style="font-family: Arial, sans-serif; background-color: #f5f5f4; padding: 20px;">
             <div style="max-width: 500px; margin: 0 auto; background: white; border-radius: 12px; padding: 40px;">
                 <h1 style="color: #15803d; text-align: center;">Cabañas AquaValle</h1>
-                <h2 style="color: #292524; text-align: center;">Recuperación de Contraseña</h2>
+                <h2 style="color: #292524; text-align: center;">{title}</h2>
+                {body}
+            </div>
+        </body>
+        </html>
+        """
+
+
+def password_reset_email(reset_code: str) -> Tuple[str, str]:
+    """(subject, html body) of the admin password recovery email"""
+    body = f"""
                 <p style="text-align: center;">Tu código de recuperación es:</p>
                 <div style="background: #f0fdf4; border: 2px solid #15803d; border-radius: 8px; padding: 20px; text-align: center; margin: 20px 0;">
                     <span style="font-size: 32px; font-weight: bold; color: #15803d; letter-spacing: 8px;">{reset_code}</span>
                 </div>
                 <p style="text-align: center; color: #78716c;">Este código expira en 15 minutos.</p>
-            </div>
-        </body>
-        </html>
         """
-        
-        params = {
-            "from": FROM_EMAIL,
-            "to": [ADMIN_EMAIL],
-            "subject": "Código de Recuperación - Cabañas AquaValle",
-            "html": html_content
-        }
-        
-        response = resend.Emails.send(params)
-        logger.info(f"Email enviado: {response}")
-        return True
-        
-    except Exception as e:
-        logger.error(f"Error enviando email: {str(e)}")
-        return False
\ No newline at end of file
+    return "Código de Recuperación - Cabañas AquaValle", _layout("Recuperación de Contraseña", body)
+
+
+def booking_confirmation_email(reservation) -> Tuple[str, str]:
+    """(subject, html body) of the email sent to the client after booking"""
+    if reservation.reservation_type.value == 'hospedaje':
+        details = f"""
+                <p><strong>Habitaciones:</strong> {html.escape(', '.join(reservation.rooms))}</p>
+                <p><strong>Entrada:</strong> {reservation.check_in_date.isoformat()}</p>
+                <p><strong>Salida:</strong> {reservation.check_out_date.isoformat()}</p>
+        """
+    else:
+        details = f"""
+                <p><strong>Full Day:</strong> {reservation.check_in_date.isoformat()}</p>
+        """
+    body = f"""
+                <p>Hola {html.escape(reservation.client_name)}, recibimos tu reserva.</p>
+                {details}
+                <p><strong>Personas:</strong> {reservation.num_guests}</p>
+                <p><strong>Total:</strong> €{reservation.total_price:.2f}</p>
+                <p style="color: #78716c;">Tu reserva queda pendiente hasta que la confirmemos por WhatsApp.</p>
+        """
+    return "Reserva recibida - Cabañas AquaValle", _layout("Reserva recibida", body)
@@ -0,0 +1,70 @@
+import math
+import time
+from typing import Optional
+from email.utils import formatdate, parsedate_to_datetime
+from fastapi import Request, Response
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """True if an If-None-Match header value covers etag (weak comparison)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    bare = etag[2:] if etag.startswith('W/') else etag
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate == bare:
+            return True
+    return False
+
+
+def http_date(timestamp: float) -> str:
+    """HTTP date for timestamp, rounded up to the whole second"""
+    return formatdate(math.ceil(timestamp), usegmt=True)
+
+
+def last_modified_settled(timestamp: float) -> bool:
+    """True once the second http_date(timestamp) names has passed.
+
+    Until then a later write in the same second would get the same
+    Last-Modified, so the header must not be sent yet.
+    """
+    return math.ceil(timestamp) <= time.time()
+
+
+def modified_since(if_modified_since: Optional[str], timestamp: float) -> bool:
+    """False if the client's copy (If-Modified-Since) is at least as new as timestamp"""
+    if not if_modified_since:
+        return True
+    try:
+        return math.ceil(timestamp) > parsedate_to_datetime(if_modified_since).timestamp()
+    except (TypeError, ValueError):
+        return True
+
+
+def not_modified(
+    request: Request,
+    etag: Optional[str],
+    headers: Optional[dict] = None,
+    last_modified: Optional[float] = None
+) -> Optional[Response]:
+    """A 304 response if the client already holds this version, else None.
+
+    If-None-Match takes precedence; If-Modified-Since is only consulted
+    when the request carries no ETag to compare.
+    """
+    if not etag:
+        return None
+    if_none_match = request.headers.get('if-none-match')
+    if if_none_match:
+        fresh = etag_matches(if_none_match, etag)
+    else:
+        fresh = last_modified is not None and 'if-modified-since' in request.headers and not modified_since(
+            request.headers['if-modified-since'], last_modified
+        )
+    if fresh:
+        return Response(status_code=304, headers={'ETag': etag, **(headers or {})})
+    return None
@@ -0,0 +1,302 @@
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from datetime import date, timedelta
+from pathlib import Path
+from config import settings
+from database import get_db
+from services.room_catalog import room_catalog
+from services.availability_service import AvailabilityService, build_availability_matrix
+from metrics import availability_snapshot_requests_total, availability_snapshot_builds_total
+import asyncio
+import json
+import logging
+import os
+import struct
+import time
+import zlib
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+BLOB_VERSION = 1
+
+MonthKey = Tuple[int, int]
+
+
+def month_key(day: date) -> MonthKey:
+    return day.year, day.month
+
+
+def month_bounds(key: MonthKey) -> Tuple[date, date]:
+    """First and last day of the month"""
+    year, month = key
+    first = date(year, month, 1)
+    following = date(year + month // 12, month % 12 + 1, 1)
+    return first, following - timedelta(days=1)
+
+
+def months_between(start_date: date, end_date: date) -> List[MonthKey]:
+    keys = []
+    key = month_key(start_date)
+    while key <= month_key(end_date):
+        keys.append(key)
+        key = (key[0] + key[1] // 12, key[1] % 12 + 1)
+    return keys
+
+
+class MonthSnapshot(NamedTuple):
+    """Availability of one calendar month: rooms x days and Full Day capacity per day"""
+    key: MonthKey
+    room_ids: Tuple[str, ...]
+    rooms: np.ndarray  # bool, len(room_ids) x days, True = free that night
+    fullday_remaining: np.ndarray  # int, per day
+    fullday_closed: np.ndarray  # bool, per day
+    built_at: float  # time.time()
+
+
+def encode_snapshot(snapshot: MonthSnapshot) -> bytes:
+    """zlib blob: 4-byte header length, JSON header, packed room bits, int16 capacities, packed closed bits"""
+    header = json.dumps({
+        'v': BLOB_VERSION,
+        'key': list(snapshot.key),
+        'rooms': list(snapshot.room_ids),
+        'built_at': snapshot.built_at
+    }, separators=(',', ':')).encode()
+    return zlib.compress(b''.join((
+        struct.pack('>I', len(header)),
+        header,
+        np.packbits(snapshot.rooms, axis=None).tobytes(),
+        snapshot.fullday_remaining.astype('>i2').tobytes(),
+        np.packbits(snapshot.fullday_closed).tobytes()
+    )))
+
+
+def decode_snapshot(blob: bytes) -> MonthSnapshot:
+    raw = zlib.decompress(blob)
+    (header_size,) = struct.unpack_from('>I', raw)
+    header = json.loads(raw[4:4 + header_size])
+    if header['v'] != BLOB_VERSION:
+        raise ValueError(f"Unsupported snapshot version {header['v']}")
+
+    key = tuple(header['key'])
+    room_ids = tuple(header['rooms'])
+    first, last = month_bounds(key)
+    num_days = (last - first).days + 1
+    offset = 4 + header_size
+
+    room_bytes = (len(room_ids) * num_days + 7) // 8
+    bits = np.unpackbits(np.frombuffer(raw, np.uint8, room_bytes, offset))
+    rooms = bits[:len(room_ids) * num_days].astype(bool).reshape(len(room_ids), num_days)
+    offset += room_bytes
+
+    remaining = np.frombuffer(raw, '>i2', num_days, offset).astype(np.int32)
+    offset += 2 * num_days
+
+    closed = np.unpackbits(np.frombuffer(raw, np.uint8, (num_days + 7) // 8, offset))[:num_days].astype(bool)
+    return MonthSnapshot(key, room_ids, rooms, remaining, closed, header['built_at'])
+
+
+class MonthSnapshotStore:
+    """Per-month availability, precomputed and kept as compact blobs.
+
+    Covers the current month and the following ``months - 1``, where almost
+    all booking traffic lands. A month is built on first use from the same
+    queries the exact path runs (stays and blocks for the rooms matrix, the
+    get_fullday_guests RPC for capacity) and then served without touching
+    the database. availability_events.publish() drops the months a write
+    touches, so only those are rebuilt; ``max_age_seconds`` bounds how long
+    writes from other processes go unnoticed. With ``directory`` set, blobs
+    are also written to disk and reused after a restart while still fresh.
+
+    Ranges reaching outside the covered months return None, and callers
+    fall back to the exact computation.
+    """
+
+    def __init__(self, months: int, max_age_seconds: int, directory: str = ''):
+        self.months = months
+        self.max_age_seconds = max_age_seconds
+        self.directory = Path(directory) if directory else None
+        self._blobs: Dict[MonthKey, bytes] = {}
+        self._built_at: Dict[MonthKey, float] = {}
+        # Bumped by invalidate(); a build only lands if no write happened meanwhile
+        self._generations: Dict[MonthKey, int] = {}
+        self._build_lock: Optional[asyncio.Lock] = None
+        self._build_lock_loop = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.months > 0
+
+    def horizon(self) -> List[MonthKey]:
+        """Months kept as snapshots: the current one and the next ``months - 1``"""
+        first = date.today().replace(day=1)
+        keys = [month_key(first)]
+        while len(keys) < self.months:
+            keys.append((keys[-1][0] + keys[-1][1] // 12, keys[-1][1] % 12 + 1))
+        return keys
+
+    def covers(self, start_date: date, end_date: date) -> bool:
+        horizon = self.horizon()
+        return self.enabled and start_date <= end_date and all(key in horizon for key in months_between(start_date, end_date))
+
+    # ------------------------------------------------------------------
+    # Invalidation
+    # ------------------------------------------------------------------
+    def invalidate(self, start_date: date, end_date: date):
+        """Drop the snapshots of every month overlapping [start_date, end_date]"""
+        for key in months_between(start_date, end_date):
+            self._drop(key)
+
+    def clear(self):
+        for key in list(self._blobs):
+            self._drop(key)
+
+    def _drop(self, key: MonthKey):
+        self._generations[key] = self._generations.get(key, 0) + 1
+        self._blobs.pop(key, None)
+        self._built_at.pop(key, None)
+        if self.directory:
+            try:
+                self._path(key).unlink(missing_ok=True)
+            except OSError as e:
+                logger.warning('Could not remove availability snapshot %s: %s', self._path(key), e)
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+    async def room_matrix(self, room_ids: List[str], start_date: date, end_date: date) -> Optional[np.ndarray]:
+        """rooms x days availability for [start_date, end_date], or None if the snapshots cannot answer"""
+        if not self.covers(start_date, end_date):
+            availability_snapshot_requests_total.inc(result='fallback')
+            return None
+
+        parts = []
+        for snapshot in [await self.month(key) for key in months_between(start_date, end_date)]:
+            index = {room_id: i for i, room_id in enumerate(snapshot.room_ids)}
+            if any(room_id not in index for room_id in room_ids):
+                availability_snapshot_requests_total.inc(result='fallback')
+                return None
+            days = self._day_slice(snapshot.key, start_date, end_date)
+            parts.append(snapshot.rooms[[index[room_id] for room_id in room_ids], days])
+
+        availability_snapshot_requests_total.inc(result='hit')
+        return np.concatenate(parts, axis=1)
+
+    async def fullday_capacity(self, start_date: date, end_date: date) -> Optional[List[Tuple[str, int, bool]]]:
+        """Same shape as AvailabilityService.get_fullday_capacity, or None if the snapshots cannot answer"""
+        if not self.covers(start_date, end_date):
+            availability_snapshot_requests_total.inc(result='fallback')
+            return None
+
+        capacity = []
+        for snapshot in [await self.month(key) for key in months_between(start_date, end_date)]:
+            days = self._day_slice(snapshot.key, start_date, end_date)
+            first, _ = month_bounds(snapshot.key)
+            for offset, remaining, closed in zip(
+                range(days.start, days.stop), snapshot.fullday_remaining[days], snapshot.fullday_closed[days]
+            ):
+                capacity.append(((first + timedelta(days=offset)).isoformat(), int(remaining), bool(closed)))
+
+        availability_snapshot_requests_total.inc(result='hit')
+        return capacity
+
+    @staticmethod
+    def _day_slice(key: MonthKey, start_date: date, end_date: date) -> slice:
+        first, last = month_bounds(key)
+        return slice((max(start_date, first) - first).days, (min(end_date, last) - first).days + 1)
+
+    async def month(self, key: MonthKey) -> MonthSnapshot:
+        """The snapshot for this month, built (or read from disk) if missing or stale"""
+        blob = self._fresh_blob(key)
+        if blob is None:
+            loop = asyncio.get_running_loop()
+            if self._build_lock is None or self._build_lock_loop is not loop:
+                self._build_lock, self._build_lock_loop = asyncio.Lock(), loop
+            async with self._build_lock:
+                blob = self._fresh_blob(key)
+                if blob is None:
+                    blob = await self._load_or_build(key)
+        return decode_snapshot(blob)
+
+    def _fresh_blob(self, key: MonthKey) -> Optional[bytes]:
+        built_at = self._built_at.get(key)
+        if built_at is None or time.time() - built_at > self.max_age_seconds:
+            return None
+        return self._blobs.get(key)
+
+    async def _load_or_build(self, key: MonthKey) -> bytes:
+        generation = self._generations.get(key, 0)
+
+        snapshot = self._read_disk(key)
+        if snapshot is not None:
+            availability_snapshot_builds_total.inc(source='disk')
+            blob = encode_snapshot(snapshot)
+        else:
+            snapshot = await self._build(key)
+            availability_snapshot_builds_total.inc(source='db')
+            blob = encode_snapshot(snapshot)
+            if self._generations.get(key, 0) == generation:
+                self._write_disk(key, blob)
+
+        # A write during the build leaves the month to be rebuilt on the next read
+        if self._generations.get(key, 0) == generation:
+            self._blobs[key] = blob
+            self._built_at[key] = snapshot.built_at
+        return blob
+
+    async def _build(self, key: MonthKey) -> MonthSnapshot:
+        first, last = month_bounds(key)
+        built_at = time.time()
+        await room_catalog.ensure_loaded(get_db())
+        room_ids = [room.id for room in room_catalog.active_rooms()]
+
+        intervals = await AvailabilityService.get_occupied_intervals(first, last)
+        rooms = build_availability_matrix(room_ids, intervals, first, last)
+        capacity = await AvailabilityService.get_fullday_capacity(first, last)
+
+        logger.debug('Availability snapshot %04d-%02d built for %d rooms', key[0], key[1], len(room_ids))
+        return MonthSnapshot(
+            key,
+            tuple(room_ids),
+            rooms,
+            np.array([remaining for _, remaining, _ in capacity], dtype=np.int32),
+            np.array([closed for _, _, closed in capacity], dtype=bool),
+            built_at
+        )
+
+    # ------------------------------------------------------------------
+    # Disk
+    # ------------------------------------------------------------------
+    def _path(self, key: MonthKey) -> Path:
+        return self.directory / f'availability-{key[0]:04d}-{key[1]:02d}.bin'
+
+    def _read_disk(self, key: MonthKey) -> Optional[MonthSnapshot]:
+        if not self.directory:
+            return None
+        try:
+            snapshot = decode_snapshot(self._path(key).read_bytes())
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning('Ignoring unreadable availability snapshot %s: %s', self._path(key), e)
+            return None
+        if snapshot.key != key or time.time() - snapshot.built_at > self.max_age_seconds:
+            return None
+        return snapshot
+
+    def _write_disk(self, key: MonthKey, blob: bytes):
+        if not self.directory:
+            return
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            tmp = self._path(key).with_suffix('.tmp')
+            tmp.write_bytes(blob)
+            os.replace(tmp, self._path(key))
+        except OSError as e:
+            logger.warning('Could not write availability snapshot %s: %s', self._path(key), e)
+
+
+month_snapshots = MonthSnapshotStore(
+    settings.AVAILABILITY_SNAPSHOT_MONTHS,
+    settings.AVAILABILITY_SNAPSHOT_MAX_AGE_SECONDS,
+    settings.AVAILABILITY_SNAPSHOT_DIR
+)
@@ -0,0 +1,218 @@
+from typing import Dict, List, Optional, Tuple
+from datetime import date, datetime
+from config import settings
+from database import fetch_all
+import asyncio
+import bisect
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = ('confirmed', 'pending')
+
+
+def to_date(value) -> Optional[date]:
+    """Parse a Supabase date/datetime value into a date"""
+    if value is None or isinstance(value, date) and not isinstance(value, datetime):
+        return value
+    if isinstance(value, datetime):
+        return value.date()
+    return datetime.fromisoformat(value).date()
+
+
+def merge_intervals(intervals: List[Tuple[date, date]]) -> Tuple[List[date], List[date]]:
+    """Sort and merge half-open [start, end) intervals.
+
+    Only strictly overlapping intervals are merged: back-to-back stays
+    (checkout day == next check-in day) stay separate so a same-day
+    turnover query keeps answering exactly like the row-by-row check did.
+    The resulting starts and ends are both sorted.
+    """
+    starts: List[date] = []
+    ends: List[date] = []
+    for start, end in sorted(intervals):
+        if starts and start < ends[-1]:
+            if end > ends[-1]:
+                ends[-1] = end
+        else:
+            starts.append(start)
+            ends.append(end)
+    return starts, ends
+
+
+def intervals_overlap(starts: List[date], ends: List[date], check_in: date, check_out: date) -> bool:
+    """True if [check_in, check_out) overlaps any merged interval, in O(log n)"""
+    # Last interval starting before check_out; ends are sorted, so it has the max end
+    i = bisect.bisect_left(starts, check_out) - 1
+    return i >= 0 and ends[i] > check_in
+
+
+class OccupancyIndex:
+    """Per-room occupancy of pending/confirmed stays.
+
+    Stays are stored as [check_in, check_out), which reproduces the overlap
+    rules of the original per-row check. Availability blocks live in the
+    block snapshot (services.block_snapshot).
+
+    The index is loaded lazily with one paged query and then kept current
+    by the write paths; ``OCCUPANCY_INDEX_TTL_SECONDS`` bounds how long
+    changes made outside this process (other workers, Supabase dashboard)
+    can go unnoticed.
+    """
+
+    def __init__(self, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._load_lock: Optional[asyncio.Lock] = None
+        self._load_lock_loop = None
+        # reservation_id -> (room_ids, check_in, check_out)
+        self._reservations: Dict[str, Tuple[Tuple[str, ...], date, date]] = {}
+        # room_id -> {reservation_id: (start, end)}
+        self._sources: Dict[str, Dict[str, Tuple[date, date]]] = {}
+        # room_id -> (starts, ends); replaced wholesale, never mutated in place
+        self._merged: Dict[str, Tuple[List[date], List[date]]] = {}
+        self._loaded_at: Optional[float] = None
+        self._loading = False
+        self._pending: List[Tuple] = []
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+    def is_stale(self) -> bool:
+        if self._loaded_at is None:
+            return True
+        return (time.monotonic() - self._loaded_at) > self.ttl_seconds
+
+    def invalidate(self):
+        """Force a reload on the next query"""
+        self._loaded_at = None
+
+    async def ensure_loaded(self, db):
+        if not self.is_stale():
+            return
+        loop = asyncio.get_running_loop()
+        if self._load_lock is None or self._load_lock_loop is not loop:
+            self._load_lock, self._load_lock_loop = asyncio.Lock(), loop
+        async with self._load_lock:
+            if not self.is_stale():
+                return
+            await self.load(db)
+
+    async def load(self, db):
+        """Rebuild the index from Supabase"""
+        self._loading = True
+        try:
+            stay_rows = await fetch_all(
+                lambda: db.table('reservation_rooms').select(
+                    'reservation_id, room_id, reservations!inner(check_in_date, check_out_date, status)'
+                ).in_('reservations.status', list(ACTIVE_STATUSES)).order('id')
+            )
+            self.replace(stay_rows)
+        finally:
+            self._loading = False
+
+        logger.info('Occupancy index loaded: %d stays', len(self._reservations))
+
+    def replace(self, stay_rows: List[dict]):
+        """Swap in a full snapshot built from raw Supabase rows"""
+        rooms_by_reservation: Dict[str, List[str]] = {}
+        dates_by_reservation: Dict[str, Tuple[date, date]] = {}
+        for rr in stay_rows:
+            res = rr['reservations']
+            if res['status'] not in ACTIVE_STATUSES:
+                continue
+            check_in = to_date(res['check_in_date'])
+            check_out = to_date(res['check_out_date']) or check_in
+            rooms_by_reservation.setdefault(rr['reservation_id'], []).append(rr['room_id'])
+            dates_by_reservation[rr['reservation_id']] = (check_in, check_out)
+
+        reservations = {
+            res_id: (tuple(room_ids),) + dates_by_reservation[res_id]
+            for res_id, room_ids in rooms_by_reservation.items()
+        }
+
+        sources: Dict[str, Dict[str, Tuple[date, date]]] = {}
+        for res_id, (room_ids, check_in, check_out) in reservations.items():
+            for room_id in room_ids:
+                sources.setdefault(room_id, {})[res_id] = (check_in, check_out)
+
+        with self._lock:
+            self._reservations = reservations
+            self._sources = sources
+            self._merged = {
+                room_id: merge_intervals(list(intervals.values()))
+                for room_id, intervals in sources.items()
+            }
+            self._loaded_at = time.monotonic()
+            pending, self._pending = self._pending, []
+
+        # Replay writes that landed while the snapshot was being downloaded
+        for method, args in pending:
+            method(*args)
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+    def is_available(self, room_id: str, check_in: date, check_out: date) -> bool:
+        """False if an active stay in this room overlaps [check_in, check_out)"""
+        intervals = self._merged.get(room_id)
+        return not (intervals and intervals_overlap(intervals[0], intervals[1], check_in, check_out))
+
+    # ------------------------------------------------------------------
+    # Write-path updates
+    # ------------------------------------------------------------------
+    def upsert_reservation(self, reservation_id: str, room_ids: List[str], check_in, check_out, status: str):
+        """Record the current state of a reservation (removes it if no longer active)"""
+        if status not in ACTIVE_STATUSES or not room_ids:
+            self.remove_reservation(reservation_id)
+            return
+        check_in = to_date(check_in)
+        check_out = to_date(check_out) or check_in
+        self._apply(self._upsert_reservation, (reservation_id, tuple(room_ids), check_in, check_out))
+
+    def remove_reservation(self, reservation_id: str):
+        self._apply(self._remove_reservation, (reservation_id,))
+
+    def _apply(self, method, args):
+        if self._loading:
+            self._pending.append((method, args))
+        if self._loaded_at is not None:
+            method(*args)
+
+    def _upsert_reservation(self, reservation_id, room_ids, check_in, check_out):
+        with self._lock:
+            self._drop(reservation_id, self._reservations.get(reservation_id, ((),))[0])
+            self._reservations[reservation_id] = (room_ids, check_in, check_out)
+            for room_id in room_ids:
+                self._sources.setdefault(room_id, {})[reservation_id] = (check_in, check_out)
+            self._rebuild(room_ids)
+
+    def _remove_reservation(self, reservation_id):
+        with self._lock:
+            previous = self._reservations.pop(reservation_id, None)
+            if previous:
+                self._drop(reservation_id, previous[0])
+
+    # ------------------------------------------------------------------
+    # Interval maintenance (callers hold self._lock)
+    # ------------------------------------------------------------------
+    def _drop(self, key, rooms):
+        for room_id in rooms:
+            self._sources.get(room_id, {}).pop(key, None)
+        self._rebuild(rooms)
+
+    def _rebuild(self, rooms):
+        merged = dict(self._merged)
+        for room_id in rooms:
+            sources = self._sources.get(room_id)
+            if sources:
+                merged[room_id] = merge_intervals(list(sources.values()))
+            else:
+                self._sources.pop(room_id, None)
+                merged.pop(room_id, None)
+        self._merged = merged
+
+
+occupancy_index = OccupancyIndex(settings.OCCUPANCY_INDEX_TTL_SECONDS)
@@ -0,0 +1,49 @@
+from typing import Optional, Tuple
+from datetime import datetime
+import base64
+import json
+import uuid
+
+
+def encode_cursor(created_at: str, row_id: str) -> str:
+    """Opaque cursor pointing just after the row with this (created_at, id)"""
+    raw = json.dumps([created_at, row_id], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """Inverse of encode_cursor; raises ValueError on anything malformed.
+
+    Both values end up inside a PostgREST filter string, so they are parsed
+    and returned re-serialised (ISO timestamp, canonical UUID) rather than
+    as the client sent them.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at).isoformat(), str(uuid.UUID(row_id))
+    except Exception:
+        raise ValueError('Invalid cursor')
+
+
+def apply_keyset(query, cursor: Optional[str], limit: int):
+    """Order newest first by (created_at, id) and resume after cursor.
+
+    One extra row is requested so the caller can tell whether another page
+    exists; pass the result rows to next_cursor() to trim it.
+    """
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.or_(
+            f'created_at.lt."{created_at}",'
+            f'and(created_at.eq."{created_at}",id.lt."{row_id}")'
+        )
+    return query.order('created_at', desc=True).order('id', desc=True).limit(limit + 1)
+
+
+def next_cursor(rows: list, limit: int) -> Tuple[list, Optional[str]]:
+    """Trim the look-ahead row and build the cursor for the following page"""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1]['created_at'], rows[-1]['id'])
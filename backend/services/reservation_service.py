@@ -1,120 +1,119 @@
-from typing import List, Optional
+from typing import Optional
 from datetime import date, datetime
 from models import (
-    ReservationCreate, Reservation, ReservationResponse,
+    ReservationCreate, Reservation, ReservationResponse, ReservationPage,
     ReservationType, ReservationStatus, Client, Room
 )
-from database import get_db
+from database import get_db, get_admin_db
+from postgrest.exceptions import APIError
 from config import settings
+from services.occupancy_index import occupancy_index
+from services.room_catalog import room_catalog
+from services.block_snapshot import block_store
+from metrics import (
+    availability_checks_total, reservations_created_total,
+    reservations_rejected_total, fullday_capacity_rejections_total
+)
+from services.data_version import availability_version
+from services.availability_events import availability_events
+from services.email_outbox import email_outbox
+from services.email_service import booking_confirmation_email
+from services.pagination import apply_keyset, next_cursor
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Substring of a rejection message -> reason label in reservations_rejected_total
+REJECTION_REASONS = (
+    ('Full day capacity exceeded', 'fullday_capacity'),
+    ('Room not available', 'room_unavailable'),
+    ('Room not found', 'room_not_found'),
+    ('ya está registrado con otro nombre', 'client_name_mismatch'),
+)
+
+
+def record_rejection(reservation_type: str, message: str, source: str = 'api', reason: Optional[str] = None):
+    """Count a rejected booking attempt, classified by its error message"""
+    reason = reason or next((label for text, label in REJECTION_REASONS if text in message), 'error')
+    reservations_rejected_total.inc(type=reservation_type, reason=reason, source=source)
+    if reason == 'fullday_capacity':
+        fullday_capacity_rejections_total.inc()
+
+
 class ReservationService:
     @staticmethod
     async def create_reservation(reservation_data: ReservationCreate) -> ReservationResponse:
         """Create a new reservation"""
-        db = get_db()
+        # create_reservation_atomic is only executable by the service role
+        admin_db = get_admin_db()
         
-        if not db:
+        if not admin_db:
             raise Exception('Database not configured')
         
         try:
-            # 1. Check availability
-            if reservation_data.reservation_type == ReservationType.FULLDAY:
-                available = await ReservationService.check_fullday_availability(
-                    reservation_data.check_in_date,
-                    reservation_data.num_guests
+            # Availability check, client upsert, pricing and inserts run in a
+            # single transaction that locks the rooms (or the Full Day date),
+            # so two concurrent bookings cannot both pass the check
+            try:
+                result = await admin_db.rpc('create_reservation_atomic', {
+                    'p_client_name': reservation_data.client_name,
+                    'p_client_document': reservation_data.client_document,
+                    'p_client_email': reservation_data.client_email,
+                    'p_client_phone': reservation_data.client_phone,
+                    'p_reservation_type': reservation_data.reservation_type.value,
+                    'p_check_in_date': reservation_data.check_in_date.isoformat(),
+                    'p_check_out_date': reservation_data.check_out_date.isoformat() if reservation_data.check_out_date else None,
+                    'p_num_guests': reservation_data.num_guests,
+                    'p_room_ids': reservation_data.room_ids or [],
+                    'p_notes': reservation_data.notes
+                }).execute()
+            except APIError as e:
+                # RAISE EXCEPTION messages are the user-facing errors
+                raise Exception(e.message)
+            
+            reservation = ReservationResponse(**result.data)
+            if reservation_data.reservation_type == ReservationType.HOSPEDAJE:
+                # The RPC priced the stay from the locked room rows; if the
+                # catalog (as already loaded, never fetched here) disagrees,
+                # its prices are stale
+                expected_price = room_catalog.total_price(
+                    list(dict.fromkeys(reservation_data.room_ids)),
+                    (reservation_data.check_out_date - reservation_data.check_in_date).days
                 )
-                if not available:
-                    raise Exception('Full day capacity exceeded for this date')
-            else:
-                for room_id in reservation_data.room_ids:
-                    available = await ReservationService.check_room_availability(
-                        room_id,
-                        reservation_data.check_in_date,
-                        reservation_data.check_out_date
-                    )
-                    if not available:
-                        raise Exception(f'Room not available for selected dates')
-            
-            # 2. Get or create client
-            client_data = {
-                'full_name': reservation_data.client_name,
-                'id_document': reservation_data.client_document,
-                'email': reservation_data.client_email,
-                'phone': reservation_data.client_phone
-            }
-            
-            # Check if client exists with this document
-            existing_client = db.table('clients').select('*').eq('id_document', reservation_data.client_document).execute()
-            
-            if existing_client.data:
-                existing = existing_client.data[0]
-                # Normalize names for comparison (lowercase, strip extra spaces)
-                existing_name = ' '.join(existing['full_name'].lower().split())
-                new_name = ' '.join(reservation_data.client_name.lower().split())
-                
-                # If document exists but name is different, reject
-                if existing_name != new_name:
-                    raise Exception(f'El documento {reservation_data.client_document} ya está registrado con otro nombre ({existing["full_name"]}). Si eres el mismo cliente, usa el nombre registrado.')
-                
-                client_id = existing['id']
-                # Update client info (email and phone can be updated)
-                db.table('clients').update({
-                    'email': reservation_data.client_email,
-                    'phone': reservation_data.client_phone
-                }).eq('id', client_id).execute()
-            else:
-                # Create new client
-                new_client = db.table('clients').insert(client_data).execute()
-                client_id = new_client.data[0]['id']
+                if expected_price is not None and abs(reservation.total_price - expected_price) >= 0.005:
+                    logger.info("Room prices changed since the catalog was loaded; reloading it")
+                    room_catalog.invalidate()
+            availability_version.bump()
+            availability_events.publish_reservation(
+                reservation.reservation_type.value, reservation_data.room_ids,
+                (reservation_data.check_in_date, reservation_data.check_out_date)
+            )
+            reservations_created_total.inc(type=reservation.reservation_type.value, source='api')
             
-            # 3. Calculate total price
-            total_price = 0
-            if reservation_data.reservation_type == ReservationType.FULLDAY:
-                total_price = reservation_data.num_guests * settings.FULLDAY_PRICE
-            else:
-                # Get room prices
-                rooms_response = db.table('rooms').select('price_per_night').in_('id', reservation_data.room_ids).execute()
-                room_prices = sum(room['price_per_night'] for room in rooms_response.data)
-                
-                # Calculate nights
-                nights = (reservation_data.check_out_date - reservation_data.check_in_date).days
-                total_price = room_prices * nights
-            
-            # 4. Create reservation
-            reservation_insert = {
-                'client_id': client_id,
-                'reservation_type': reservation_data.reservation_type.value,
-                'check_in_date': reservation_data.check_in_date.isoformat(),
-                'check_out_date': reservation_data.check_out_date.isoformat() if reservation_data.check_out_date else None,
-                'num_guests': reservation_data.num_guests,
-                'total_price': total_price,
-                'status': ReservationStatus.PENDING.value,
-                'notes': reservation_data.notes,
-                'whatsapp_confirmation_sent': False,
-                'email_confirmation_sent': False
-            }
-            
-            new_reservation = db.table('reservations').insert(reservation_insert).execute()
-            reservation_id = new_reservation.data[0]['id']
-            
-            # 5. Link rooms for hospedaje
             if reservation_data.reservation_type == ReservationType.HOSPEDAJE:
-                room_links = [
-                    {'reservation_id': reservation_id, 'room_id': room_id}
-                    for room_id in reservation_data.room_ids
-                ]
-                db.table('reservation_rooms').insert(room_links).execute()
+                occupancy_index.upsert_reservation(
+                    reservation.id,
+                    reservation_data.room_ids,
+                    reservation_data.check_in_date,
+                    reservation_data.check_out_date,
+                    ReservationStatus.PENDING.value
+                )
             
-            # 6. Get complete reservation data
-            reservation = await ReservationService.get_reservation(reservation_id)
+            if reservation.client_email and email_outbox.enabled:
+                # The booking stands even if the confirmation cannot be queued
+                try:
+                    subject, body = booking_confirmation_email(reservation)
+                    await email_outbox.enqueue(
+                        'booking_confirmation', reservation.client_email, subject, body, reservation.id
+                    )
+                except Exception as e:
+                    logger.warning('Could not queue confirmation email for %s: %s', reservation.id, e)
             
             return reservation
             
         except Exception as e:
-            logger.error(f'Error creating reservation: {str(e)}')
+            logger.error('Error creating reservation: %s', e)
+            record_rejection(reservation_data.reservation_type.value, str(e))
             raise
     
     @staticmethod
@@ -123,7 +122,7 @@ class ReservationService:
         db = get_db()
         
         # Get reservation with client data
-        reservation = db.table('reservations').select(
+        reservation = await db.table('reservations').select(
             '*, clients(*), reservation_rooms(rooms(*))'
         ).eq('id', reservation_id).single().execute()
         
@@ -150,16 +149,16 @@ class ReservationService:
         )
     
     @staticmethod
-    async def get_reservations(skip: int = 0, limit: int = 100) -> List[ReservationResponse]:
-        """Get all reservations"""
+    async def get_reservations(cursor: Optional[str] = None, limit: int = 100) -> ReservationPage:
+        """Get reservations newest first, one keyset page at a time"""
         db = get_db()
         
-        response = db.table('reservations').select(
-            '*, clients(*), reservation_rooms(rooms(*))'
-        ).order('created_at', desc=True).range(skip, skip + limit - 1).execute()
+        query = db.table('reservations').select('*, clients(*), reservation_rooms(rooms(*))')
+        response = await apply_keyset(query, cursor, limit).execute()
+        rows, following = next_cursor(response.data, limit)
         
         reservations = []
-        for data in response.data:
+        for data in rows:
             room_names = []
             if 'reservation_rooms' in data and data['reservation_rooms']:
                 room_names = [rr['rooms']['name'] for rr in data['reservation_rooms'] if 'rooms' in rr]
@@ -179,15 +178,16 @@ class ReservationService:
                 created_at=datetime.fromisoformat(data['created_at'])
             ))
         
-        return reservations
+        return ReservationPage(items=reservations, next_cursor=following)
     
     @staticmethod
     async def check_fullday_availability(date: date, num_guests: int) -> bool:
         """Check if full day has capacity for num_guests on given date"""
         db = get_db()
+        availability_checks_total.inc(kind='fullday')
         
         # Get current bookings for the date
-        response = db.table('reservations').select('num_guests').eq(
+        response = await db.table('reservations').select('num_guests').eq(
             'reservation_type', 'fullday'
         ).eq('check_in_date', date.isoformat()).in_(
             'status', ['confirmed', 'pending']
@@ -201,58 +201,14 @@ class ReservationService:
     async def check_room_availability(room_id: str, check_in: date, check_out: date) -> bool:
         """Check if room is available for given date range"""
         db = get_db()
+        availability_checks_total.inc(kind='room')
         
-        # First, check for availability blocks
-        blocks_response = db.table('availability_blocks').select('*').execute()
-        
-        for block in blocks_response.data:
-            # Check if block applies to this room (room_id is null = applies to all rooms)
-            if block['room_id'] is not None and block['room_id'] != room_id:
-                continue
-            
-            block_start = datetime.fromisoformat(block['start_date']).date() if isinstance(block['start_date'], str) else block['start_date']
-            block_end = datetime.fromisoformat(block['end_date']).date() if isinstance(block['end_date'], str) else block['end_date']
-            
-            # Check for overlap with block
-            no_overlap = (check_in > block_end) or (check_out <= block_start)
-            
-            if not no_overlap:
-                logger.info(f"❌ Room blocked from {block_start} to {block_end} ({block['block_type']})")
-                return False
-        
-        # Check for overlapping reservations
-        response = db.table('reservation_rooms').select(
-            'reservations!inner(check_in_date, check_out_date, status)'
-        ).eq('room_id', room_id).execute()
-        
-        logger.info(f"Checking availability for room {room_id} from {check_in} to {check_out}")
-        logger.info(f"Found {len(response.data)} reservation records")
-        
-        for rr in response.data:
-            res = rr['reservations']
-            if res['status'] not in ['confirmed', 'pending']:
-                continue
-            
-            res_check_in = datetime.fromisoformat(res['check_in_date']).date()
-            res_check_out = datetime.fromisoformat(res['check_out_date']).date() if res['check_out_date'] else res_check_in
-            
-            logger.info(f"Existing reservation: {res_check_in} to {res_check_out} (status: {res['status']})")
-            logger.info(f"Checking overlap: new range {check_in} to {check_out}")
-            
-            # Check for overlap
-            # No overlap if one of these is true:
-            # 1. New check-in is on or after existing check-out (same day checkout/checkin allowed)
-            # 2. New check-out is on or before existing check-in
-            no_overlap = (check_in >= res_check_out) or (check_out <= res_check_in)
-            
-            logger.info(f"  - check_in >= res_check_out: {check_in} >= {res_check_out} = {check_in >= res_check_out}")
-            logger.info(f"  - check_out <= res_check_in: {check_out} <= {res_check_in} = {check_out <= res_check_in}")
-            logger.info(f"  - No overlap: {no_overlap}")
-            
-            if not no_overlap:
-                logger.info(f"❌ Overlap detected! Room not available.")
-                return False
+        await occupancy_index.ensure_loaded(db)
+        blocks = await block_store.ensure_loaded(db)
+        available = (
+            occupancy_index.is_available(room_id, check_in, check_out)
+            and blocks.is_available(room_id, check_in, check_out)
+        )
         
-        logger.info(f"Room is available!")
-        return True
-
+        logger.debug('Room %s available from %s to %s: %s', room_id, check_in, check_out, available)
+        return available
@@ -0,0 +1,112 @@
+from typing import Dict, List, Optional
+from datetime import datetime
+from models import Room
+from config import settings
+import asyncio
+import hashlib
+import json
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def catalog_etag(rows: List[dict]) -> str:
+    """Strong ETag for a list of raw room rows"""
+    digest = hashlib.sha1(json.dumps(rows, sort_keys=True, default=str).encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+class RoomCatalog:
+    """Process-local copy of the rooms table.
+
+    Rooms are read with one query, parsed into Room models once and served
+    from memory until ``ROOM_CATALOG_TTL_SECONDS`` pass or invalidate() is
+    called. The catalog and every room carry an ETag derived from the raw
+    rows, so it only changes when the data does.
+    """
+
+    def __init__(self, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+        self._load_lock: Optional[asyncio.Lock] = None
+        self._load_lock_loop = None
+        # room_id -> Room, in table order; replaced wholesale on reload
+        self._rooms: Dict[str, Room] = {}
+        self._room_etags: Dict[str, str] = {}
+        self._active_etag: Optional[str] = None
+        self._loaded_at: Optional[float] = None
+
+    def is_stale(self) -> bool:
+        if self._loaded_at is None:
+            return True
+        return (time.monotonic() - self._loaded_at) > self.ttl_seconds
+
+    def invalidate(self):
+        """Force a reload on the next read"""
+        self._loaded_at = None
+
+    async def ensure_loaded(self, db):
+        if not self.is_stale():
+            return
+        loop = asyncio.get_running_loop()
+        if self._load_lock is None or self._load_lock_loop is not loop:
+            self._load_lock, self._load_lock_loop = asyncio.Lock(), loop
+        async with self._load_lock:
+            if not self.is_stale():
+                return
+            await self.load(db)
+
+    async def load(self, db):
+        """Rebuild the catalog from Supabase"""
+        response = await db.table('rooms').select('*').execute()
+        self.replace(response.data)
+        logger.info('Room catalog loaded: %d rooms', len(self._rooms))
+
+    def replace(self, rows: List[dict]):
+        rooms = {}
+        room_etags = {}
+        for data in rows:
+            rooms[data['id']] = Room(
+                id=data['id'],
+                name=data['name'],
+                capacity=data['capacity'],
+                price_per_night=data['price_per_night'],
+                description=data.get('description'),
+                features=data.get('features', []),
+                images=data.get('images', []),
+                is_active=data['is_active'],
+                created_at=datetime.fromisoformat(data['created_at']),
+                updated_at=datetime.fromisoformat(data['updated_at'])
+            )
+            room_etags[data['id']] = catalog_etag([data])
+
+        self._rooms = rooms
+        self._room_etags = room_etags
+        self._active_etag = catalog_etag([row for row in rows if row['is_active']])
+        self._loaded_at = time.monotonic()
+
+    # ------------------------------------------------------------------
+    # Reads (call ensure_loaded first)
+    # ------------------------------------------------------------------
+    def active_rooms(self) -> List[Room]:
+        return [room for room in self._rooms.values() if room.is_active]
+
+    def get(self, room_id: str) -> Optional[Room]:
+        return self._rooms.get(room_id)
+
+    def active_etag(self) -> Optional[str]:
+        """ETag of the active_rooms() listing"""
+        return self._active_etag
+
+    def room_etag(self, room_id: str) -> Optional[str]:
+        return self._room_etags.get(room_id)
+
+    def total_price(self, room_ids: List[str], nights: int) -> Optional[float]:
+        """Price of a stay in these rooms, or None if any room is unknown"""
+        rooms = [self._rooms.get(room_id) for room_id in room_ids]
+        if not all(rooms):
+            return None
+        return sum(room.price_per_night for room in rooms) * nights
+
+
+room_catalog = RoomCatalog(settings.ROOM_CATALOG_TTL_SECONDS)
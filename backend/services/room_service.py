@@ -1,6 +1,7 @@
-from typing import List
+from typing import List, Optional
 from models import Room
 from database import get_db
+from services.room_catalog import room_catalog
 from datetime import datetime
 import logging
 
@@ -41,42 +42,27 @@ class RoomService:
                 )
             ]
         
-        response = db.table('rooms').select('*').eq('is_active', True).execute()
-        
-        rooms = []
-        for data in response.data:
-            rooms.append(Room(
-                id=data['id'],
-                name=data['name'],
-                capacity=data['capacity'],
-                price_per_night=data['price_per_night'],
-                description=data.get('description'),
-                features=data.get('features', []),
-                images=data.get('images', []),
-                is_active=data['is_active'],
-                created_at=datetime.fromisoformat(data['created_at']),
-                updated_at=datetime.fromisoformat(data['updated_at'])
-            ))
-        
-        return rooms
+        await room_catalog.ensure_loaded(db)
+        return room_catalog.active_rooms()
     
     @staticmethod
     async def get_room(room_id: str) -> Room:
         """Get room by ID"""
         db = get_db()
         
-        response = db.table('rooms').select('*').eq('id', room_id).single().execute()
-        data = response.data
+        await room_catalog.ensure_loaded(db)
+        room = room_catalog.get(room_id)
         
-        return Room(
-            id=data['id'],
-            name=data['name'],
-            capacity=data['capacity'],
-            price_per_night=data['price_per_night'],
-            description=data.get('description'),
-            features=data.get('features', []),
-            images=data.get('images', []),
-            is_active=data['is_active'],
-            created_at=datetime.fromisoformat(data['created_at']),
-            updated_at=datetime.fromisoformat(data['updated_at'])
-        )
+        if room is None:
+            raise Exception('Room not found')
+        
+        return room
+    
+    @staticmethod
+    def get_rooms_etag() -> Optional[str]:
+        """ETag of the current get_rooms() result (None with mock data)"""
+        return room_catalog.active_etag()
+    
+    @staticmethod
+    def get_room_etag(room_id: str) -> Optional[str]:
+        return room_catalog.room_etag(room_id)
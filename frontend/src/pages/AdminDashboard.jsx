@@ -88,7 +88,12 @@ export const AdminDashboard = () => {
     }
   };
 
-  const handleLogout = () => {
+  const handleLogout = async () => {
+    try {
+      await adminAPI.logout();
+    } catch (err) {
+      // The session ends locally either way
+    }
     localStorage.removeItem('adminToken');
     localStorage.removeItem('adminEmail');
     navigate('/admin/login');
@@ -74,6 +74,20 @@ export const availabilityAPI = {
       console.error('Error checking fullday availability:', error);
       throw error;
     }
+  },
+
+  // Live availability changes for [startDate, endDate]. onChange receives
+  // (eventName, data): 'availability' carries the new state of each changed
+  // date, 'invalidate' a range to refetch, 'reset' means refetch everything.
+  // The browser reconnects (with Last-Event-ID) on its own; returns a close function.
+  streamAvailability: (startDate, endDate, onChange) => {
+    const source = new EventSource(
+      `${API}/availability/stream?from=${encodeURIComponent(startDate)}&to=${encodeURIComponent(endDate)}`
+    );
+    ['availability', 'invalidate', 'reset'].forEach((name) => {
+      source.addEventListener(name, (event) => onChange(name, JSON.parse(event.data)));
+    });
+    return () => source.close();
   }
 };
 
@@ -89,11 +103,12 @@ export const reservationsAPI = {
     }
   },
 
-  getAll: async (skip = 0, limit = 100) => {
+  // Devuelve { items, next_cursor }; pasar next_cursor para la página siguiente
+  getAll: async (cursor = null, limit = 100) => {
     try {
-      const response = await axios.get(`${API}/reservations/`, {
-        params: { skip, limit }
-      });
+      const params = { limit };
+      if (cursor) params.cursor = cursor;
+      const response = await axios.get(`${API}/reservations/`, { params });
       return response.data;
     } catch (error) {
       console.error('Error fetching reservations:', error);
@@ -129,6 +144,14 @@ export const adminAPI = {
     return response.data;
   },
 
+  logout: async () => {
+    const token = localStorage.getItem('adminToken');
+    const response = await axios.post(`${API}/admin/logout`, {}, {
+      headers: { Authorization: `Bearer ${token}` }
+    });
+    return response.data;
+  },
+
   requestPasswordReset: async () => {
     const response = await axios.post(`${API}/admin/request-password-reset`, {});
     return response.data;
@@ -163,11 +186,18 @@ export const adminAPI = {
     if (month) params.month = month;
     if (year) params.year = year;
     
-    const response = await axios.get(`${API}/admin/reservations`, {
-      headers: { Authorization: `Bearer ${token}` },
-      params
-    });
-    return response.data;
+    // El backend pagina por cursor: seguir X-Next-Cursor hasta la última página
+    const reservations = [];
+    let cursor = null;
+    do {
+      const response = await axios.get(`${API}/admin/reservations`, {
+        headers: { Authorization: `Bearer ${token}` },
+        params: cursor ? { ...params, cursor } : params
+      });
+      reservations.push(...response.data);
+      cursor = response.headers['x-next-cursor'];
+    } while (cursor);
+    return reservations;
   },
 
   updateReservation: async (id, data) => {
@@ -211,6 +241,19 @@ export const adminAPI = {
     return response.data;
   },
 
+  // rows: array of reservation objects, or a CSV string with the same column names
+  importReservations: async (rows) => {
+    const token = localStorage.getItem('adminToken');
+    const isCsv = typeof rows === 'string';
+    const response = await axios.post(`${API}/admin/reservations/bulk`, isCsv ? rows : { reservations: rows }, {
+      headers: {
+        Authorization: `Bearer ${token}`,
+        'Content-Type': isCsv ? 'text/csv' : 'application/json'
+      }
+    });
+    return response.data;
+  },
+
   createBlock: async (data) => {
     const token = localStorage.getItem('adminToken');
     const response = await axios.post(`${API}/admin/blocks`, data, {
@@ -0,0 +1,183 @@
+"""Offline benchmarks of the API hot paths against a seeded FakeSupabase.
+
+    python -m tests.benchmark                      # 50 rooms, 100k reservations, 1k blocks
+    python -m tests.benchmark --latency 0.005      # simulate a 5 ms PostgREST round trip
+    python -m tests.benchmark --output bench.json  # save results to compare across commits
+
+Each scenario starts with the process caches (occupancy index, block
+snapshot, room catalog) dropped, so the first sample is reported as
+``cold_ms`` and the rest as warm latency statistics. ``db_calls`` is the
+number of PostgREST round trips per warm request.
+"""
+from datetime import date, datetime, timedelta, timezone
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+from tests.harness import install, app_client, admin_headers
+from tests.fake_supabase import FakeSupabase
+from tests.seed import seed_database
+
+RANGE_START = date(2026, 6, 1)
+RANGE_END = date(2026, 8, 31)
+
+
+def _scenarios(rooms):
+    room_id = rooms[0]['id']
+    window = {'start_date': RANGE_START.isoformat(), 'end_date': RANGE_END.isoformat()}
+
+    def create_reservation(client, headers, i):
+        check_in = date(2030, 1, 1) + timedelta(days=3 * (i // len(rooms)))
+        return client.post('/api/reservations/', json={
+            'client_name': f'Bench {i}', 'client_document': f'B{i}', 'client_phone': '04140000000',
+            'reservation_type': 'hospedaje', 'check_in_date': check_in.isoformat(),
+            'check_out_date': (check_in + timedelta(days=2)).isoformat(), 'num_guests': 2,
+            'room_ids': [rooms[i % len(rooms)]['id']],
+        })
+
+    # Inside the months kept as snapshots (current + next two)
+    upcoming = {'start_date': date.today().isoformat(), 'end_date': (date.today() + timedelta(days=55)).isoformat()}
+
+    return {
+        'availability_rooms_upcoming': lambda client, headers, i: client.get('/api/availability/rooms', params=upcoming),
+        'availability_fullday_upcoming': lambda client, headers, i: client.get(
+            '/api/availability/fullday', params={**upcoming, 'num_guests': 4}
+        ),
+        'availability_rooms_range': lambda client, headers, i: client.get('/api/availability/rooms', params=window),
+        'availability_rooms_range_rle': lambda client, headers, i: client.get(
+            '/api/availability/rooms', params={**window, 'format': 'rle'}
+        ),
+        'availability_room_calendar': lambda client, headers, i: client.get(
+            f'/api/availability/rooms/{room_id}', params=window
+        ),
+        'availability_fullday': lambda client, headers, i: client.get(
+            '/api/availability/fullday', params={**window, 'num_guests': 4}
+        ),
+        'create_reservation': create_reservation,
+        'admin_stats': lambda client, headers, i: client.get('/api/admin/stats', headers=headers),
+        'admin_stats_month': lambda client, headers, i: client.get(
+            '/api/admin/stats', headers=headers, params={'month': 7, 'year': 2026}
+        ),
+        'admin_reservations': lambda client, headers, i: client.get(
+            '/api/admin/reservations', headers=headers, params={'limit': 200}
+        ),
+        'admin_reservations_month': lambda client, headers, i: client.get(
+            '/api/admin/reservations', headers=headers, params={'month': 7, 'year': 2026, 'limit': 200}
+        ),
+    }
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(int(round(fraction * (len(ordered) - 1))), len(ordered) - 1)]
+
+
+def run_benchmarks(rooms=50, reservations=100_000, blocks=1_000, latency=0.0, repeat=10, only=None, seed=1):
+    """Seed a fake DB, run every scenario ``repeat`` times and return the results dict"""
+    fake = FakeSupabase()
+    started = time.perf_counter()
+    room_rows = seed_database(fake, rooms=rooms, reservations=reservations, blocks=blocks, seed=seed)
+    seed_seconds = time.perf_counter() - started
+    fake.latency = latency
+
+    install(fake)
+    client = app_client()
+    headers = admin_headers()
+
+    results = {}
+    for name, scenario in _scenarios(room_rows).items():
+        if only and name not in only:
+            continue
+        install(fake)
+        timings, calls = [], []
+        by_table = {}
+        for i in range(repeat + 1):
+            before = dict(fake.calls_by_table)
+            calls_before = fake.calls
+            t0 = time.perf_counter()
+            response = scenario(client, headers, i)
+            elapsed = time.perf_counter() - t0
+            if response.status_code >= 400:
+                raise RuntimeError(f'{name}: HTTP {response.status_code}: {response.text[:200]}')
+            timings.append(elapsed * 1000)
+            calls.append(fake.calls - calls_before)
+            by_table = {
+                table: count - before.get(table, 0)
+                for table, count in fake.calls_by_table.items()
+                if count != before.get(table, 0)
+            }
+
+        warm = timings[1:] or timings
+        results[name] = {
+            'samples': len(warm),
+            'cold_ms': round(timings[0], 2),
+            'cold_db_calls': calls[0],
+            'min_ms': round(min(warm), 2),
+            'median_ms': round(statistics.median(warm), 2),
+            'p95_ms': round(_percentile(warm, 0.95), 2),
+            'mean_ms': round(statistics.fmean(warm), 2),
+            'db_calls': round(statistics.fmean(calls[1:] or calls), 2),
+            'db_calls_by_table': by_table,
+        }
+
+    return {
+        'meta': {
+            'commit': _git_commit(),
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'rooms': rooms,
+            'reservations': reservations,
+            'blocks': blocks,
+            'latency_ms': latency * 1000,
+            'repeat': repeat,
+            'seed_seconds': round(seed_seconds, 2),
+        },
+        'results': results,
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _print_table(report):
+    meta = report['meta']
+    print(
+        f"commit {meta['commit']}  rooms={meta['rooms']} reservations={meta['reservations']} "
+        f"blocks={meta['blocks']} latency={meta['latency_ms']:g}ms repeat={meta['repeat']}"
+    )
+    print(f"{'scenario':32} {'cold':>9} {'median':>9} {'p95':>9} {'db calls':>9}")
+    for name, r in report['results'].items():
+        print(f"{name:32} {r['cold_ms']:>8.1f}ms {r['median_ms']:>7.1f}ms {r['p95_ms']:>7.1f}ms {r['db_calls']:>9g}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rooms', type=int, default=50)
+    parser.add_argument('--reservations', type=int, default=100_000)
+    parser.add_argument('--blocks', type=int, default=1_000)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every fake DB call')
+    parser.add_argument('--repeat', type=int, default=10, help='warm samples per scenario')
+    parser.add_argument('--only', nargs='*', help='scenario names to run')
+    parser.add_argument('--output', help='write the results as JSON to this path')
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(args.rooms, args.reservations, args.blocks, args.latency, args.repeat, args.only)
+    _print_table(report)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f'Results written to {args.output}', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
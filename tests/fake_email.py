@@ -0,0 +1,20 @@
+"""Email transport for tests: records messages instead of calling Resend"""
+import threading
+
+
+class FakeTransport:
+    """``send`` appends to ``sent``; the first ``fail_times`` calls raise ``error`` instead"""
+
+    def __init__(self, fail_times=0, error='Resend unavailable'):
+        self.sent = []
+        self.attempts = 0
+        self.fail_times = fail_times
+        self.error = error
+        self._lock = threading.Lock()
+
+    def send(self, recipient, subject, body):
+        with self._lock:
+            self.attempts += 1
+            if self.attempts <= self.fail_times:
+                raise ConnectionError(self.error)
+            self.sent.append({'recipient': recipient, 'subject': subject, 'html': body})
@@ -0,0 +1,802 @@
+"""In-memory stand-in for the synchronous supabase ``Client``.
+
+Implements the subset of the postgrest query builder used by ``backend/``:
+``table().select().eq().in_().range().order().single().execute()`` and
+friends, embedded resources (``clients(*)``, ``reservation_rooms(rooms(*))``,
+``reservations!inner(...)``), inserts/updates/upserts/deletes and ``rpc()``
+calls backed by Python implementations of the SQL functions, plus the row
+trigger that keeps ``reservation_daily_stats`` in step with ``reservations``.
+
+Every ``execute()`` is counted in ``FakeSupabase.calls`` and can sleep for
+``latency`` seconds to simulate a network round trip.
+"""
+from datetime import date, datetime, timezone
+import copy
+import re
+import threading
+import time
+import uuid
+
+from postgrest.exceptions import APIError as PostgrestAPIError
+
+# child table -> {embedded name: (parent table, fk column on child)}
+MANY_TO_ONE = {
+    'reservations': {'clients': ('clients', 'client_id')},
+    'reservation_rooms': {
+        'reservations': ('reservations', 'reservation_id'),
+        'rooms': ('rooms', 'room_id'),
+    },
+    'availability_blocks': {'rooms': ('rooms', 'room_id')},
+}
+# parent table -> {embedded name: (child table, fk column on child)}
+ONE_TO_MANY = {
+    'reservations': {'reservation_rooms': ('reservation_rooms', 'reservation_id')},
+    'rooms': {'reservation_rooms': ('reservation_rooms', 'room_id')},
+}
+UNIQUE_KEYS = {
+    'clients': ('id_document',),
+    'reservation_rooms': ('reservation_id', 'room_id'),
+    'admin_users': ('email',),
+}
+
+
+class APIError(PostgrestAPIError):
+    """postgrest's APIError built from a message, as PostgREST would report it"""
+
+    def __init__(self, message, code=None):
+        super().__init__({'message': message, 'code': code})
+
+
+class Response:
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _coerce(value):
+    """Normalise values so dates, timestamps and numbers compare sensibly"""
+    if isinstance(value, bool) or value is None:
+        return value
+    if isinstance(value, (int, float)):
+        return value
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, str):
+        if value in ('true', 'false'):
+            return value == 'true'
+        try:
+            return float(value) if re.fullmatch(r'-?\d+(\.\d+)?', value) else value
+        except ValueError:
+            return value
+    return value
+
+
+def _cmp_value(a, b):
+    """Make a and b comparable (numbers vs numeric strings, timestamps vs timestamps)"""
+    a, b = _coerce(a), _coerce(b)
+    if isinstance(a, str) and isinstance(b, str) and 'T' in a and 'T' in b:
+        try:
+            return datetime.fromisoformat(a), datetime.fromisoformat(b)
+        except ValueError:
+            pass
+    return a, b
+
+
+def _split_top(text, sep=','):
+    parts, depth, cur = [], 0, ''
+    for ch in text:
+        if ch == '(':
+            depth += 1
+        elif ch == ')':
+            depth -= 1
+        if ch == sep and depth == 0:
+            parts.append(cur.strip())
+            cur = ''
+        else:
+            cur += ch
+    if cur.strip():
+        parts.append(cur.strip())
+    return parts
+
+
+def parse_columns(columns):
+    """'*, clients(*), reservations!inner(a, b)' -> [('*', None, False), ('clients', [...], False), ...]"""
+    spec = []
+    for part in _split_top(columns):
+        match = re.fullmatch(r'([\w*]+)(!inner)?\s*(?:\((.*)\))?', part, re.S)
+        if not match:
+            raise APIError(f'Unsupported select: {part}')
+        name, inner, nested = match.groups()
+        spec.append((name, parse_columns(nested) if nested is not None else None, bool(inner)))
+    return spec
+
+
+class FakeSupabase:
+    """Thread-safe in-memory database exposing the supabase Client surface used by the app"""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.tables = {name: [] for name in (
+            'rooms', 'clients', 'reservations', 'reservation_rooms',
+            'admin_users', 'availability_blocks'
+        )}
+        self.rpcs = dict(BUILTIN_RPCS)
+        self.triggers = dict(BUILTIN_TRIGGERS)
+        # reservation_daily_stats, keyed like its primary key and kept in
+        # step with reservations by the trigger in BUILTIN_TRIGGERS
+        self.daily_stats = {}
+        self.calls = 0
+        self.calls_by_table = {}
+        self.lock = threading.RLock()
+        # Bumped on every write; keys the lookup and result caches below
+        self.version = 0
+        self._cache = {}
+
+    # -- supabase Client surface -------------------------------------------
+    def table(self, name):
+        self.tables.setdefault(name, [])
+        return Query(self, name)
+
+    def from_(self, name):
+        return self.table(name)
+
+    def rpc(self, fn, params=None):
+        return RpcCall(self, fn, params or {})
+
+    # -- helpers -------------------------------------------------------------
+    def register_rpc(self, name, fn):
+        self.rpcs[name] = fn
+
+    def insert_rows(self, table, rows):
+        """Seed rows directly, bypassing call counting"""
+        out = []
+        with self.lock:
+            for row in rows:
+                row = dict(row)
+                row.setdefault('id', str(uuid.uuid4()))
+                row.setdefault('created_at', _now())
+                if table not in ('reservation_rooms', 'availability_blocks'):
+                    row.setdefault('updated_at', row['created_at'])
+                self.tables[table].append(row)
+                self.fire(table, None, row)
+                out.append(row)
+            self.changed()
+        return out
+
+    def fire(self, table, old, new):
+        """Run the AFTER row trigger of table, if any (old is None on insert, new on delete)"""
+        trigger = self.triggers.get(table)
+        if trigger:
+            trigger(self, old, new)
+
+    def changed(self):
+        """Drop cached lookups and results after a write"""
+        self.version += 1
+        self._cache.clear()
+
+    def cached(self, key, build):
+        """Memoise build() until the next write (callers hold self.lock)"""
+        if key not in self._cache:
+            self._cache[key] = build()
+        return self._cache[key]
+
+    def reset_counters(self):
+        self.calls = 0
+        self.calls_by_table = {}
+
+    def _round_trip(self, name):
+        self.calls += 1
+        self.calls_by_table[name] = self.calls_by_table.get(name, 0) + 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    # -- embedding -------------------------------------------------------------
+    def _project(self, table, row, spec):
+        out = {}
+        for name, nested, _inner in spec:
+            if name == '*':
+                out.update(row)
+            elif nested is None:
+                out[name] = row.get(name)
+            elif name in MANY_TO_ONE.get(table, {}):
+                parent, fk = MANY_TO_ONE[table][name]
+                target = self._by_id(parent).get(row.get(fk))
+                out[name] = self._project(parent, target, nested) if target else None
+            elif name in ONE_TO_MANY.get(table, {}):
+                child, fk = ONE_TO_MANY[table][name]
+                out[name] = [self._project(child, r, nested) for r in self._children(child, fk).get(row['id'], [])]
+            else:
+                raise APIError(f'No relationship between {table} and {name}')
+        return out
+
+    def _by_id(self, table):
+        return self.cached(('by_id', table), lambda: {r['id']: r for r in self.tables[table]})
+
+    def _children(self, table, fk):
+        def build():
+            groups = {}
+            for r in self.tables[table]:
+                groups.setdefault(r.get(fk), []).append(r)
+            return groups
+        return self.cached(('children', table, fk), build)
+
+
+def _get_path(row, path):
+    value = row
+    for key in path.split('.'):
+        if isinstance(value, list):
+            return [v.get(key) if v else None for v in value]
+        value = value.get(key) if value else None
+    return value
+
+
+def _match(op, actual, expected):
+    if isinstance(actual, list):
+        return any(_match(op, a, expected) for a in actual)
+    if op == 'is':
+        return actual is None if expected in (None, 'null') else actual == expected
+    if op == 'in':
+        return any(_match('eq', actual, e) for e in expected)
+    if actual is None:
+        return op == 'neq' and expected is not None
+    a, b = _cmp_value(actual, expected)
+    if type(a) is not type(b) and not (isinstance(a, (int, float)) and isinstance(b, (int, float))):
+        a, b = str(a), str(b)
+    return {
+        'eq': a == b, 'neq': a != b, 'gt': a > b, 'gte': a >= b, 'lt': a < b, 'lte': a <= b,
+    }[op]
+
+
+def _parse_or(expr):
+    """'a.eq.1,and(b.lt.2,c.eq.3)' -> predicate tree"""
+    terms = []
+    for part in _split_top(expr):
+        group = re.fullmatch(r'(and|or)\((.*)\)', part, re.S)
+        if group:
+            kind, inner = group.groups()
+            terms.append((kind, _parse_or(inner)))
+        else:
+            column, op, value = part.split('.', 2)
+            if op == 'in':
+                value = value.strip('()').split(',')
+            elif value == 'null':
+                value = None
+            elif len(value) >= 2 and value[0] == value[-1] == '"':
+                value = value[1:-1]
+            terms.append(('cmp', (column, op, value)))
+    return terms
+
+
+def _eval_terms(kind, terms, row):
+    results = []
+    for term_kind, payload in terms:
+        if term_kind == 'cmp':
+            column, op, value = payload
+            results.append(_match(op, _get_path(row, column), value))
+        else:
+            results.append(_eval_terms(term_kind, payload, row))
+    return all(results) if kind == 'and' else any(results)
+
+
+class Query:
+    def __init__(self, db, table):
+        self.db = db
+        self.table_name = table
+        self.operation = 'select'
+        self.spec = [('*', None, False)]
+        self.filters = []
+        self.orders = []
+        self.offset = None
+        self.limit_count = None
+        self.single_row = False
+        self.maybe_single_row = False
+        self.payload = None
+        self.count_mode = None
+        self.on_conflict = None
+
+    # -- statements ---------------------------------------------------------
+    def select(self, columns='*', count=None, **_kwargs):
+        self.spec = parse_columns(columns)
+        self.count_mode = count
+        return self
+
+    def insert(self, payload, **_kwargs):
+        self.operation, self.payload = 'insert', payload
+        return self
+
+    def upsert(self, payload, on_conflict=None, **_kwargs):
+        self.operation, self.payload, self.on_conflict = 'upsert', payload, on_conflict
+        return self
+
+    def update(self, payload, **_kwargs):
+        self.operation, self.payload = 'update', payload
+        return self
+
+    def delete(self, **_kwargs):
+        self.operation = 'delete'
+        return self
+
+    # -- filters -------------------------------------------------------------
+    def _filter(self, column, op, value):
+        self.filters.append(('cmp', (column, op, value)))
+        return self
+
+    def eq(self, column, value):
+        return self._filter(column, 'eq', value)
+
+    def neq(self, column, value):
+        return self._filter(column, 'neq', value)
+
+    def gt(self, column, value):
+        return self._filter(column, 'gt', value)
+
+    def gte(self, column, value):
+        return self._filter(column, 'gte', value)
+
+    def lt(self, column, value):
+        return self._filter(column, 'lt', value)
+
+    def lte(self, column, value):
+        return self._filter(column, 'lte', value)
+
+    def in_(self, column, values):
+        return self._filter(column, 'in', list(values))
+
+    def is_(self, column, value):
+        return self._filter(column, 'is', value)
+
+    def or_(self, expr, reference_table=None):
+        self.filters.append(('or', _parse_or(expr)))
+        return self
+
+    # -- modifiers -------------------------------------------------------------
+    def order(self, column, desc=False, nullsfirst=None, foreign_table=None):
+        self.orders.append((column, desc))
+        return self
+
+    def range(self, start, end):
+        self.offset, self.limit_count = start, end - start + 1
+        return self
+
+    def limit(self, size, foreign_table=None):
+        self.limit_count = size
+        return self
+
+    def single(self):
+        self.single_row = True
+        return self
+
+    def maybe_single(self):
+        self.maybe_single_row = True
+        return self
+
+    # -- execution -------------------------------------------------------------
+    def _matches(self, row):
+        for kind, payload in self.filters:
+            if kind == 'cmp':
+                column, op, value = payload
+                if '.' in column:
+                    # Filters on embedded resources only restrict !inner embeds
+                    continue
+                if not _match(op, row.get(column), value):
+                    return False
+            elif not _eval_terms('or', payload, row):
+                return False
+        return True
+
+    def _embedded_ok(self, projected):
+        for name, nested, inner in self.spec:
+            if nested is None:
+                continue
+            related = projected.get(name)
+            candidates = related if isinstance(related, list) else [related] if related else []
+            kept = [
+                c for c in candidates
+                if all(_match(op, c.get(col.split('.', 1)[1]), val)
+                       for k, (col, op, val) in ((k, p) for k, p in self.filters if k == 'cmp')
+                       if col.split('.', 1)[0] == name)
+            ]
+            if isinstance(related, list):
+                projected[name] = kept
+            elif related is not None and not kept:
+                projected[name] = None
+            if inner and not kept:
+                return False
+        return True
+
+    def execute(self):
+        self.db._round_trip(self.table_name)
+        with self.db.lock:
+            result = getattr(self, f'_execute_{self.operation}')()
+            if self.operation != 'select':
+                self.db.changed()
+            return result
+
+    def _execute_select(self):
+        # Pages of the same query (fetch_all) share one filtered, sorted scan
+        key = ('select', self.table_name, repr(self.spec), repr(self.filters), repr(self.orders))
+        out = self.db.cached(key, self._scan)
+
+        count = len(out) if self.count_mode else None
+        start = self.offset or 0
+        if self.limit_count is not None:
+            out = out[start:start + self.limit_count]
+        elif start:
+            out = out[start:]
+
+        data = [copy.deepcopy(p) for _, p in out]
+        for name, _ in self._filter_embeds():
+            if name not in {n for n, _, _ in self.spec}:
+                for d in data:
+                    d.pop(name, None)
+        return self._shape(data, count)
+
+    def _scan(self):
+        rows = self.db.tables[self.table_name]
+        out = []
+        for row in rows:
+            if not self._matches(row):
+                continue
+            projected = self.db._project(self.table_name, row, self.spec + [
+                (name, spec, False) for name, spec in self._filter_embeds()
+            ])
+            if not self._embedded_ok(projected):
+                continue
+            out.append((row, projected))
+
+        for column, desc in reversed(self.orders):
+            out.sort(key=lambda pair: _sort_key(pair[0].get(column)), reverse=desc)
+        return out
+
+    def _filter_embeds(self):
+        """Embedded resources referenced only by filters must still be resolved"""
+        named = {n for n, _, _ in self.spec}
+        extra = []
+        for kind, payload in self.filters:
+            if kind == 'cmp' and '.' in payload[0]:
+                name = payload[0].split('.', 1)[0]
+                if name not in named and name not in {e for e, _ in extra}:
+                    extra.append((name, [('*', None, False)]))
+        return extra
+
+    def _shape(self, data, count=None):
+        if self.single_row:
+            if len(data) != 1:
+                raise APIError('JSON object requested, multiple (or no) rows returned', code='PGRST116')
+            return Response(data[0], count)
+        if self.maybe_single_row:
+            return Response(data[0] if data else None, count)
+        return Response(data, count)
+
+    def _check_unique(self, row, ignore=None):
+        for key in [('id',)] + ([UNIQUE_KEYS[self.table_name]] if self.table_name in UNIQUE_KEYS else []):
+            for other in self.db.tables[self.table_name]:
+                if other is ignore:
+                    continue
+                if all(other.get(k) == row.get(k) for k in key):
+                    raise APIError(f'duplicate key value violates unique constraint on {key}', code='23505')
+
+    def _execute_insert(self):
+        payload = self.payload if isinstance(self.payload, list) else [self.payload]
+        inserted = []
+        for item in payload:
+            row = {k: _serialise(v) for k, v in item.items()}
+            row.setdefault('id', str(uuid.uuid4()))
+            row.setdefault('created_at', _now())
+            if self.table_name not in ('reservation_rooms', 'availability_blocks'):
+                row.setdefault('updated_at', row['created_at'])
+            if self.table_name == 'reservations':
+                row.setdefault('status', 'pending')
+            self._check_unique(row)
+            self.db.tables[self.table_name].append(row)
+            self.db.fire(self.table_name, None, row)
+            inserted.append(copy.deepcopy(row))
+        return Response(inserted)
+
+    def _execute_upsert(self):
+        payload = self.payload if isinstance(self.payload, list) else [self.payload]
+        keys = tuple(k.strip() for k in (self.on_conflict or 'id').split(','))
+        out = []
+        for item in payload:
+            item = {k: _serialise(v) for k, v in item.items()}
+            existing = next(
+                (r for r in self.db.tables[self.table_name] if all(r.get(k) == item.get(k) for k in keys)),
+                None
+            )
+            if existing:
+                old = dict(existing)
+                existing.update(item)
+                existing['updated_at'] = _now()
+                self.db.fire(self.table_name, old, existing)
+                out.append(copy.deepcopy(existing))
+            else:
+                row = dict(item)
+                row.setdefault('id', str(uuid.uuid4()))
+                row.setdefault('created_at', _now())
+                row.setdefault('updated_at', row['created_at'])
+                self.db.tables[self.table_name].append(row)
+                self.db.fire(self.table_name, None, row)
+                out.append(copy.deepcopy(row))
+        return Response(out)
+
+    def _execute_update(self):
+        out = []
+        for row in self.db.tables[self.table_name]:
+            if self._matches(row):
+                old = dict(row)
+                row.update({k: _serialise(v) for k, v in self.payload.items()})
+                self.db.fire(self.table_name, old, row)
+                out.append(copy.deepcopy(row))
+        return self._shape(out)
+
+    def _execute_delete(self):
+        keep, removed = [], []
+        for row in self.db.tables[self.table_name]:
+            (removed if self._matches(row) else keep).append(row)
+        self.db.tables[self.table_name][:] = keep
+        for row in removed:
+            self.db.fire(self.table_name, row, None)
+        # ON DELETE CASCADE for the relationships the app relies on
+        for child, fks in MANY_TO_ONE.items():
+            for _name, (parent, fk) in fks.items():
+                if parent == self.table_name and removed:
+                    ids = {r['id'] for r in removed}
+                    self.db.tables[child][:] = [r for r in self.db.tables[child] if r.get(fk) not in ids]
+        return Response([copy.deepcopy(r) for r in removed])
+
+
+def _serialise(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def _sort_key(value):
+    if value is None:
+        return (1, '')
+    value = _coerce(value)
+    return (0, value) if isinstance(value, (int, float)) else (0, str(value))
+
+
+class RpcCall:
+    def __init__(self, db, fn, params):
+        self.db = db
+        self.fn = fn
+        self.params = params
+        self.single_row = False
+
+    def single(self):
+        self.single_row = True
+        return self
+
+    def execute(self):
+        self.db._round_trip(f'rpc:{self.fn}')
+        if self.fn not in self.db.rpcs:
+            raise APIError(f'Could not find the function public.{self.fn}', code='PGRST202')
+        with self.db.lock:
+            data = self.db.rpcs[self.fn](self.db, **self.params)
+        if self.single_row and isinstance(data, list):
+            data = data[0] if data else None
+        return Response(data)
+
+
+# -- Python versions of the SQL functions shipped in the repo's *.sql scripts --
+ACTIVE = ('confirmed', 'pending')
+
+
+def rpc_get_fullday_guests(db, p_start_date, p_end_date):
+    totals = {}
+    for r in db.tables['reservations']:
+        if r['reservation_type'] == 'fullday' and r['status'] in ACTIVE and p_start_date <= r['check_in_date'][:10] <= p_end_date:
+            totals[r['check_in_date'][:10]] = totals.get(r['check_in_date'][:10], 0) + r['num_guests']
+    return [{'check_in_date': d, 'total_guests': g} for d, g in sorted(totals.items())]
+
+
+def rpc_get_dashboard_stats(db, p_month=None, p_year=None, p_today=None):
+    today = date.fromisoformat(p_today) if p_today else date.today()
+    rows = [
+        r for r in db.tables['reservations']
+        if p_month is None or p_year is None or r['check_in_date'][:7] == f'{p_year:04d}-{p_month:02d}'
+    ]
+
+    def count(pred):
+        return sum(1 for r in rows if pred(r))
+
+    return [{
+        'total_reservations': len(rows),
+        'pending_reservations': count(lambda r: r['status'] == 'pending'),
+        'confirmed_reservations': count(lambda r: r['status'] == 'confirmed'),
+        'cancelled_reservations': count(lambda r: r['status'] == 'cancelled'),
+        'total_revenue': sum(float(r['total_price'] or 0) for r in rows if r['status'] in ('confirmed', 'completed')),
+        'fullday_bookings': count(lambda r: r['reservation_type'] == 'fullday'),
+        'hospedaje_bookings': count(lambda r: r['reservation_type'] == 'hospedaje'),
+        'upcoming_checkins': count(
+            lambda r: r['status'] in ACTIVE and 0 <= (date.fromisoformat(r['check_in_date'][:10]) - today).days <= 7
+        ),
+    }]
+
+
+def _daily_stats_key(r):
+    return r['check_in_date'][:10], r['reservation_type'], r.get('status') or 'pending'
+
+
+def _apply_daily_stats(rollup, r, sign):
+    key = _daily_stats_key(r)
+    row = rollup.setdefault(key, {
+        'stat_date': key[0], 'reservation_type': key[1], 'status': key[2],
+        'reservation_count': 0, 'total_guests': 0, 'total_revenue': 0.0,
+    })
+    row['reservation_count'] += sign
+    row['total_guests'] += sign * (r['num_guests'] or 0)
+    # DECIMAL(12,2) in SQL: keep cents exact across +/- updates
+    row['total_revenue'] = round(row['total_revenue'] + sign * float(r['total_price'] or 0), 2)
+    if row['reservation_count'] == 0:
+        del rollup[key]
+
+
+def _daily_stats(db):
+    rollup = {}
+    for r in db.tables['reservations']:
+        _apply_daily_stats(rollup, r, 1)
+    return rollup
+
+
+def trigger_reservation_daily_stats(db, old, new):
+    """maintain_reservation_daily_stats()"""
+    if old is not None:
+        _apply_daily_stats(db.daily_stats, old, -1)
+    if new is not None:
+        _apply_daily_stats(db.daily_stats, new, 1)
+
+
+def rpc_rebuild_reservation_daily_stats(db):
+    db.daily_stats = _daily_stats(db)
+    return len(db.daily_stats)
+
+
+def rpc_check_reservation_daily_stats(db):
+    actual = _daily_stats(db)
+    mismatches = []
+    for key in sorted(set(db.daily_stats) | set(actual)):
+        stored, fresh = db.daily_stats.get(key, {}), actual.get(key, {})
+        columns = ('reservation_count', 'total_guests', 'total_revenue')
+        if any(stored.get(c) != fresh.get(c) for c in columns):
+            mismatches.append({
+                'stat_date': key[0], 'reservation_type': key[1], 'status': key[2],
+                'rollup_count': stored.get('reservation_count'), 'actual_count': fresh.get('reservation_count'),
+                'rollup_guests': stored.get('total_guests'), 'actual_guests': fresh.get('total_guests'),
+                'rollup_revenue': stored.get('total_revenue'), 'actual_revenue': fresh.get('total_revenue'),
+            })
+    return mismatches
+
+
+def _normalise_name(name):
+    return ' '.join(name.lower().split())
+
+
+# Constants of create_reservation_atomic (and the validate_fullday_capacity trigger)
+MAX_FULLDAY_CAPACITY = 20
+FULLDAY_PRICE = 5.0
+
+
+def rpc_create_reservation_atomic(
+    db, p_client_name, p_client_document, p_client_email, p_client_phone,
+    p_reservation_type, p_check_in_date, p_check_out_date, p_num_guests,
+    p_room_ids, p_notes
+):
+    """Mirror of add_create_reservation_rpc.sql; db.lock plays the role of the row locks"""
+    if p_reservation_type == 'fullday':
+        booked = sum(
+            r['num_guests'] for r in db.tables['reservations']
+            if r['reservation_type'] == 'fullday' and r['status'] in ACTIVE
+            and r['check_in_date'][:10] == p_check_in_date
+        )
+        if booked + p_num_guests > MAX_FULLDAY_CAPACITY:
+            raise APIError('Full day capacity exceeded for this date', code='P0001')
+        total_price = p_num_guests * FULLDAY_PRICE
+    else:
+        p_room_ids = list(dict.fromkeys(p_room_ids))
+        rooms = db._by_id('rooms')
+        if any(room_id not in rooms for room_id in p_room_ids):
+            raise APIError('Room not found', code='P0001')
+        wanted = set(p_room_ids)
+        blocked = any(
+            (b.get('room_id') is None or b['room_id'] in wanted)
+            and b['start_date'][:10] < p_check_out_date and b['end_date'][:10] >= p_check_in_date
+            for b in db.tables['availability_blocks']
+        )
+        if not blocked:
+            reservations = db._by_id('reservations')
+            for rr in db.tables['reservation_rooms']:
+                r = reservations.get(rr['reservation_id'])
+                if rr['room_id'] in wanted and r and r['status'] in ACTIVE:
+                    check_out = (r.get('check_out_date') or r['check_in_date'])[:10]
+                    if r['check_in_date'][:10] < p_check_out_date and check_out > p_check_in_date:
+                        blocked = True
+                        break
+        if blocked:
+            raise APIError('Room not available for selected dates', code='P0001')
+        nights = (date.fromisoformat(p_check_out_date) - date.fromisoformat(p_check_in_date)).days
+        total_price = sum(rooms[room_id]['price_per_night'] for room_id in p_room_ids) * nights
+
+    client = next((c for c in db.tables['clients'] if c['id_document'] == p_client_document), None)
+    if client is None:
+        client = db.insert_rows('clients', [{
+            'full_name': p_client_name, 'id_document': p_client_document,
+            'email': p_client_email, 'phone': p_client_phone,
+        }])[0]
+    elif _normalise_name(client['full_name']) != _normalise_name(p_client_name):
+        raise APIError(
+            f'El documento {p_client_document} ya está registrado con otro nombre ({client["full_name"]}). '
+            'Si eres el mismo cliente, usa el nombre registrado.',
+            code='P0001'
+        )
+    else:
+        client.update({'email': p_client_email, 'phone': p_client_phone, 'updated_at': _now()})
+
+    reservation = db.insert_rows('reservations', [{
+        'client_id': client['id'], 'reservation_type': p_reservation_type,
+        'check_in_date': p_check_in_date, 'check_out_date': p_check_out_date,
+        'num_guests': p_num_guests, 'total_price': total_price, 'status': 'pending',
+        'notes': p_notes, 'whatsapp_confirmation_sent': False, 'email_confirmation_sent': False,
+    }])[0]
+    room_names = []
+    if p_reservation_type == 'hospedaje':
+        db.insert_rows('reservation_rooms', [
+            {'reservation_id': reservation['id'], 'room_id': room_id} for room_id in p_room_ids
+        ])
+        room_names = [rooms[room_id]['name'] for room_id in p_room_ids]
+
+    return {
+        'id': reservation['id'],
+        'reservation_type': p_reservation_type,
+        'check_in_date': p_check_in_date,
+        'check_out_date': p_check_out_date,
+        'num_guests': p_num_guests,
+        'total_price': total_price,
+        'status': 'pending',
+        'client_name': client['full_name'],
+        'client_phone': client['phone'],
+        'client_email': client['email'],
+        'rooms': room_names,
+        'created_at': reservation['created_at'],
+    }
+
+
+def rpc_create_reservations_bulk(db, p_rows):
+    """Mirror of add_bulk_reservations_rpc.sql: one create_reservation_atomic per row, rejections kept per row"""
+    results = []
+    for row in p_rows:
+        outcome = {'row': row['row'], 'status': 'created', 'reservation_id': None, 'total_price': None, 'error': None}
+        try:
+            created = rpc_create_reservation_atomic(
+                db, row['client_name'], row['client_document'], row.get('client_email'), row.get('client_phone'),
+                row['reservation_type'], row['check_in_date'], row.get('check_out_date'), row['num_guests'],
+                row.get('room_ids') or [], row.get('notes')
+            )
+            outcome.update(reservation_id=created['id'], total_price=created['total_price'])
+        except APIError as e:
+            if e.code == 'P0001':
+                outcome.update(status='rejected', error=e.message)
+            else:
+                outcome.update(status='failed', error='Error saving reservation')
+        results.append(outcome)
+    return results
+
+
+BUILTIN_TRIGGERS = {
+    'reservations': trigger_reservation_daily_stats,
+}
+
+BUILTIN_RPCS = {
+    'create_reservation_atomic': rpc_create_reservation_atomic,
+    'create_reservations_bulk': rpc_create_reservations_bulk,
+    'rebuild_reservation_daily_stats': rpc_rebuild_reservation_daily_stats,
+    'check_reservation_daily_stats': rpc_check_reservation_daily_stats,
+    'get_fullday_guests': rpc_get_fullday_guests,
+    'get_dashboard_stats': rpc_get_dashboard_stats,
+}
@@ -0,0 +1,49 @@
+"""Wire the FastAPI app to a FakeSupabase for offline tests, benchmarks and load tests"""
+from pathlib import Path
+import sys
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / 'backend'
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from tests.fake_supabase import FakeSupabase  # noqa: E402
+
+ADMIN_EMAIL = 'bench@aquavalle.test'
+
+
+def install(fake: FakeSupabase):
+    """Route get_db() to fake and drop every process-level cache built from the previous DB"""
+    import database
+    from services.occupancy_index import occupancy_index
+    from services.block_snapshot import block_store
+    from services.room_catalog import room_catalog
+    from services.data_version import availability_version
+    from services.email_outbox import email_outbox
+    from services.month_snapshots import month_snapshots
+    from auth import token_revocations, verified_tokens
+
+    database.SupabaseClient._instance = fake
+    database.SupabaseClient._admin_instance = fake
+    database._async_db = None
+    database._async_admin_db = None
+    occupancy_index.invalidate()
+    block_store.invalidate()
+    room_catalog.invalidate()
+    month_snapshots.clear()
+    availability_version.bump()
+    email_outbox.transport = None
+    token_revocations.clear()
+    verified_tokens.clear()
+
+
+def app_client():
+    """TestClient over the real app (import deferred until the fake is installed)"""
+    from fastapi.testclient import TestClient
+    import server
+    return TestClient(server.app)
+
+
+def admin_headers() -> dict:
+    from auth import create_access_token
+    token = create_access_token({'sub': ADMIN_EMAIL, 'admin_id': 'bench'})
+    return {'Authorization': f'Bearer {token}'}
@@ -0,0 +1,268 @@
+"""Concurrent booking load test through the ASGI app.
+
+    python -m tests.load_test                              # 500 requests, 100 in flight, FakeSupabase
+    python -m tests.load_test --requests 2000 --concurrency 200 --latency 0.01
+    python -m tests.load_test --live                       # the Supabase/Postgres configured in backend/.env
+
+Simulates a holiday-weekend rush: bookings for a handful of hot rooms and
+Full Day dates mixed with availability reads, all fired concurrently at the
+FastAPI app over httpx's ASGI transport (no network, no server process).
+Reports throughput, latency percentiles and outcome counts per request kind,
+then checks the invariants the booking flow must keep however the requests
+interleave: no room is booked twice for the same night and Full Day guests
+never exceed ``MAX_FULLDAY_CAPACITY`` on any date.
+
+``--live`` books into the configured database, so point it at a local
+Postgres/Supabase, never at production.
+"""
+from collections import defaultdict
+from datetime import date, timedelta
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import sys
+import time
+import uuid
+
+from tests.harness import install
+from tests.fake_supabase import FakeSupabase
+from tests.seed import seed_database
+
+KINDS = (('hospedaje', 45), ('fullday', 35), ('availability', 20))
+
+
+def _percentile(values, fraction):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(int(round(fraction * (len(ordered) - 1))), len(ordered) - 1)]
+
+
+def build_workload(rooms, start, days, requests, hot_rooms, seed):
+    """Request plans: (kind, method, path, params, json body)"""
+    rng = random.Random(seed)
+    kinds = [kind for kind, weight in KINDS for _ in range(weight)]
+    hot = [room['id'] for room in rooms[:hot_rooms]]
+    end = start + timedelta(days=days - 1)
+    run = uuid.uuid4().hex[:8]
+
+    plans = []
+    for i in range(requests):
+        kind = rng.choice(kinds)
+        client = {
+            'client_name': f'Carga {run} {i}', 'client_document': f'LT{run}{i}',
+            'client_phone': '04140000000',
+        }
+        if kind == 'hospedaje':
+            check_in = start + timedelta(days=rng.randrange(days))
+            plans.append((kind, 'POST', '/api/reservations/', None, {
+                **client, 'reservation_type': 'hospedaje',
+                'check_in_date': check_in.isoformat(),
+                'check_out_date': (check_in + timedelta(days=rng.randint(1, 3))).isoformat(),
+                'num_guests': 2, 'room_ids': rng.sample(hot, rng.choice((1, 1, 2))),
+            }))
+        elif kind == 'fullday':
+            plans.append((kind, 'POST', '/api/reservations/', None, {
+                **client, 'reservation_type': 'fullday',
+                'check_in_date': (start + timedelta(days=rng.randrange(days))).isoformat(),
+                'num_guests': rng.randint(1, 8),
+            }))
+        elif rng.random() < 0.5:
+            plans.append((kind, 'GET', '/api/availability/rooms', {
+                'start_date': start.isoformat(), 'end_date': end.isoformat()
+            }, None))
+        else:
+            plans.append((kind, 'GET', '/api/availability/fullday', {
+                'start_date': start.isoformat(), 'end_date': end.isoformat(), 'num_guests': 4
+            }, None))
+    return plans
+
+
+async def fire(app, plans, concurrency):
+    """Run the plans with at most ``concurrency`` in flight; returns (samples, wall seconds)"""
+    import httpx
+
+    semaphore = asyncio.Semaphore(concurrency)
+    samples = []
+
+    async def one(client, plan):
+        kind, method, path, params, body = plan
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, path, params=params, json=body)
+                status = response.status_code
+            except Exception as e:
+                status = f'{type(e).__name__}'
+            samples.append((kind, status, time.perf_counter() - started))
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url='http://loadtest', timeout=60) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(one(client, plan) for plan in plans))
+        wall = time.perf_counter() - started
+    return samples, wall
+
+
+def summarize(samples, wall):
+    by_kind = defaultdict(list)
+    for kind, status, elapsed in samples:
+        by_kind[kind].append((status, elapsed))
+
+    report = {}
+    for kind, rows in sorted(by_kind.items()) + [('all', [(s, e) for _, s, e in samples])]:
+        latencies = [elapsed * 1000 for _, elapsed in rows]
+        ok = sum(1 for status, _ in rows if isinstance(status, int) and status < 400)
+        # 400 is a booking rejected for lack of rooms/capacity: expected under contention
+        rejected = sum(1 for status, _ in rows if status == 400)
+        errors = len(rows) - ok - rejected
+        report[kind] = {
+            'requests': len(rows),
+            'ok': ok,
+            'rejected': rejected,
+            'errors': errors,
+            'error_rate': round(errors / len(rows), 4) if rows else 0.0,
+            'throughput_rps': round(len(rows) / wall, 1) if wall else None,
+            'p50_ms': round(_percentile(latencies, 0.50), 2),
+            'p90_ms': round(_percentile(latencies, 0.90), 2),
+            'p99_ms': round(_percentile(latencies, 0.99), 2),
+            'max_ms': round(max(latencies), 2),
+            'mean_ms': round(statistics.fmean(latencies), 2),
+            'statuses': dict(sorted(
+                (str(status), sum(1 for s, _ in rows if s == status)) for status in {s for s, _ in rows}
+            )),
+        }
+    return report
+
+
+async def check_invariants(start, end, max_fullday_capacity):
+    """Active bookings touching [start, end] that break an invariant; empty lists if none"""
+    from database import get_db, fetch_all
+    from services.occupancy_index import ACTIVE_STATUSES, to_date
+
+    db = get_db()
+    rows = await fetch_all(
+        lambda: db.table('reservations').select(
+            'id, reservation_type, check_in_date, check_out_date, num_guests, reservation_rooms(room_id)'
+        ).in_('status', list(ACTIVE_STATUSES)).gte(
+            'check_in_date', (start - timedelta(days=31)).isoformat()
+        ).lte('check_in_date', end.isoformat()).order('id')
+    )
+
+    nights = defaultdict(list)
+    fullday_guests = defaultdict(int)
+    for row in rows:
+        check_in = to_date(row['check_in_date'])
+        if row['reservation_type'] == 'fullday':
+            if start <= check_in <= end:
+                fullday_guests[check_in] += row['num_guests']
+            continue
+        check_out = to_date(row['check_out_date'])
+        for link in row.get('reservation_rooms') or []:
+            day = max(check_in, start)
+            while day < check_out and day <= end:
+                nights[(link['room_id'], day)].append(row['id'])
+                day += timedelta(days=1)
+
+    double_booked = [
+        {'room_id': room_id, 'date': day.isoformat(), 'reservations': ids}
+        for (room_id, day), ids in sorted(nights.items()) if len(ids) > 1
+    ]
+    over_capacity = [
+        {'date': day.isoformat(), 'guests': guests, 'capacity': max_fullday_capacity}
+        for day, guests in sorted(fullday_guests.items()) if guests > max_fullday_capacity
+    ]
+    return double_booked, over_capacity
+
+
+def run_load_test(requests=500, concurrency=100, rooms=10, hot_rooms=5, days=4, start=None,
+                  latency=0.0, live=False, seed=1):
+    """Seed (unless live), fire the rush, check invariants and return the report dict"""
+    start = start or date.today() + timedelta(days=60)
+    end = start + timedelta(days=days - 1)
+
+    if live:
+        import server  # loads backend/.env and the configured Supabase client
+        from services.room_catalog import room_catalog
+        from database import get_db
+        asyncio.run(room_catalog.ensure_loaded(get_db()))
+        room_rows = [{'id': room.id} for room in room_catalog.active_rooms()]
+    else:
+        fake = FakeSupabase()
+        room_rows = seed_database(fake, rooms=rooms, reservations=0, blocks=0, clients=1)
+        fake.latency = latency
+        install(fake)
+        import server
+
+    from config import settings
+
+    plans = build_workload(room_rows, start, days, requests, hot_rooms, seed)
+
+    async def scenario():
+        samples, wall = await fire(server.app, plans, concurrency)
+        violations = await check_invariants(start, end, settings.MAX_FULLDAY_CAPACITY)
+        return samples, wall, violations
+
+    samples, wall, (double_booked, over_capacity) = asyncio.run(scenario())
+    return {
+        'meta': {
+            'requests': requests, 'concurrency': concurrency, 'hot_rooms': hot_rooms,
+            'start': start.isoformat(), 'end': end.isoformat(), 'latency_ms': latency * 1000,
+            'database': 'live' if live else 'fake', 'wall_seconds': round(wall, 3),
+            'max_fullday_capacity': settings.MAX_FULLDAY_CAPACITY,
+        },
+        'results': summarize(samples, wall),
+        'invariants': {'double_booked': double_booked, 'fullday_over_capacity': over_capacity},
+    }
+
+
+def _print_report(report):
+    meta = report['meta']
+    print(
+        f"{meta['requests']} requests, {meta['concurrency']} concurrent, {meta['database']} DB, "
+        f"latency={meta['latency_ms']:g}ms, {meta['start']}..{meta['end']} in {meta['wall_seconds']}s"
+    )
+    print(f"{'kind':14} {'req':>6} {'ok':>6} {'rej':>6} {'err':>6} {'rps':>8} {'p50':>9} {'p90':>9} {'p99':>9}")
+    for kind, r in report['results'].items():
+        print(
+            f"{kind:14} {r['requests']:>6} {r['ok']:>6} {r['rejected']:>6} {r['errors']:>6} "
+            f"{r['throughput_rps']:>8} {r['p50_ms']:>7.1f}ms {r['p90_ms']:>7.1f}ms {r['p99_ms']:>7.1f}ms"
+        )
+    invariants = report['invariants']
+    print(f"double-booked room nights: {len(invariants['double_booked'])}")
+    print(f"Full Day dates over capacity: {len(invariants['fullday_over_capacity'])}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=100)
+    parser.add_argument('--rooms', type=int, default=10, help='rooms seeded in the fake DB')
+    parser.add_argument('--hot-rooms', type=int, default=5, help='rooms the bookings compete for')
+    parser.add_argument('--days', type=int, default=4, help='length of the rush window')
+    parser.add_argument('--start', type=date.fromisoformat, help='first day of the rush (default: in 60 days)')
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every fake DB call')
+    parser.add_argument('--live', action='store_true', help='use the configured database instead of the fake')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='write the results as JSON to this path')
+    args = parser.parse_args(argv)
+
+    report = run_load_test(
+        args.requests, args.concurrency, args.rooms, args.hot_rooms, args.days, args.start,
+        args.latency, args.live, args.seed
+    )
+    _print_report(report)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f'Results written to {args.output}', file=sys.stderr)
+
+    invariants = report['invariants']
+    if invariants['double_booked'] or invariants['fullday_over_capacity']:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""Deterministic, realistically sized data for FakeSupabase"""
+from datetime import date, datetime, timedelta, timezone
+import random
+
+STATUS_WEIGHTS = (('confirmed', 60), ('pending', 20), ('cancelled', 15), ('completed', 5))
+
+
+def seed_database(fake, rooms=50, reservations=100_000, blocks=1_000, clients=None,
+                  start=date(2026, 1, 1), days=730, fullday_share=0.3, seed=1):
+    """Fill fake with rooms, clients, reservations (+ room links) and blocks.
+
+    Dates are spread uniformly over ``days`` from ``start``; stays may
+    overlap, which does not change what the queries cost. Returns the room
+    rows so callers can pick ids.
+    """
+    rng = random.Random(seed)
+    statuses = [s for s, weight in STATUS_WEIGHTS for _ in range(weight)]
+    clients = clients or max(reservations // 3, 1)
+    created = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+    room_rows = fake.insert_rows('rooms', [
+        {
+            'name': f'Cabaña {i + 1}', 'capacity': rng.randint(2, 10),
+            'price_per_night': float(rng.choice((50, 60, 70, 80, 100, 120))),
+            'description': '', 'features': [], 'images': [], 'is_active': True,
+        }
+        for i in range(rooms)
+    ])
+    room_ids = [r['id'] for r in room_rows]
+
+    client_rows = fake.insert_rows('clients', [
+        {'full_name': f'Cliente {i}', 'id_document': f'V{10_000_000 + i}', 'email': None, 'phone': f'0414{i:07d}'}
+        for i in range(clients)
+    ])
+
+    reservation_rows = []
+    links = []
+    for i in range(reservations):
+        check_in = start + timedelta(days=rng.randrange(days))
+        stamp = (created + timedelta(seconds=i * 37)).isoformat()
+        row = {
+            'client_id': client_rows[rng.randrange(clients)]['id'],
+            'check_in_date': check_in.isoformat(),
+            'status': rng.choice(statuses),
+            'notes': None,
+            'whatsapp_confirmation_sent': False,
+            'email_confirmation_sent': False,
+            'created_at': stamp,
+            'updated_at': stamp,
+        }
+        if rng.random() < fullday_share:
+            guests = rng.randint(1, 6)
+            row.update(reservation_type='fullday', check_out_date=None, num_guests=guests, total_price=guests * 5.0)
+        else:
+            nights = rng.randint(1, 5)
+            stay_rooms = rng.sample(room_ids, rng.choice((1, 1, 1, 2)))
+            row.update(
+                reservation_type='hospedaje',
+                check_out_date=(check_in + timedelta(days=nights)).isoformat(),
+                num_guests=rng.randint(1, 8),
+                total_price=nights * 70.0 * len(stay_rooms),
+                _rooms=stay_rooms,
+            )
+        reservation_rows.append(row)
+
+    stay_rooms = [row.pop('_rooms', None) for row in reservation_rows]
+    inserted = fake.insert_rows('reservations', reservation_rows)
+    for row, rooms_for_row in zip(inserted, stay_rooms):
+        for room_id in rooms_for_row or ():
+            links.append({'reservation_id': row['id'], 'room_id': room_id})
+    fake.insert_rows('reservation_rooms', links)
+
+    block_rows = []
+    for _ in range(blocks):
+        block_start = start + timedelta(days=rng.randrange(days))
+        block_rows.append({
+            'room_id': None if rng.random() < 0.05 else rng.choice(room_ids),
+            'start_date': block_start.isoformat(),
+            'end_date': (block_start + timedelta(days=rng.randint(0, 3))).isoformat(),
+            'block_type': rng.choice(('maintenance', 'private_event', 'other')),
+            'reason': None,
+            'blocks_fullday': rng.random() < 0.1,
+        })
+    fake.insert_rows('availability_blocks', block_rows)
+
+    return room_rows
@@ -0,0 +1,106 @@
+"""Admin token revocation: logout and password reset, across workers and restarts."""
+import asyncio
+
+import pytest
+
+from tests.fake_supabase import FakeSupabase
+from tests.harness import install, app_client, ADMIN_EMAIL
+
+
+def setup():
+    fake = FakeSupabase()
+    fake.insert_rows('admin_users', [{
+        'email': ADMIN_EMAIL, 'password_hash': 'x', 'full_name': 'Admin', 'is_active': True,
+    }])
+    install(fake)
+    import auth
+    return fake, auth
+
+
+def authorized(token) -> bool:
+    response = app_client().get('/api/admin/stats/consistency', headers={'Authorization': f'Bearer {token}'})
+    assert response.status_code in (200, 401)
+    return response.status_code == 200
+
+
+def other_worker(auth):
+    """A fresh process: empty caches, revocations read back from the database"""
+    from database import get_admin_db
+    revocations = auth.TokenRevocations(ttl_seconds=30)
+    asyncio.run(revocations.load(get_admin_db()))
+    return revocations
+
+
+def test_reset_revokes_earlier_tokens_but_not_a_login_in_the_same_second():
+    fake, auth = setup()
+    before = auth.create_access_token({'sub': ADMIN_EMAIL})
+    assert authorized(before)
+
+    asyncio.run(auth.revoke_subject_tokens(ADMIN_EMAIL))
+    after = auth.create_access_token({'sub': ADMIN_EMAIL})
+
+    assert not authorized(before)
+    assert authorized(after)
+
+    revocations = other_worker(auth)
+    assert revocations.is_revoked(auth.decode_token(before))
+    assert not revocations.is_revoked(auth.decode_token(after))
+
+
+def test_logout_revokes_only_that_token_in_every_worker():
+    fake, auth = setup()
+    first = auth.create_access_token({'sub': ADMIN_EMAIL})
+    second = auth.create_access_token({'sub': ADMIN_EMAIL})
+
+    response = app_client().post('/api/admin/logout', headers={'Authorization': f'Bearer {first}'})
+    assert response.status_code == 200
+
+    assert not authorized(first)
+    assert authorized(second)
+
+    revocations = other_worker(auth)
+    assert revocations.is_revoked(auth.decode_token(first))
+    assert not revocations.is_revoked(auth.decode_token(second))
+
+
+def test_revocations_made_elsewhere_apply_after_the_ttl():
+    fake, auth = setup()
+    token = auth.create_access_token({'sub': ADMIN_EMAIL})
+    assert authorized(token)
+
+    # Another worker handled the reset
+    from database import get_admin_db
+    asyncio.run(auth.TokenRevocations(ttl_seconds=30).revoke_subject(get_admin_db(), ADMIN_EMAIL))
+    auth.verified_tokens.clear()
+    assert authorized(token)
+
+    auth.token_revocations.invalidate()
+    assert not authorized(token)
+
+
+class Unreachable:
+    """A database whose writes never arrive"""
+
+    def table(self, name):
+        raise ConnectionError(name)
+
+
+def test_reload_keeps_local_revocations_missing_from_the_database():
+    fake, auth = setup()
+    from database import get_admin_db
+    logged_out = auth.create_access_token({'sub': ADMIN_EMAIL})
+    reset = auth.create_access_token({'sub': 'otro@aquavalle.test'})
+    revocations = auth.TokenRevocations(ttl_seconds=30)
+
+    # Revoked here but not in the database, as when a reload read it before the write landed
+    payload = auth.decode_token(logged_out)
+    for revoke in (
+        revocations.revoke_token(Unreachable(), payload['jti'], ADMIN_EMAIL, payload['exp']),
+        revocations.revoke_subject(Unreachable(), 'otro@aquavalle.test'),
+    ):
+        with pytest.raises(ConnectionError):
+            asyncio.run(revoke)
+    asyncio.run(revocations.load(get_admin_db()))
+
+    assert revocations.is_revoked(auth.decode_token(logged_out))
+    assert revocations.is_revoked(auth.decode_token(reset))
@@ -0,0 +1,128 @@
+"""Availability change stream: per-date deltas, resume and the SSE endpoint."""
+import asyncio
+from datetime import date, timedelta
+
+import httpx
+
+from tests.fake_supabase import FakeSupabase
+from tests.harness import install, admin_headers
+from tests.seed import seed_database
+
+CHECK_IN = date.today() + timedelta(days=40)
+
+
+def setup():
+    fake = FakeSupabase()
+    rooms = seed_database(fake, rooms=3, reservations=0, blocks=0, clients=1)
+    install(fake)
+    import server
+    from services.availability_events import availability_events
+    return server.app, rooms, availability_events
+
+
+def booking(room_id=None, guests=2):
+    body = {
+        'client_name': 'Ana Pérez', 'client_document': 'V123', 'client_phone': '04140000000',
+        'check_in_date': CHECK_IN.isoformat(), 'num_guests': guests,
+    }
+    if room_id:
+        body.update(reservation_type='hospedaje', room_ids=[room_id],
+                    check_out_date=(CHECK_IN + timedelta(days=2)).isoformat())
+    else:
+        body.update(reservation_type='fullday')
+    return body
+
+
+def test_bookings_and_blocks_publish_per_date_deltas():
+    app, rooms, events = setup()
+    room_id = rooms[0]['id']
+
+    async def scenario():
+        sub = events.subscribe(CHECK_IN - timedelta(days=1), CHECK_IN + timedelta(days=5))
+        try:
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://t') as client:
+                assert (await client.post('/api/reservations/', json=booking(room_id))).status_code == 201
+                assert (await client.post('/api/reservations/', json=booking(guests=5))).status_code == 201
+                assert (await client.post('/api/admin/blocks', headers=admin_headers(), json={
+                    'start_date': (CHECK_IN + timedelta(days=4)).isoformat(),
+                    'end_date': (CHECK_IN + timedelta(days=9)).isoformat(),
+                    'block_type': 'maintenance',
+                })).status_code == 200
+            await events.drain()
+            return [sub.queue.get_nowait() for _ in range(sub.queue.qsize())]
+        finally:
+            events.unsubscribe(sub)
+
+    stay, fullday, block = asyncio.run(scenario())
+
+    day1, day2 = CHECK_IN.isoformat(), (CHECK_IN + timedelta(days=1)).isoformat()
+    assert stay.name == 'availability'
+    assert stay.data['dates'] == {day1: {'rooms': {room_id: False}}, day2: {'rooms': {room_id: False}}}
+    assert fullday.data['dates'] == {day1: {'fullday_remaining': 15, 'fullday_closed': False}}
+    # Clipped to the subscriber's window; a global block closes every room and Full Day
+    assert sorted(block.data['dates']) == [(CHECK_IN + timedelta(days=d)).isoformat() for d in (4, 5)]
+    delta = block.data['dates'][(CHECK_IN + timedelta(days=4)).isoformat()]
+    assert delta['fullday_closed'] is True and not any(delta['rooms'].values())
+
+
+def test_resume_replays_missed_events_or_resets():
+    _, rooms, events = setup()
+
+    async def scenario():
+        events.publish(CHECK_IN, CHECK_IN, room_ids=[rooms[0]['id']])
+        await events.drain()
+        seen = events._history[-1].id
+        events.publish(CHECK_IN, CHECK_IN + timedelta(days=1), fullday=True)
+        await events.drain()
+        return seen
+
+    seen = asyncio.run(scenario())
+    [missed] = events.since(seen)
+    assert missed.name == 'invalidate' and missed.data['fullday'] is True
+    assert [e.name for e in events.since('someone-else-3')] == ['reset']
+
+
+def test_stream_endpoint_sends_events_and_heartbeats(monkeypatch):
+    from config import settings
+    monkeypatch.setattr(settings, 'AVAILABILITY_STREAM_HEARTBEAT_SECONDS', 0.05)
+    app, rooms, events = setup()
+
+    async def scenario():
+        disconnect = asyncio.Event()
+        chunks = []
+        start = CHECK_IN.isoformat()
+
+        async def receive():
+            await disconnect.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                chunks.append(message['status'])
+            elif message.get('body'):
+                chunks.append(message['body'].decode())
+
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+            'scheme': 'http', 'path': '/api/availability/stream', 'raw_path': b'/api/availability/stream',
+            'query_string': f'from={start}&to={start}'.encode(), 'root_path': '',
+            'headers': [(b'host', b't')], 'client': ('127.0.0.1', 1), 'server': ('t', 80),
+        }
+        task = asyncio.create_task(app(scope, receive, send))
+        for _ in range(100):
+            if any(': heartbeat' in c for c in chunks[1:]):
+                break
+            await asyncio.sleep(0.02)
+        events.publish(CHECK_IN, CHECK_IN, room_ids=[rooms[0]['id']])
+        await events.drain()
+        await asyncio.sleep(0.02)
+        disconnect.set()
+        await asyncio.wait_for(task, 1)
+        return chunks
+
+    chunks = asyncio.run(scenario())
+    body = ''.join(chunks[1:])
+    assert chunks[0] == 200
+    assert ': heartbeat' in body
+    assert 'event: availability' in body and rooms[0]['id'] in body
+    assert events._subscribers == []
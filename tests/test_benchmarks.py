@@ -0,0 +1,46 @@
+"""Benchmark scenarios as regression tests: every hot path must succeed and stay
+within its DB round-trip budget. Small volumes by default; BENCH_FULL=1 runs
+the full 50 rooms / 100k reservations / 1k blocks data set."""
+import math
+import os
+
+import pytest
+
+from tests.benchmark import run_benchmarks
+
+FULL = os.environ.get('BENCH_FULL') == '1'
+
+PAGE_SIZE = 1000
+
+# Warm PostgREST calls allowed per request; None = the range scenarios, which
+# page through the stays in the window and may use one call per page
+DB_CALL_BUDGET = {
+    'availability_rooms_upcoming': 0,
+    'availability_fullday_upcoming': 0,
+    'availability_rooms_range': None,
+    'availability_rooms_range_rle': None,
+    'availability_room_calendar': None,
+    'availability_fullday': 1,
+    'create_reservation': 1,
+    'admin_stats': 2,
+    'admin_stats_month': 2,
+    'admin_reservations': 1,
+    'admin_reservations_month': 1,
+}
+
+
+@pytest.fixture(scope='module')
+def report():
+    if FULL:
+        return run_benchmarks(repeat=5)
+    return run_benchmarks(rooms=10, reservations=3_000, blocks=60, repeat=3)
+
+
+@pytest.mark.parametrize('scenario', sorted(DB_CALL_BUDGET))
+def test_scenario_within_db_call_budget(report, scenario):
+    result = report['results'][scenario]
+    assert result['samples'] > 0
+    budget = DB_CALL_BUDGET[scenario]
+    if budget is None:
+        budget = max(math.ceil(report['meta']['reservations'] / PAGE_SIZE), 1)
+    assert result['db_calls'] <= budget
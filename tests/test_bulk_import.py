@@ -0,0 +1,104 @@
+"""Bulk import: rows are re-checked under the booking locks when they are written."""
+import asyncio
+from datetime import date, timedelta
+
+from tests.fake_supabase import FakeSupabase, rpc_create_reservation_atomic
+from tests.harness import install, app_client, admin_headers
+from tests.load_test import check_invariants
+from tests.seed import seed_database
+
+DAY = date.today() + timedelta(days=45)
+
+
+def setup(monkeypatch, racing_booking):
+    """App over a fresh fake where racing_booking(fake) commits right after the import's snapshot"""
+    fake = FakeSupabase()
+    rooms = seed_database(fake, rooms=2, reservations=0, blocks=0, clients=1)
+    install(fake)
+
+    from services.bulk_import_service import BulkImportService
+    load_snapshot = BulkImportService._load_snapshot
+
+    async def snapshot_then_race(db, reservations):
+        snapshot = await load_snapshot(db, reservations)
+        with fake.lock:
+            racing_booking(fake, rooms)
+        return snapshot
+
+    monkeypatch.setattr(BulkImportService, '_load_snapshot', staticmethod(snapshot_then_race))
+    return fake, rooms
+
+
+def public_booking(fake, reservation_type, num_guests, room_ids=(), nights=0):
+    rpc_create_reservation_atomic(
+        fake, 'Público', 'P1', None, '04140000000', reservation_type, DAY.isoformat(),
+        (DAY + timedelta(days=nights)).isoformat() if nights else None, num_guests, list(room_ids), None
+    )
+
+
+def row(document, reservation_type, num_guests, room_ids=None, nights=0, day=DAY):
+    return {
+        'client_name': f'Cliente {document}', 'client_document': document, 'client_phone': '04140000000',
+        'reservation_type': reservation_type, 'check_in_date': day.isoformat(),
+        'check_out_date': (day + timedelta(days=nights)).isoformat() if nights else None,
+        'num_guests': num_guests, 'room_ids': room_ids or [],
+    }
+
+
+def import_rows(rows):
+    response = app_client().post('/api/admin/reservations/bulk', json=rows, headers=admin_headers())
+    assert response.status_code == 200
+    return [(r['row'], r['status'], r['error']) for r in response.json()['results']]
+
+
+def invariants():
+    double_booked, over_capacity = asyncio.run(check_invariants(DAY, DAY + timedelta(days=7), 20))
+    return {'double_booked': double_booked, 'over_capacity': over_capacity}
+
+
+def test_room_booked_after_snapshot_rejects_only_that_row(monkeypatch):
+    fake, rooms = setup(monkeypatch, lambda fake, rooms: public_booking(fake, 'hospedaje', 2, [rooms[0]['id']], nights=2))
+
+    results = import_rows([
+        row('B1', 'hospedaje', 2, [rooms[0]['id']], nights=3),
+        row('B2', 'hospedaje', 2, [rooms[1]['id']], nights=3),
+        row('B3', 'fullday', 4),
+    ])
+
+    assert results == [
+        (1, 'rejected', 'Room not available for selected dates'),
+        (2, 'created', None),
+        (3, 'created', None),
+    ]
+    assert invariants() == {'double_booked': [], 'over_capacity': []}
+
+
+def test_fullday_seats_taken_after_snapshot_reject_rows_one_by_one(monkeypatch):
+    fake, rooms = setup(monkeypatch, lambda fake, rooms: public_booking(fake, 'fullday', 16))
+
+    results = import_rows([
+        row('B1', 'fullday', 6),
+        row('B2', 'fullday', 4),
+        row('B3', 'fullday', 6, day=DAY + timedelta(days=1)),
+    ])
+
+    assert results == [
+        (1, 'rejected', 'Full day capacity exceeded for this date'),
+        (2, 'created', None),
+        (3, 'created', None),
+    ]
+    assert invariants() == {'double_booked': [], 'over_capacity': []}
+    assert sum(r['num_guests'] for r in fake.tables['reservations'] if r['check_in_date'] == DAY.isoformat()) == 20
+
+
+def test_hospedaje_row_without_check_out_is_rejected_on_its_own(monkeypatch):
+    fake, rooms = setup(monkeypatch, lambda fake, rooms: None)
+    missing = row('B1', 'hospedaje', 2, [rooms[0]['id']])
+    del missing['check_out_date']
+
+    results = import_rows([missing, row('B2', 'hospedaje', 2, [rooms[1]['id']], nights=2)])
+
+    assert results == [
+        (1, 'rejected', 'check_out_date: check_out_date es requerido para hospedaje'),
+        (2, 'created', None),
+    ]
@@ -0,0 +1,62 @@
+"""reservation_daily_stats: trigger-maintained rollup, consistency check and rebuild."""
+from datetime import date, timedelta
+
+from tests.fake_supabase import FakeSupabase
+from tests.harness import install, app_client, admin_headers
+from tests.seed import seed_database
+
+
+def setup():
+    fake = FakeSupabase()
+    rooms = seed_database(fake, rooms=3, reservations=200, blocks=0)
+    install(fake)
+    return fake, rooms, app_client(), admin_headers()
+
+
+def consistency(client, headers):
+    response = client.get('/api/admin/stats/consistency', headers=headers)
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_rollup_follows_bookings_updates_and_deletes():
+    fake, rooms, client, headers = setup()
+    assert consistency(client, headers) == {'consistent': True, 'mismatches': []}
+
+    check_in = date.today() + timedelta(days=40)
+    response = client.post('/api/reservations/', json={
+        'client_name': 'Ana Pérez', 'client_document': 'V123', 'client_phone': '04140000000',
+        'reservation_type': 'hospedaje', 'check_in_date': check_in.isoformat(),
+        'check_out_date': (check_in + timedelta(days=2)).isoformat(),
+        'num_guests': 2, 'room_ids': [rooms[0]['id']],
+    })
+    assert response.status_code == 201
+    reservation_id = response.json()['id']
+    key = (check_in.isoformat(), 'hospedaje', 'pending')
+    assert fake.daily_stats[key]['reservation_count'] == 1
+
+    fake.table('reservations').update({'status': 'confirmed'}).eq('id', reservation_id).execute()
+    assert key not in fake.daily_stats
+    fake.table('reservations').update({'status': None}).eq('id', reservation_id).execute()
+    assert fake.daily_stats[key]['reservation_count'] == 1
+    fake.table('reservations').delete().eq('id', reservation_id).execute()
+    assert key not in fake.daily_stats
+
+    assert consistency(client, headers)['consistent']
+
+
+def test_drift_is_reported_and_repaired_by_rebuild():
+    fake, _rooms, client, headers = setup()
+    key = next(iter(fake.daily_stats))
+    fake.daily_stats[key]['reservation_count'] += 1
+
+    report = consistency(client, headers)
+    assert not report['consistent']
+    [mismatch] = report['mismatches']
+    assert (mismatch['stat_date'], mismatch['reservation_type'], mismatch['status']) == key
+    assert mismatch['rollup_count'] == mismatch['actual_count'] + 1
+
+    response = client.post('/api/admin/stats/rebuild', headers=headers)
+    assert response.status_code == 200
+    assert response.json()['rows'] == len(fake.daily_stats)
+    assert consistency(client, headers)['consistent']
@@ -0,0 +1,80 @@
+"""Email outbox: queued sends, retries with backoff, dead-lettering."""
+import asyncio
+from datetime import date, timedelta
+
+from tests.fake_email import FakeTransport
+from tests.fake_supabase import FakeSupabase
+from tests.harness import install, app_client
+from tests.seed import seed_database
+
+
+def setup(transport):
+    fake = FakeSupabase()
+    rooms = seed_database(fake, rooms=2, reservations=0, blocks=0, clients=1)
+    install(fake)
+    from services.email_outbox import email_outbox
+    email_outbox.transport = transport
+    return fake, rooms, email_outbox
+
+
+def book(rooms, email='huesped@example.com'):
+    check_in = date.today() + timedelta(days=30)
+    return app_client().post('/api/reservations/', json={
+        'client_name': 'Ana Pérez', 'client_document': 'V123', 'client_phone': '04140000000',
+        'client_email': email, 'reservation_type': 'hospedaje',
+        'check_in_date': check_in.isoformat(), 'check_out_date': (check_in + timedelta(days=2)).isoformat(),
+        'num_guests': 2, 'room_ids': [rooms[0]['id']],
+    })
+
+
+def make_due(fake):
+    for row in fake.tables['email_outbox']:
+        row['next_attempt_at'] = '2000-01-01T00:00:00+00:00'
+    fake.changed()
+
+
+def test_booking_confirmation_is_sent_in_background_and_flagged():
+    transport = FakeTransport()
+    fake, rooms, outbox = setup(transport)
+
+    response = book(rooms)
+    assert response.status_code == 201
+    assert transport.sent == []
+
+    assert asyncio.run(outbox.run_once()) == 1
+    assert [m['recipient'] for m in transport.sent] == ['huesped@example.com']
+    [row] = fake.tables['email_outbox']
+    assert row['status'] == 'sent' and row['attempts'] == 1
+    assert row['html'] == ''
+    reservation = next(r for r in fake.tables['reservations'] if r['id'] == response.json()['id'])
+    assert reservation['email_confirmation_sent'] is True
+
+
+def test_failed_sends_back_off_then_dead_letter(monkeypatch):
+    from config import settings
+    monkeypatch.setattr(settings, 'EMAIL_OUTBOX_MAX_ATTEMPTS', 3)
+    transport = FakeTransport(fail_times=10)
+    fake, rooms, outbox = setup(transport)
+    assert book(rooms).status_code == 201
+
+    asyncio.run(outbox.run_once())
+    [row] = fake.tables['email_outbox']
+    assert row['status'] == 'pending' and row['attempts'] == 1
+    assert row['last_error'] == 'Resend unavailable'
+    assert row['html']
+    # Not due again until the backoff passes
+    assert asyncio.run(outbox.run_once()) == 0
+
+    for _ in range(2):
+        make_due(fake)
+        asyncio.run(outbox.run_once())
+    assert row['status'] == 'dead' and row['attempts'] == 3
+    assert row['html'] == ''
+    assert [d['id'] for d in asyncio.run(outbox.dead_letters())] == [row['id']]
+    assert transport.sent == []
+
+
+def test_booking_without_email_queues_nothing():
+    fake, rooms, outbox = setup(FakeTransport())
+    assert book(rooms, email=None).status_code == 201
+    assert fake.tables.get('email_outbox', []) == []
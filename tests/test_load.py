@@ -0,0 +1,37 @@
+"""Concurrent bookings must never oversell rooms or Full Day capacity."""
+import asyncio
+from datetime import date
+
+from tests.fake_supabase import FakeSupabase
+from tests.harness import install
+from tests.load_test import check_invariants, run_load_test
+from tests.seed import seed_database
+
+
+def test_concurrent_rush_keeps_invariants():
+    report = run_load_test(requests=300, concurrency=60, rooms=6, hot_rooms=3, days=3, latency=0.001)
+
+    assert report['results']['all']['errors'] == 0
+    assert report['results']['hospedaje']['ok'] > 0
+    assert report['results']['fullday']['rejected'] > 0
+    assert report['invariants'] == {'double_booked': [], 'fullday_over_capacity': []}
+
+
+def test_invariant_check_reports_overselling():
+    fake = FakeSupabase()
+    room_id = seed_database(fake, rooms=1, reservations=0, blocks=0, clients=1)[0]['id']
+    client_id = fake.tables['clients'][0]['id']
+    common = {'client_id': client_id, 'status': 'confirmed', 'total_price': 0, 'notes': None}
+    stays = fake.insert_rows('reservations', [
+        {**common, 'reservation_type': 'hospedaje', 'check_in_date': '2027-03-01', 'check_out_date': '2027-03-03', 'num_guests': 2},
+        {**common, 'reservation_type': 'hospedaje', 'check_in_date': '2027-03-02', 'check_out_date': '2027-03-04', 'num_guests': 2},
+        {**common, 'reservation_type': 'fullday', 'check_in_date': '2027-03-01', 'check_out_date': None, 'num_guests': 15},
+        {**common, 'reservation_type': 'fullday', 'check_in_date': '2027-03-01', 'check_out_date': None, 'num_guests': 15},
+    ])
+    fake.insert_rows('reservation_rooms', [{'reservation_id': r['id'], 'room_id': room_id} for r in stays[:2]])
+    install(fake)
+
+    double_booked, over_capacity = asyncio.run(check_invariants(date(2027, 3, 1), date(2027, 3, 5), 20))
+
+    assert [(d['room_id'], d['date']) for d in double_booked] == [(room_id, '2027-03-02')]
+    assert over_capacity == [{'date': '2027-03-01', 'guests': 30, 'capacity': 20}]
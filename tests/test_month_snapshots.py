@@ -0,0 +1,93 @@
+"""Month snapshots must answer exactly like the direct computation."""
+import asyncio
+import random
+from datetime import date, timedelta
+
+from tests.fake_supabase import FakeSupabase
+from tests.harness import install
+from tests.seed import seed_database
+
+TODAY = date.today()
+FIRST = TODAY.replace(day=1)
+
+
+def setup():
+    fake = FakeSupabase()
+    rooms = seed_database(fake, rooms=6, reservations=400, blocks=30, start=FIRST - timedelta(days=10), days=110)
+    install(fake)
+    from services import month_snapshots as module
+    return fake, rooms, module
+
+
+def exact(room_ids, start, end):
+    from services.availability_service import AvailabilityService, build_availability_matrix
+
+    async def run():
+        intervals = await AvailabilityService.get_occupied_intervals(start, end)
+        return (
+            build_availability_matrix(room_ids, intervals, start, end),
+            await AvailabilityService.get_fullday_capacity(start, end),
+        )
+    return asyncio.run(run())
+
+
+def test_snapshots_match_exact_computation_across_months():
+    fake, rooms, module = setup()
+    store = module.month_snapshots
+    room_ids = [room['id'] for room in rooms]
+    last_day = module.month_bounds(store.horizon()[-1])[1]
+    rng = random.Random(7)
+
+    for _ in range(20):
+        start = FIRST + timedelta(days=rng.randrange((last_day - FIRST).days))
+        end = min(start + timedelta(days=rng.randrange(75)), last_day)
+        matrix = asyncio.run(store.room_matrix(room_ids, start, end))
+        capacity = asyncio.run(store.fullday_capacity(start, end))
+        expected_matrix, expected_capacity = exact(room_ids, start, end)
+        assert (matrix == expected_matrix).all()
+        assert capacity == expected_capacity
+
+    # Past the covered months the caller must fall back
+    assert asyncio.run(store.room_matrix(room_ids, FIRST, last_day + timedelta(days=1))) is None
+
+
+def test_only_touched_months_are_rebuilt():
+    fake, rooms, module = setup()
+    store = module.month_snapshots
+    room_ids = [room['id'] for room in rooms]
+    horizon = store.horizon()
+    last_day = module.month_bounds(horizon[-1])[1]
+    asyncio.run(store.room_matrix(room_ids, FIRST, last_day))
+
+    fake.reset_counters()
+    asyncio.run(store.room_matrix(room_ids, FIRST, last_day))
+    assert fake.calls == 0
+
+    from services.availability_events import availability_events
+    second_month = module.month_bounds(horizon[1])[0]
+    availability_events.publish(second_month, second_month + timedelta(days=2), room_ids=room_ids[:1])
+    assert set(store._blobs) == {horizon[0], horizon[2]}
+
+    fake.reset_counters()
+    asyncio.run(store.room_matrix(room_ids, FIRST, last_day))
+    assert set(store._blobs) == set(horizon)
+    assert fake.calls == 2  # stays + Full Day totals for the one rebuilt month
+
+
+def test_disk_snapshots_survive_a_restart(tmp_path):
+    fake, rooms, module = setup()
+    room_ids = [room['id'] for room in rooms]
+    first = module.MonthSnapshotStore(3, 60, str(tmp_path))
+    built = asyncio.run(first.month(module.month_key(TODAY)))
+    assert list(tmp_path.iterdir())
+
+    fake.reset_counters()
+    restarted = module.MonthSnapshotStore(3, 60, str(tmp_path))
+    loaded = asyncio.run(restarted.month(module.month_key(TODAY)))
+    assert fake.calls == 0
+    assert loaded.room_ids == built.room_ids == tuple(room_ids)
+    assert (loaded.rooms == built.rooms).all()
+    assert (loaded.fullday_remaining == built.fullday_remaining).all()
+
+    restarted.invalidate(TODAY, TODAY)
+    assert not list(tmp_path.glob('*.bin'))
@@ -0,0 +1,63 @@
+"""Keyset pagination: following cursors and rejecting tampered ones."""
+import base64
+import json
+
+import pytest
+
+from tests.fake_supabase import FakeSupabase
+from tests.harness import install, app_client, admin_headers
+from tests.seed import seed_database
+
+TAMPERED = [
+    'not-base64!',
+    base64.urlsafe_b64encode(json.dumps(['not-a-date', 'x']).encode()).decode(),
+    base64.urlsafe_b64encode(json.dumps([
+        '2026-01-01T00:00:00+00:00', '00000000-0000-0000-0000-000000000000",status.eq.cancelled)'
+    ]).encode()).decode(),
+    base64.urlsafe_b64encode(json.dumps([1, 2]).encode()).decode(),
+]
+
+
+@pytest.fixture
+def client():
+    fake = FakeSupabase()
+    seed_database(fake, rooms=3, reservations=25, blocks=0)
+    install(fake)
+    return app_client()
+
+
+def test_admin_cursor_walks_every_reservation_once(client):
+    headers, seen, cursor = admin_headers(), [], None
+    while True:
+        response = client.get('/api/admin/reservations', headers=headers, params={'limit': 10, 'cursor': cursor})
+        assert response.status_code == 200
+        seen += [r['id'] for r in response.json()]
+        cursor = response.headers.get('X-Next-Cursor')
+        if not cursor:
+            break
+    assert len(seen) == len(set(seen)) == 25
+
+
+@pytest.mark.parametrize('cursor', TAMPERED)
+def test_admin_rejects_tampered_cursor(client, cursor):
+    response = client.get('/api/admin/reservations', headers=admin_headers(), params={'cursor': cursor})
+    assert response.status_code == 400
+
+
+def test_public_cursor_walks_every_reservation_once(client):
+    seen, cursor = [], None
+    while True:
+        response = client.get('/api/reservations/', params={'limit': 10, 'cursor': cursor})
+        assert response.status_code == 200
+        page = response.json()
+        seen += [r['id'] for r in page['items']]
+        cursor = page['next_cursor']
+        if not cursor:
+            break
+    assert len(seen) == len(set(seen)) == 25
+
+
+@pytest.mark.parametrize('cursor', TAMPERED)
+def test_public_rejects_tampered_cursor(client, cursor):
+    response = client.get('/api/reservations/', params={'cursor': cursor})
+    assert response.status_code == 400
@@ -0,0 +1,111 @@
+"""Admin login through the bcrypt pool: saturation, queue limit and rehashing."""
+import asyncio
+import threading
+
+import httpx
+from passlib.context import CryptContext
+
+from tests.fake_supabase import FakeSupabase
+from tests.harness import install, app_client
+
+# AdminLogin.email is an EmailStr, which rejects the harness's .test domain
+ADMIN_EMAIL = 'admin@aquavalle.com'
+PASSWORD = 'clave-segura'
+
+
+def context(rounds):
+    """The CryptContext auth builds for BCRYPT_ROUNDS=rounds"""
+    return CryptContext(
+        schemes=['bcrypt'], deprecated='auto',
+        bcrypt__default_rounds=rounds, bcrypt__min_rounds=rounds, bcrypt__max_rounds=rounds,
+    )
+
+
+class GatedContext:
+    """Holds verify_and_update on the worker thread until released"""
+
+    def __init__(self, inner):
+        self.inner = inner
+        self.entered = threading.Event()
+        self.release = threading.Event()
+
+    def verify_and_update(self, password, hashed):
+        self.entered.set()
+        self.release.wait(5)
+        return self.inner.verify_and_update(password, hashed)
+
+
+def setup(monkeypatch, hash_context, workers=2, max_queue=8):
+    fake = FakeSupabase()
+    fake.insert_rows('admin_users', [{
+        'email': ADMIN_EMAIL, 'password_hash': context(4).hash(PASSWORD), 'full_name': 'Admin', 'is_active': True,
+    }])
+    install(fake)
+    from auth import PasswordHasher
+    from routes import admin
+    hasher = PasswordHasher(hash_context, workers, max_queue)
+    monkeypatch.setattr(admin, 'password_hasher', hasher)
+    return fake, hasher
+
+
+async def login(client):
+    return await client.post('/api/admin/login', json={'email': ADMIN_EMAIL, 'password': PASSWORD})
+
+
+def burst(gate, count):
+    """One login holding the only worker, then count - 1 more while it is held"""
+    import server
+
+    async def run():
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+            first = asyncio.create_task(login(client))
+            await asyncio.get_running_loop().run_in_executor(None, gate.entered.wait, 5)
+            rest = await asyncio.gather(*(login(client) for _ in range(count - 1)))
+            gate.release.set()
+            return [await first, *rest]
+
+    return asyncio.run(run())
+
+
+def test_saturated_pool_answers_503_with_retry_after(monkeypatch):
+    gate = GatedContext(context(4))
+    fake, hasher = setup(monkeypatch, gate, workers=1, max_queue=0)
+    try:
+        responses = burst(gate, 2)
+    finally:
+        hasher.shutdown()
+
+    assert [r.status_code for r in responses] == [200, 503]
+    assert responses[1].headers['Retry-After'] == '2'
+
+
+def test_only_workers_plus_queue_logins_are_accepted(monkeypatch):
+    gate = GatedContext(context(4))
+    fake, hasher = setup(monkeypatch, gate, workers=1, max_queue=0)
+    try:
+        responses = burst(gate, 5)
+    finally:
+        hasher.shutdown()
+
+    assert [r.status_code for r in responses] == [200, 503, 503, 503, 503]
+    assert all(r.headers['Retry-After'] for r in responses[1:])
+
+
+def test_login_rehashes_when_bcrypt_rounds_change(monkeypatch):
+    # Stored with BCRYPT_ROUNDS=4, server now configured with 5
+    fake, hasher = setup(monkeypatch, context(5))
+    try:
+        stored = lambda: fake.tables['admin_users'][0]['password_hash']
+        assert stored().startswith('$2b$04$')
+
+        assert app_client().post('/api/admin/login', json={'email': ADMIN_EMAIL, 'password': PASSWORD}).status_code == 200
+        rehashed = stored()
+        assert rehashed.startswith('$2b$05$')
+        assert context(5).verify(PASSWORD, rehashed)
+
+        # Already at the configured cost: the next login leaves it alone
+        assert app_client().post('/api/admin/login', json={'email': ADMIN_EMAIL, 'password': PASSWORD}).status_code == 200
+        assert stored() == rehashed
+    finally:
+        hasher.shutdown()
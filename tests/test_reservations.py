@@ -0,0 +1,57 @@
+"""create_reservation: pricing and room handling inside create_reservation_atomic."""
+from datetime import date, timedelta
+
+from tests.fake_supabase import FakeSupabase
+from tests.harness import install, app_client
+from tests.seed import seed_database
+
+
+def setup():
+    fake = FakeSupabase()
+    rooms = seed_database(fake, rooms=3, reservations=0, blocks=0, clients=1)
+    install(fake)
+    return fake, rooms, app_client()
+
+
+def book(client, room_ids, nights=2):
+    check_in = date.today() + timedelta(days=30)
+    return client.post('/api/reservations/', json={
+        'client_name': 'Ana Pérez', 'client_document': 'V123', 'client_phone': '04140000000',
+        'reservation_type': 'hospedaje', 'check_in_date': check_in.isoformat(),
+        'check_out_date': (check_in + timedelta(days=nights)).isoformat(),
+        'num_guests': 2, 'room_ids': room_ids,
+    })
+
+
+def test_stay_is_priced_from_room_rows_not_the_catalog():
+    fake, rooms, client = setup()
+    from services.room_catalog import room_catalog
+    assert client.get('/api/rooms/').status_code == 200
+    assert room_catalog.total_price([rooms[1]['id']], 1) == rooms[1]['price_per_night']
+
+    # Booking does not load the catalog itself
+    room_catalog.invalidate()
+    fake.reset_counters()
+    assert book(client, [rooms[0]['id']]).status_code == 201
+    assert fake.calls_by_table.get('rooms', 0) == 0
+    assert client.get('/api/rooms/').status_code == 200
+
+    # Price edited in Supabase after the catalog was loaded
+    fake.table('rooms').update({'price_per_night': 999.0}).eq('id', rooms[1]['id']).execute()
+    response = book(client, [rooms[1]['id']], nights=3)
+    assert response.status_code == 201
+    assert response.json()['total_price'] == 999.0 * 3
+    stored = next(r for r in fake.tables['reservations'] if r['id'] == response.json()['id'])
+    assert stored['total_price'] == 999.0 * 3
+
+    # The mismatch marks the catalog for reload
+    assert room_catalog.is_stale()
+
+
+def test_repeated_room_is_booked_once():
+    fake, rooms, client = setup()
+    response = book(client, [rooms[0]['id'], rooms[0]['id']])
+    assert response.status_code == 201
+    assert response.json()['rooms'] == [rooms[0]['name']]
+    assert response.json()['total_price'] == rooms[0]['price_per_night'] * 2
+    assert len(fake.tables['reservation_rooms']) == 1